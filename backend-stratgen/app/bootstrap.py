@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+from app.settings import Settings
+from app.services.artifacts import ArtifactStore
+from app.services.cache import GenerationCache
+from app.services.clients import ClientRateLimiter, ClientResolver, parse_api_keys
+from app.services.jobs import JobService
+from app.services.llm import DeterministicPlanGenerator, FeatherlessPlanGenerator, PlanGenerator
+from app.services.nodecheck import NodeSyntaxChecker
+from app.services.queue import JobQueue, SqliteJobQueue
+from app.services.resilience import AimdLimiter, CircuitBreaker, ProviderGuard
+from app.services.routing import Endpoint, EndpointRouter, Route, parse_endpoints
+from app.services.scheduler import JobScheduler
+from app.services.simulation import HeadlessSimulator
+from app.services.store import InMemoryJobStore, JobStore, SqliteJobStore
+from app.services.tokens import load_token_counter
+
+BACKEND_ROOT = Path(__file__).resolve().parent.parent
+
+
+def resolve_artifacts_dir(settings: Settings) -> Path:
+    artifacts_dir = Path(settings.artifacts_dir) if settings.artifacts_dir else BACKEND_ROOT / "artifacts"
+    (artifacts_dir / "runtime").mkdir(parents=True, exist_ok=True)
+    return artifacts_dir
+
+
+def build_syntax_checker(settings: Settings) -> NodeSyntaxChecker:
+    return NodeSyntaxChecker(
+        pool_size=settings.node_check_pool_size,
+        timeout_seconds=settings.node_check_timeout_seconds,
+    )
+
+
+def build_provider_guard(settings: Settings, name: str, max_concurrency: int = 0) -> ProviderGuard:
+    max_limit = settings.llm_concurrency_max
+    if max_concurrency > 0:
+        max_limit = min(max_limit, max_concurrency)
+    return ProviderGuard(
+        name,
+        limiter=AimdLimiter(
+            initial_limit=min(settings.llm_concurrency_initial, max_limit),
+            min_limit=settings.llm_concurrency_min,
+            max_limit=max_limit,
+        ),
+        breaker=CircuitBreaker(
+            failure_threshold=settings.llm_breaker_failures,
+            reset_seconds=settings.llm_breaker_reset_seconds,
+        ),
+        breaker_wait_seconds=settings.llm_breaker_wait_seconds,
+    )
+
+
+def build_endpoint_router(settings: Settings) -> EndpointRouter | None:
+    if settings.llm_endpoints:
+        endpoints = parse_endpoints(settings.llm_endpoints, settings.featherless_api_key, settings.featherless_model)
+    elif settings.featherless_api_key:
+        base_url = settings.featherless_base_url.rstrip("/")
+        endpoints = [Endpoint(base_url, base_url, settings.featherless_api_key, settings.featherless_model)]
+    else:
+        return None
+    return EndpointRouter(
+        [
+            Route(endpoint, build_provider_guard(settings, endpoint.name, endpoint.max_concurrency))
+            for endpoint in endpoints
+        ]
+    )
+
+
+def build_plan_generator(settings: Settings, syntax_checker: NodeSyntaxChecker | None = None) -> PlanGenerator:
+    router = build_endpoint_router(settings)
+    if router is None:
+        return DeterministicPlanGenerator()
+    primary = router.primary.endpoint
+    return FeatherlessPlanGenerator(
+        api_key=primary.api_key,
+        model=primary.model,
+        base_url=primary.base_url,
+        max_tokens=settings.featherless_max_tokens,
+        context_window=settings.featherless_context_window,
+        context_chars=settings.featherless_context_chars,
+        max_retries=settings.featherless_max_retries,
+        timeout_seconds=settings.featherless_timeout_seconds,
+        http_retries=settings.featherless_http_retries,
+        pool_size=settings.featherless_pool_size,
+        syntax_checker=syntax_checker,
+        code_candidates=settings.llm_code_candidates,
+        hedge_percentile=settings.llm_hedge_percentile,
+        max_code_calls=settings.llm_max_code_calls,
+        patch_repairs=settings.llm_patch_repairs,
+        token_counter=load_token_counter(settings.llm_tokenizer_path),
+        router=router,
+    )
+
+
+def build_artifact_store(settings: Settings, artifacts_dir: Path) -> ArtifactStore:
+    return ArtifactStore(
+        artifacts_dir,
+        max_age_seconds=settings.artifact_max_age_seconds,
+        max_total_bytes=settings.artifact_max_bytes,
+    )
+
+
+def _job_db_path(settings: Settings, artifacts_dir: Path) -> Path:
+    return Path(settings.job_db_path) if settings.job_db_path else artifacts_dir / "jobs.sqlite3"
+
+
+def build_job_store(settings: Settings, artifacts_dir: Path) -> JobStore:
+    if settings.job_store_backend == "memory":
+        if settings.job_execution == "external":
+            raise RuntimeError("JOB_EXECUTION=external requires JOB_STORE=sqlite so workers can share job state.")
+        return InMemoryJobStore()
+    if settings.job_store_backend != "sqlite":
+        raise RuntimeError(f"Unsupported JOB_STORE '{settings.job_store_backend}'. Use 'sqlite' or 'memory'.")
+    return SqliteJobStore(
+        _job_db_path(settings, artifacts_dir),
+        cache_size=settings.job_cache_size,
+        shared=settings.job_execution == "external",
+    )
+
+
+def build_job_queue(settings: Settings, artifacts_dir: Path) -> JobQueue | None:
+    if settings.job_execution == "inline":
+        return None
+    if settings.job_execution != "external":
+        raise RuntimeError(f"Unsupported JOB_EXECUTION '{settings.job_execution}'. Use 'inline' or 'external'.")
+    return SqliteJobQueue(_job_db_path(settings, artifacts_dir))
+
+
+def build_generation_cache(settings: Settings, artifacts_dir: Path) -> GenerationCache | None:
+    if not settings.generation_cache_enabled:
+        return None
+    return GenerationCache(
+        artifacts_dir / "cache",
+        memory_entries=settings.generation_cache_memory_entries,
+        max_disk_bytes=settings.generation_cache_max_bytes,
+    )
+
+
+def build_client_resolver(settings: Settings) -> ClientResolver:
+    return ClientResolver(
+        api_keys=parse_api_keys(settings.api_keys),
+        trusted_proxies=settings.trusted_proxies,
+        api_key_header=settings.api_key_header,
+    )
+
+
+def build_rate_limiter(settings: Settings, client_weights: dict[str, float]) -> ClientRateLimiter | None:
+    if settings.client_rate_per_minute <= 0:
+        return None
+    return ClientRateLimiter(settings.client_rate_per_minute, settings.client_burst, client_weights)
+
+
+def build_simulator(settings: Settings) -> HeadlessSimulator | None:
+    if not settings.simulation_enabled:
+        return None
+    return HeadlessSimulator(
+        frames=settings.simulation_frames,
+        frame_budget_ms=settings.simulation_frame_budget_ms,
+        object_budget=settings.simulation_object_budget,
+        timeout_seconds=settings.simulation_timeout_seconds,
+    )
+
+
+def build_job_service(
+    settings: Settings,
+    artifacts_dir: Path,
+    job_queue: JobQueue | None = None,
+    plan_generator: PlanGenerator | None = None,
+    syntax_checker: NodeSyntaxChecker | None = None,
+) -> JobService:
+    # One pool of Node workers serves both the generator's repair loop and the TESTING stage.
+    if syntax_checker is None:
+        syntax_checker = build_syntax_checker(settings)
+    if plan_generator is None:
+        plan_generator = build_plan_generator(settings, syntax_checker)
+    client_weights = build_client_resolver(settings).weights()
+    return JobService(
+        artifacts_root=artifacts_dir,
+        plan_generator=plan_generator,
+        job_store=build_job_store(settings, artifacts_dir),
+        job_ttl_seconds=settings.job_ttl_seconds,
+        sweep_interval_seconds=settings.job_sweep_interval_seconds,
+        scheduler=JobScheduler(
+            max_queue_size=settings.scheduler_queue_size,
+            llm_concurrency=settings.scheduler_llm_concurrency,
+            testing_concurrency=settings.scheduler_testing_concurrency,
+            fast_lane_concurrency=settings.scheduler_fast_concurrency,
+            client_llm_concurrency=settings.scheduler_client_llm_concurrency,
+            client_weights=client_weights,
+        ),
+        job_queue=job_queue,
+        generation_cache=build_generation_cache(settings, artifacts_dir),
+        syntax_checker=syntax_checker,
+        simulator=build_simulator(settings),
+        simulation_repair_attempts=settings.simulation_repair_attempts,
+        modify_fast_path=settings.modify_fast_path,
+        artifact_store=build_artifact_store(settings, artifacts_dir),
+        artifact_gc_interval_seconds=settings.artifact_gc_interval_seconds,
+        coalesce=settings.job_coalescing,
+        max_flight_followers=settings.job_coalescing_max_followers,
+        default_deadline_seconds=settings.job_deadline_seconds,
+        rate_limiter=build_rate_limiter(settings, client_weights),
+        max_batch_jobs=settings.batch_max_jobs,
+    )
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+from datetime import datetime
 from enum import Enum
-from typing import Literal
+from typing import Annotated, Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -12,6 +13,8 @@ class JobStatus(str, Enum):
     TESTING = "testing"
     READY = "ready"
     FAILED = "failed"
+    CANCELLED = "cancelled"
+    TIMED_OUT = "timed_out"
 
 
 class GenerationMode(str, Enum):
@@ -96,6 +99,7 @@ class CreateJobRequest(BaseModel):
     prompt: str = Field(min_length=1, max_length=3000)
     mode: GenerationMode = GenerationMode.NEW
     base_game_id: str | None = Field(default=None, min_length=6, max_length=128)
+    deadline_seconds: float | None = Field(default=None, gt=0, le=86400)
 
 
 class CreateJobResponse(BaseModel):
@@ -104,6 +108,41 @@ class CreateJobResponse(BaseModel):
     mode: GenerationMode
 
 
+class CreateBatchRequest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    prompts: list[Annotated[str, Field(min_length=1, max_length=3000)]] = Field(min_length=1, max_length=1000)
+    mode: GenerationMode = GenerationMode.NEW
+    base_game_id: str | None = Field(default=None, min_length=6, max_length=128)
+    deadline_seconds: float | None = Field(default=None, gt=0, le=86400)
+
+
+class CreateBatchResponse(BaseModel):
+    batch_id: str
+    jobs: list[CreateJobResponse]
+
+
+class JobSummary(BaseModel):
+    job_id: str
+    status: JobStatus
+    game_url: str | None = None
+    error: str | None = None
+    version: int = 0
+
+
+class JobListResponse(BaseModel):
+    jobs: list[JobSummary]
+    missing: list[str] = Field(default_factory=list)
+
+
+class BatchResponse(BaseModel):
+    batch_id: str
+    total: int
+    counts: dict[JobStatus, int]
+    finished: bool
+    jobs: list[JobSummary]
+
+
 class JobResponse(BaseModel):
     job_id: str
     status: JobStatus
@@ -113,3 +152,7 @@ class JobResponse(BaseModel):
     error: str | None = None
     game_url: str | None = None
     plan: GamePlan | None = None
+    version: int = 0
+    simulation: dict[str, object] | None = None
+    deadline_at: datetime | None = None
+    batch_id: str | None = None
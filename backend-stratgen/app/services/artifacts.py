@@ -0,0 +1,299 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+_GAME_ID = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+_FILE_NAME = re.compile(r"^[A-Za-z0-9_-][A-Za-z0-9_.-]{0,127}$")
+# A blob younger than this is never swept: a concurrent put may be about to reference it.
+BLOB_GRACE_SECONDS = 300
+# Serving a game refreshes its manifest mtime (the LRU clock) at most this often.
+ACCESS_RESOLUTION_SECONDS = 60
+# Pre-blob-store game directories moved into the store per GC pass.
+LEGACY_IMPORT_BATCH = 500
+
+
+@dataclass(slots=True)
+class GcReport:
+    games_deleted: int = 0
+    expired: int = 0
+    evicted: int = 0
+    protected: int = 0
+    blobs_deleted: int = 0
+    bytes_freed: int = 0
+    legacy_imported: int = 0
+    games: int = 0
+    total_bytes: int = 0
+    duration_ms: float = 0.0
+    finished_at: float = field(default_factory=time.time)
+
+    def as_dict(self) -> dict[str, object]:
+        return asdict(self)
+
+
+class ArtifactStore:
+    # Game files live once per distinct content under blobs/<aa>/<bb>/<sha256><ext>; each game is a
+    # manifest under manifests/<aa>/<game_id>.json mapping file names to blobs. A manifest's mtime
+    # is its last access, which drives LRU eviction.
+    def __init__(
+        self,
+        root: Path,
+        max_age_seconds: int = 0,
+        max_total_bytes: int = 0,
+        manifest_cache_entries: int = 1024,
+    ):
+        self.root = root
+        self.blobs_dir = root / "blobs"
+        self.manifests_dir = root / "manifests"
+        self.legacy_dir = root / "games"
+        self.max_age_seconds = max(0, max_age_seconds)
+        self.max_total_bytes = max(0, max_total_bytes)
+        self.manifest_cache_entries = max(0, manifest_cache_entries)
+        self._manifests: OrderedDict[str, tuple[int, dict[str, object]]] = OrderedDict()
+        self._touched: dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._gc_lock = threading.Lock()
+        self._last_gc: GcReport | None = None
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.manifests_dir.mkdir(parents=True, exist_ok=True)
+
+    def put_game(self, game_id: str, files: dict[str, bytes], created_at: float | None = None) -> dict[str, object]:
+        _check_game_id(game_id)
+        entries = {}
+        for name, payload in files.items():
+            if not _FILE_NAME.match(name):
+                raise ValueError(f"Invalid artifact file name '{name}'")
+            digest = hashlib.sha256(payload).hexdigest()
+            blob = f"{digest}{Path(name).suffix}"
+            self._write_blob(blob, payload)
+            entries[name] = {"blob": blob, "size": len(payload)}
+        manifest = {"game_id": game_id, "created_at": created_at or time.time(), "files": entries}
+        path = self._manifest_path(game_id)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(path, json.dumps(manifest, separators=(",", ":")).encode("utf-8"))
+        with self._lock:
+            self._manifests.pop(game_id, None)
+            self._touched[game_id] = time.monotonic()
+        return manifest
+
+    def exists(self, game_id: str) -> bool:
+        return self._manifest(game_id) is not None or self._legacy_file(game_id, "plan.json") is not None
+
+    def file_path(self, game_id: str, name: str) -> Path | None:
+        manifest = self._manifest(game_id)
+        if manifest is None:
+            return self._legacy_file(game_id, name)
+        entry = manifest["files"].get(name)
+        return self._blob_path(entry["blob"]) if entry else None
+
+    def read_bytes(self, game_id: str, name: str) -> bytes | None:
+        path = self.file_path(game_id, name)
+        if path is None:
+            return None
+        try:
+            return path.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def read_text(self, game_id: str, name: str) -> str | None:
+        payload = self.read_bytes(game_id, name)
+        return payload.decode("utf-8") if payload is not None else None
+
+    def touch(self, game_id: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            last = self._touched.get(game_id)
+            if last is not None and now - last < ACCESS_RESOLUTION_SECONDS:
+                return
+            self._touched[game_id] = now
+            if len(self._touched) > self.manifest_cache_entries * 8:
+                self._touched.clear()
+        try:
+            os.utime(self._manifest_path(game_id))
+        except (OSError, ValueError):
+            pass
+
+    def delete_game(self, game_id: str) -> bool:
+        # Blobs are left to the next sweep; other games may share them.
+        with self._lock:
+            self._manifests.pop(game_id, None)
+            self._touched.pop(game_id, None)
+        try:
+            self._manifest_path(game_id).unlink()
+        except FileNotFoundError:
+            return False
+        return True
+
+    def collect(self, protected: set[str]) -> GcReport:
+        with self._gc_lock:
+            started = time.perf_counter()
+            report = GcReport()
+            report.legacy_imported = self._import_legacy_games()
+            games = self._scan_manifests()
+            refcounts: dict[str, int] = {}
+            sizes: dict[str, int] = {}
+            for _, _, files in games.values():
+                for entry in files.values():
+                    refcounts[entry["blob"]] = refcounts.get(entry["blob"], 0) + 1
+                    sizes[entry["blob"]] = entry["size"]
+            total = sum(sizes.values())
+            now = time.time()
+
+            def drop(game_id: str) -> None:
+                nonlocal total
+                if self.delete_game(game_id):
+                    report.games_deleted += 1
+                for entry in games.pop(game_id)[2].values():
+                    refcounts[entry["blob"]] -= 1
+                    if refcounts[entry["blob"]] == 0:
+                        total -= sizes[entry["blob"]]
+
+            report.protected = sum(1 for game_id in games if game_id in protected)
+            if self.max_age_seconds:
+                for game_id, (created_at, _, _) in list(games.items()):
+                    if game_id not in protected and now - created_at > self.max_age_seconds:
+                        drop(game_id)
+                        report.expired += 1
+            if self.max_total_bytes and total > self.max_total_bytes:
+                by_last_access = sorted(games.items(), key=lambda item: item[1][1])
+                for game_id, _ in by_last_access:
+                    if total <= self.max_total_bytes:
+                        break
+                    if game_id not in protected:
+                        drop(game_id)
+                        report.evicted += 1
+            live = {blob for blob, count in refcounts.items() if count > 0}
+            report.blobs_deleted, report.bytes_freed = self._sweep_blobs(live, now)
+            report.games = len(games)
+            report.total_bytes = total
+            report.duration_ms = round((time.perf_counter() - started) * 1000, 2)
+            report.finished_at = time.time()
+            self._last_gc = report
+            return report
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "max_age_seconds": self.max_age_seconds,
+            "max_total_bytes": self.max_total_bytes,
+            "last_gc": self._last_gc.as_dict() if self._last_gc is not None else None,
+        }
+
+    def _manifest(self, game_id: str) -> dict[str, object] | None:
+        if not _GAME_ID.match(game_id):
+            return None
+        path = self._manifest_path(game_id)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            cached = self._manifests.get(game_id)
+            if cached is not None and cached[0] == mtime:
+                self._manifests.move_to_end(game_id)
+                return cached[1]
+        try:
+            manifest = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if self.manifest_cache_entries:
+            with self._lock:
+                self._manifests[game_id] = (mtime, manifest)
+                self._manifests.move_to_end(game_id)
+                while len(self._manifests) > self.manifest_cache_entries:
+                    self._manifests.popitem(last=False)
+        return manifest
+
+    def _manifest_path(self, game_id: str) -> Path:
+        _check_game_id(game_id)
+        shard = hashlib.sha256(game_id.encode("utf-8")).hexdigest()[:2]
+        return self.manifests_dir / shard / f"{game_id}.json"
+
+    def _blob_path(self, blob: str) -> Path:
+        return self.blobs_dir / blob[:2] / blob[2:4] / blob
+
+    def _write_blob(self, blob: str, payload: bytes) -> None:
+        path = self._blob_path(blob)
+        if path.exists():
+            # Refresh the mtime so a sweep running right now treats it as new (see BLOB_GRACE_SECONDS).
+            try:
+                os.utime(path)
+                return
+            except FileNotFoundError:
+                pass
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(path, payload)
+
+    def _scan_manifests(self) -> dict[str, tuple[float, float, dict[str, dict[str, object]]]]:
+        # game_id -> (created_at, last access, files)
+        games = {}
+        for path in self.manifests_dir.glob("*/*.json"):
+            try:
+                last_access = path.stat().st_mtime
+                manifest = json.loads(path.read_text(encoding="utf-8"))
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+            games[path.stem] = (float(manifest.get("created_at", last_access)), last_access, manifest.get("files", {}))
+        return games
+
+    def _sweep_blobs(self, live: set[str], now: float) -> tuple[int, int]:
+        deleted = freed = 0
+        for path in self.blobs_dir.glob("*/*/*"):
+            if path.name in live or path.name.endswith(".tmp"):
+                continue
+            try:
+                stat = path.stat()
+                if now - stat.st_mtime < BLOB_GRACE_SECONDS:
+                    continue
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            deleted += 1
+            freed += stat.st_size
+        return deleted, freed
+
+    def _legacy_file(self, game_id: str, name: str) -> Path | None:
+        if not _GAME_ID.match(game_id) or not _FILE_NAME.match(name):
+            return None
+        path = self.legacy_dir / game_id / name
+        return path if path.is_file() else None
+
+    def _import_legacy_games(self) -> int:
+        if not self.legacy_dir.is_dir():
+            return 0
+        imported = 0
+        for game_dir in self.legacy_dir.iterdir():
+            if imported >= LEGACY_IMPORT_BATCH:
+                break
+            if not game_dir.is_dir() or not _GAME_ID.match(game_dir.name):
+                continue
+            files = {
+                path.name: path.read_bytes()
+                for path in game_dir.iterdir()
+                if path.is_file() and _FILE_NAME.match(path.name) and path.name != "phaser.min.js"
+            }
+            if "plan.json" in files:
+                modified = game_dir.stat().st_mtime
+                self.put_game(game_dir.name, files, created_at=modified)
+                os.utime(self._manifest_path(game_dir.name), (modified, modified))
+            shutil.rmtree(game_dir, ignore_errors=True)
+            imported += 1
+        return imported
+
+
+def _check_game_id(game_id: str) -> None:
+    if not _GAME_ID.match(game_id):
+        raise ValueError(f"Invalid game id '{game_id}'")
+
+
+def _atomic_write(path: Path, payload: bytes) -> None:
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_bytes(payload)
+    os.replace(tmp_path, path)
@@ -1,22 +1,25 @@
 from __future__ import annotations
 
+import functools
+import gzip
+import hashlib
 import json
+import os
 from pathlib import Path
 import re
-import shutil
+
+try:
+    import brotli
+except ImportError:  # optional: only used to pre-build .br variants of the runtime
+    brotli = None
 
 from app.models import GamePlan
+from app.services.artifacts import ArtifactStore
+from app.services.jsanalysis import GAME_SCRIPT_MARKERS, NETWORK_RULES, analyze_js
+from app.services.metrics import VALIDATION_FAILURES, VALIDATION_SECONDS, failure_reason
 from app.services.types import BuildArtifact
 
-FORBIDDEN_PATTERNS = [
-    r"\bfetch\s*\(",
-    r"\bXMLHttpRequest\b",
-    r"\bWebSocket\b",
-    r"\bEventSource\b",
-    r"\bimportScripts\b",
-    r"\beval\s*\(",
-    r"\bnew\s+Function\b",
-]
+RUNTIME_URL_PREFIX = "/runtime"
 
 
 def _slugify(value: str) -> str:
@@ -24,7 +27,7 @@ def _slugify(value: str) -> str:
     return cleaned[:40] or "generated-game"
 
 
-def _build_index_html(title: str) -> str:
+def _build_index_html(title: str, runtime_url: str) -> str:
     safe_title = title.replace("<", "").replace(">", "")
     return f"""<!doctype html>
 <html lang="en">
@@ -58,7 +61,7 @@ def _build_index_html(title: str) -> str:
 </head>
 <body>
   <div id="game-root"></div>
-  <script src="./phaser.min.js"></script>
+  <script src="{runtime_url}"></script>
   <script src="./game.js"></script>
 </body>
 </html>
@@ -147,18 +150,11 @@ def extract_scene_module_from_game_js(game_js: str) -> str | None:
 
 
 def validate_generated_js(js_source: str) -> list[str]:
-    violations: list[str] = []
-    for pattern in FORBIDDEN_PATTERNS:
-        if re.search(pattern, js_source):
-            violations.append(f"forbidden:{pattern}")
-    if "new Phaser.Game" not in js_source:
-        violations.append("missing:new Phaser.Game")
-    if "game-root" not in js_source:
-        violations.append("missing:game-root")
-    if "window.__ggen_runtime__" not in js_source:
-        violations.append("missing:window.__ggen_runtime__")
-    if "dispose(" not in js_source:
-        violations.append("missing:dispose")
+    with VALIDATION_SECONDS.labels("game_js").time():
+        analysis = analyze_js(js_source)
+        violations = analysis.forbidden(NETWORK_RULES) + analysis.missing(GAME_SCRIPT_MARKERS)
+    for violation in violations:
+        VALIDATION_FAILURES.labels("game_js", failure_reason(violation)).inc()
     return violations
 
 
@@ -183,32 +179,65 @@ def _resolve_phaser_runtime(artifacts_root: Path) -> Path:
     )
 
 
-def build_game_artifact(job_id: str, plan: GamePlan, scene_module_js: str, artifacts_root: Path) -> BuildArtifact:
-    game_dir = artifacts_root / "games" / job_id
-    game_dir.mkdir(parents=True, exist_ok=True)
-
+@functools.cache
+def _phaser_runtime_source(artifacts_root: Path) -> tuple[bytes, str]:
+    source = _resolve_phaser_runtime(artifacts_root).read_bytes()
+    return source, hashlib.sha256(source).hexdigest()[:16]
+
+
+def publish_phaser_runtime(artifacts_root: Path) -> Path:
+    # Every game shares one content-addressed copy, so browsers can cache it forever across games.
+    # Variants deleted from the artifacts volume are written again on the next call.
+    source, digest = _phaser_runtime_source(artifacts_root)
+    runtime_dir = artifacts_root / "runtime"
+    runtime_dir.mkdir(parents=True, exist_ok=True)
+    runtime_path = runtime_dir / f"phaser.{digest}.min.js"
+    variants = {runtime_path: source, runtime_path.with_name(f"{runtime_path.name}.gz"): None}
+    if brotli is not None:
+        variants[runtime_path.with_name(f"{runtime_path.name}.br")] = None
+    for path in variants:
+        if path.exists():
+            continue
+        if path.suffix == ".gz":
+            payload = gzip.compress(source, compresslevel=9, mtime=0)
+        elif path.suffix == ".br":
+            payload = brotli.compress(source, quality=11)
+        else:
+            payload = source
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(payload)
+        os.replace(tmp_path, path)
+    return runtime_path
+
+
+def build_game_artifact(
+    job_id: str,
+    plan: GamePlan,
+    scene_module_js: str,
+    artifacts_root: Path,
+    store: ArtifactStore,
+) -> BuildArtifact:
     game_js = _compose_game_js(plan, scene_module_js)
     violations = validate_generated_js(game_js)
     if violations:
         raise ValueError(f"Generated JS validation failed: {', '.join(violations)}")
 
-    index_html = _build_index_html(plan.title)
-    phaser_runtime_src = _resolve_phaser_runtime(artifacts_root)
-
-    (game_dir / "index.html").write_text(index_html, encoding="utf-8")
-    (game_dir / "game.js").write_text(game_js, encoding="utf-8")
-    shutil.copyfile(phaser_runtime_src, game_dir / "phaser.min.js")
-    (game_dir / "plan.json").write_text(plan.model_dump_json(indent=2), encoding="utf-8")
-
-    slug = _slugify(plan.title)
-    (game_dir / "metadata.json").write_text(
-        json.dumps({"job_id": job_id, "slug": slug, "title": plan.title}, indent=2),
-        encoding="utf-8",
+    runtime_path = publish_phaser_runtime(artifacts_root)
+    index_html = _build_index_html(plan.title, f"{RUNTIME_URL_PREFIX}/{runtime_path.name}")
+    metadata = {"job_id": job_id, "slug": _slugify(plan.title), "title": plan.title}
+
+    store.put_game(
+        job_id,
+        {
+            "index.html": index_html.encode("utf-8"),
+            "game.js": game_js.encode("utf-8"),
+            "plan.json": plan.model_dump_json(indent=2).encode("utf-8"),
+            "metadata.json": json.dumps(metadata, indent=2).encode("utf-8"),
+        },
     )
 
     return BuildArtifact(
-        game_dir=game_dir,
+        game_id=job_id,
         game_url=f"/games/{job_id}/index.html",
         plan=plan,
     )
-
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+
+def cache_key(*parts: object) -> str:
+    canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def content_hash(value: str | None) -> str | None:
+    if value is None:
+        return None
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    def __init__(self, root: Path, memory_entries: int = 256, max_disk_bytes: int = 256 * 1024 * 1024):
+        self.root = root
+        self.memory_entries = max(0, memory_entries)
+        self.max_disk_bytes = max(0, max_disk_bytes)
+        self._memory: OrderedDict[tuple[str, str], str] = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters: dict[str, dict[str, int]] = {}
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._disk_bytes = sum(path.stat().st_size for path in self.root.glob("*/*/*.txt"))
+
+    def get(self, namespace: str, key: str) -> str | None:
+        with self._lock:
+            value = self._memory.get((namespace, key))
+            if value is not None:
+                self._memory.move_to_end((namespace, key))
+                self._count(namespace, "memory_hits")
+                return value
+        path = self._path(namespace, key)
+        try:
+            value = path.read_text(encoding="utf-8")
+        except FileNotFoundError:
+            with self._lock:
+                self._count(namespace, "misses")
+            return None
+        # Refresh mtime so disk eviction approximates LRU.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self._count(namespace, "disk_hits")
+            self._remember(namespace, key, value)
+        return value
+
+    def put(self, namespace: str, key: str, value: str) -> None:
+        path = self._path(namespace, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(value, encoding="utf-8")
+        previous_size = path.stat().st_size if path.exists() else 0
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._count(namespace, "writes")
+            self._remember(namespace, key, value)
+            self._disk_bytes += path.stat().st_size - previous_size
+            over_budget = self.max_disk_bytes and self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def discard(self, namespace: str, key: str) -> None:
+        path = self._path(namespace, key)
+        with self._lock:
+            self._memory.pop((namespace, key), None)
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            self._disk_bytes -= size
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "memory_entries": len(self._memory),
+                "memory_capacity": self.memory_entries,
+                "disk_bytes": self._disk_bytes,
+                "disk_capacity_bytes": self.max_disk_bytes,
+                "namespaces": {namespace: dict(counters) for namespace, counters in self._counters.items()},
+            }
+
+    def _path(self, namespace: str, key: str) -> Path:
+        return self.root / namespace / key[:2] / f"{key}.txt"
+
+    def _remember(self, namespace: str, key: str, value: str) -> None:
+        if self.memory_entries == 0:
+            return
+        self._memory[(namespace, key)] = value
+        self._memory.move_to_end((namespace, key))
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _count(self, namespace: str, counter: str) -> None:
+        counters = self._counters.setdefault(
+            namespace,
+            {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0},
+        )
+        counters[counter] += 1
+
+    def _evict_disk(self) -> None:
+        entries = []
+        for path in self.root.glob("*/*/*.txt"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        total = sum(size for _, size, _ in entries)
+        # Evict down to 90% of the budget so a burst of writes does not rescan on every put.
+        target = int(self.max_disk_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            total -= size
+            namespace = path.parent.parent.name
+            with self._lock:
+                self._memory.pop((namespace, path.stem), None)
+                self._count(namespace, "evictions")
+        with self._lock:
+            self._disk_bytes = total
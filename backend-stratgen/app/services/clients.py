@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import ipaddress
+import json
+import math
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Collection, Mapping
+from dataclasses import dataclass
+
+ANONYMOUS_CLIENT = "anonymous"
+
+
+class RateLimitedError(RuntimeError):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True)
+class ApiClient:
+    name: str
+    weight: float = 1.0
+
+    @property
+    def client_id(self) -> str:
+        return f"key:{self.name}"
+
+
+def parse_api_keys(raw: str) -> dict[str, ApiClient]:
+    # API_KEYS: a JSON object mapping each key to a client name, or to {"name", "weight"}.
+    if not raw.strip():
+        return {}
+    try:
+        items = json.loads(raw)
+    except ValueError as exc:
+        raise RuntimeError(f"API_KEYS is not valid JSON: {exc}") from exc
+    if not isinstance(items, dict):
+        raise RuntimeError("API_KEYS must be a JSON object mapping API keys to client names.")
+    clients: dict[str, ApiClient] = {}
+    for key, value in items.items():
+        if isinstance(value, str):
+            value = {"name": value}
+        if not isinstance(value, dict) or not value.get("name"):
+            raise RuntimeError("Each API_KEYS entry must be a client name or an object with a name.")
+        weight = float(value.get("weight", 1.0))
+        if weight <= 0:
+            raise RuntimeError(f"API_KEYS weight for '{value['name']}' must be positive.")
+        clients[key] = ApiClient(name=str(value["name"]), weight=weight)
+    return clients
+
+
+class ClientResolver:
+    # A configured API key identifies its client; anything else is identified by remote address.
+    # Unknown keys are ignored, otherwise a client could mint a fresh identity per request.
+    # X-Forwarded-For is only read when the connection comes from a trusted proxy.
+    def __init__(
+        self,
+        api_keys: Mapping[str, ApiClient] | None = None,
+        trusted_proxies: Collection[str] = (),
+        api_key_header: str = "x-api-key",
+    ):
+        self.api_keys = dict(api_keys or {})
+        self.trusted_proxies = {_normalize_address(address) for address in trusted_proxies}
+        self.api_key_header = api_key_header.lower()
+
+    def resolve(self, headers: Mapping[str, str], remote_address: str | None) -> str:
+        key = headers.get(self.api_key_header)
+        client = self.api_keys.get(key) if key else None
+        if client is not None:
+            return client.client_id
+        address = _normalize_address(remote_address) if remote_address else None
+        if address in self.trusted_proxies:
+            forwarded = [hop.strip() for hop in headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+            # The right-most address not added by one of our proxies is the client.
+            for hop in reversed(forwarded):
+                hop = _normalize_address(hop)
+                if hop not in self.trusted_proxies:
+                    address = hop
+                    break
+        return f"ip:{address}" if address else ANONYMOUS_CLIENT
+
+    def weights(self) -> dict[str, float]:
+        return {client.client_id: client.weight for client in self.api_keys.values()}
+
+
+def _normalize_address(address: str) -> str:
+    try:
+        return str(ipaddress.ip_address(address))
+    except ValueError:
+        return address
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second: float, burst: float):
+        self.rate = rate_per_second
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+
+    def take(self, now: float, cost: float = 1) -> float:
+        # Takes `cost` tokens and returns 0, or returns the seconds until that many are available.
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def full_at(self) -> float:
+        return self.updated_at + (self.burst - self.tokens) / self.rate
+
+
+class ClientRateLimiter:
+    # One token bucket per client for job creation; a client's weight scales its rate and burst.
+    # Buckets that have refilled are indistinguishable from new ones, so only the most recently
+    # used `max_clients` are kept.
+    def __init__(
+        self,
+        rate_per_minute: float,
+        burst: int,
+        weights: Mapping[str, float] | None = None,
+        max_clients: int = 10000,
+    ):
+        if rate_per_minute <= 0:
+            raise ValueError("rate_per_minute must be positive.")
+        self.rate_per_second = rate_per_minute / 60
+        self.burst = max(1, burst)
+        self.weights = dict(weights or {})
+        self.max_clients = max(1, max_clients)
+        self.throttled = 0
+        self._buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def acquire(self, client_id: str, cost: int = 1) -> None:
+        # A batch costs one token per job and is admitted or throttled as a whole.
+        weight = self.weights.get(client_id, 1.0)
+        if cost > self.burst * weight:
+            raise ValueError(f"At most {int(self.burst * weight)} jobs may be submitted at once by this client")
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client_id)
+            if bucket is None:
+                bucket = TokenBucket(self.rate_per_second * weight, self.burst * weight)
+                self._buckets[client_id] = bucket
+            self._buckets.move_to_end(client_id)
+            wait = bucket.take(now, cost)
+            self._evict(now)
+            if wait:
+                self.throttled += 1
+        if wait:
+            raise RateLimitedError(
+                "Too many jobs from this client, try again later.",
+                retry_after=max(1, math.ceil(wait)),
+            )
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "rate_per_minute": round(self.rate_per_second * 60, 3),
+                "burst": self.burst,
+                "tracked_clients": len(self._buckets),
+                "throttled": self.throttled,
+            }
+
+    def _evict(self, now: float) -> None:
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        # The least recently used bucket is the likeliest to be full again.
+        while self._buckets:
+            oldest = next(iter(self._buckets.values()))
+            if oldest.full_at() > now:
+                break
+            self._buckets.popitem(last=False)
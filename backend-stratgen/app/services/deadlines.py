@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+class JobCancelledError(RuntimeError):
+    pass
+
+
+class DeadlineExceededError(RuntimeError):
+    pass
+
+
+class Deadline:
+    # A job's time budget and cancellation flag. Pipelines check it between stages and repair
+    # attempts; provider calls clip their HTTP timeout to what is left.
+    def __init__(self, expires_at: float | None = None):
+        self.expires_at = expires_at  # time.monotonic() value, None for no deadline
+        self._cancelled = threading.Event()
+
+    @classmethod
+    def after(cls, seconds: float | None) -> Deadline:
+        return cls(time.monotonic() + seconds if seconds is not None else None)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def remaining(self) -> float | None:
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def check(self) -> None:
+        if self.cancelled:
+            raise JobCancelledError("Job was cancelled.")
+        if self.expired:
+            raise DeadlineExceededError("Job deadline exceeded.")
+
+    def require(self, seconds: float, what: str) -> None:
+        # Fails early instead of starting work that cannot finish before the deadline.
+        self.check()
+        remaining = self.remaining()
+        if remaining is not None and remaining < seconds:
+            raise DeadlineExceededError(
+                f"Job deadline exceeded: {what} needs about {seconds:.1f}s, {remaining:.1f}s left."
+            )
+
+
+_current_deadline: ContextVar[Deadline | None] = ContextVar("ggen_job_deadline", default=None)
+
+
+@contextmanager
+def job_deadline(deadline: Deadline) -> Iterator[Deadline]:
+    token = _current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current_deadline.reset(token)
+
+
+def current_deadline() -> Deadline | None:
+    return _current_deadline.get()
+
+
+def check_deadline() -> None:
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check()
+
+
+def deadline_expired() -> bool:
+    deadline = _current_deadline.get()
+    return deadline is not None and deadline.expired
+
+
+def require_time(seconds: float | None, what: str) -> None:
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.require(seconds or 0.0, what)
+
+
+def call_timeout(default: float) -> float:
+    # The HTTP timeout for one provider call: the configured one, or less when the job's deadline
+    # is closer. Outside a job pipeline this is just `default`.
+    deadline = _current_deadline.get()
+    if deadline is None:
+        return default
+    deadline.check()
+    remaining = deadline.remaining()
+    return default if remaining is None else max(0.001, min(default, remaining))
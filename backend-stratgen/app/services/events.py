@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from app.services.metrics import GENERATOR_EVENTS
+
+EventReporter = Callable[[str, str], None]
+
+_current_reporter: ContextVar[EventReporter | None] = ContextVar("ggen_event_reporter", default=None)
+
+
+def report_event(kind: str, message: str) -> None:
+    # Generators call this from retry/repair loops; outside a job pipeline it only counts the event.
+    GENERATOR_EVENTS.labels(kind).inc()
+    reporter = _current_reporter.get()
+    if reporter is not None:
+        reporter(kind, message)
+
+
+@contextmanager
+def event_reporter(reporter: EventReporter) -> Iterator[None]:
+    token = _current_reporter.set(reporter)
+    try:
+        yield
+    finally:
+        _current_reporter.reset(token)
+
+
+class JobNotifier:
+    def __init__(self) -> None:
+        self._waiters: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Event]]] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, job_id: str) -> asyncio.Event:
+        event = asyncio.Event()
+        with self._lock:
+            self._waiters.setdefault(job_id, set()).add((asyncio.get_running_loop(), event))
+        return event
+
+    def unsubscribe(self, job_id: str, event: asyncio.Event) -> None:
+        with self._lock:
+            waiters = self._waiters.get(job_id)
+            if not waiters:
+                return
+            for entry in [entry for entry in waiters if entry[1] is event]:
+                waiters.discard(entry)
+            if not waiters:
+                del self._waiters[job_id]
+
+    def notify(self, job_id: str) -> None:
+        with self._lock:
+            waiters = list(self._waiters.get(job_id, ()))
+        for loop, event in waiters:
+            # Waiters usually live on the API event loop while jobs run on the scheduler loop.
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                self.unsubscribe(job_id, event)
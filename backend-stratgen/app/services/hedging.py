@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+class CallBudgetExhausted(RuntimeError):
+    pass
+
+
+class CallBudget:
+    # Caps the model calls one job may spend across all of its candidates and their repairs.
+    def __init__(self, limit: int):
+        self.limit = max(1, limit)
+        self.used = 0
+
+    @property
+    def remaining(self) -> int:
+        return self.limit - self.used
+
+    def take(self) -> None:
+        if self.used >= self.limit:
+            raise CallBudgetExhausted(f"Code generation call budget of {self.limit} exhausted")
+        self.used += 1
+
+
+class LatencyWindow:
+    def __init__(self, size: int = 64, min_samples: int = 8):
+        self.min_samples = min_samples
+        self._samples: deque[float] = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, fraction: float) -> float | None:
+        with self._lock:
+            if len(self._samples) < self.min_samples:
+                return None
+            ordered = sorted(self._samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+        return ordered[index]
+
+
+async def first_success(
+    start: Callable[[int], Awaitable[T]],
+    max_candidates: int,
+    hedge_delay: float | None,
+    can_start: Callable[[], bool] = lambda: True,
+    on_start: Callable[[int], None] | None = None,
+) -> T:
+    # Starts candidate 1, then another one every `hedge_delay` seconds (None: only to replace a
+    # failed candidate) up to `max_candidates`. The first result wins; the rest are cancelled.
+    pending: set[asyncio.Task[T]] = set()
+    errors: list[str] = []
+    started = 0
+
+    def launch() -> None:
+        nonlocal started
+        started += 1
+        if on_start is not None:
+            on_start(started)
+        pending.add(asyncio.create_task(start(started)))
+
+    launch()
+    try:
+        while pending:
+            can_hedge = hedge_delay is not None and started < max_candidates and can_start()
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=hedge_delay if can_hedge else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                launch()
+                continue
+            for task in done:
+                pending.discard(task)
+                error = task.exception()
+                if error is None:
+                    return task.result()
+                errors.append(str(error))
+            if not pending and started < max_candidates and can_start():
+                launch()
+        raise RuntimeError(f"All {started} candidates failed: {'; '.join(dict.fromkeys(errors))}")
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
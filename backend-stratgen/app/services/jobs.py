@@ -1,142 +1,923 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import functools
 import json
-import shutil
-import subprocess
+import logging
+import threading
 import time
 import uuid
-from dataclasses import dataclass
-from datetime import datetime, timezone
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
+from pydantic import ValidationError
+
 from app.models import GamePlan, GenerationMode, JobStatus
-from app.services.builder import build_game_artifact, extract_scene_module_from_game_js
-from app.services.llm import PlanGenerator
+from app.services.artifacts import ArtifactStore, GcReport
+from app.services.builder import build_game_artifact, extract_scene_module_from_game_js, publish_phaser_runtime
+from app.services.cache import GenerationCache, cache_key, content_hash
+from app.services.clients import ClientRateLimiter, RateLimitedError
+from app.services.deadlines import (
+    Deadline,
+    DeadlineExceededError,
+    JobCancelledError,
+    check_deadline,
+    current_deadline,
+    job_deadline,
+    require_time,
+)
+from app.services.events import JobNotifier, event_reporter, report_event
+from app.services.llm import AsyncPlanGenerator, DeterministicPlanGenerator, PlanGenerator, is_transient_failure
+from app.services.metrics import (
+    JOB_SECONDS,
+    JOB_STAGE_SECONDS,
+    JOBS_COALESCED,
+    JOBS_THROTTLED,
+    REGISTRY,
+    SIMULATION_SECONDS,
+    VALIDATION_FAILURES,
+    CallbackGauge,
+    failure_reason,
+)
+from app.services.nodecheck import NodeSyntaxChecker
+from app.services.plandiff import describe_changes, diff_plans, is_data_only
+from app.services.queue import JobQueue
+from app.services.scheduler import FAST_LANE, LANES, STANDARD_LANE, JobScheduler, QueueFullError
+from app.services.simulation import HeadlessSimulator
+from app.services.store import ACTIVE_STATUSES, FINISHED_STATUSES, InMemoryJobStore, JobStore
+from app.services.types import BuildArtifact, JobRecord
+
+MAX_JOB_EVENTS = 100
+# The largest share of the shared queue one batch may take.
+BATCH_QUEUE_SHARE = 0.5
+logger = logging.getLogger("ggen.jobs")
+# Other processes update jobs in external mode, so waiters re-read the store at least this often.
+SHARED_STORE_POLL_SECONDS = 0.5
+
+
+@dataclass(slots=True)
+class _Flight:
+    # An in-flight job and the identical jobs waiting for its result.
+    leader_id: str
+    followers: list[str] = field(default_factory=list)
 
 
 @dataclass(slots=True)
-class JobRecord:
-    job_id: str
-    prompt: str
-    mode: GenerationMode
-    base_game_id: str | None
-    status: JobStatus
-    created_at: datetime
-    updated_at: datetime
-    error: str | None = None
-    game_url: str | None = None
-    plan: GamePlan | None = None
+class _RunningJob:
+    # A pipeline running in this process, so a cancellation can reach it.
+    deadline: Deadline
+    task: asyncio.Task | None
+    loop: asyncio.AbstractEventLoop | None
+    detached: bool = False
 
 
 class JobService:
-    def __init__(self, artifacts_root: Path, plan_generator: PlanGenerator):
+    def __init__(
+        self,
+        artifacts_root: Path,
+        plan_generator: PlanGenerator,
+        job_store: JobStore | None = None,
+        job_ttl_seconds: int = 86400,
+        sweep_interval_seconds: int = 300,
+        scheduler: JobScheduler | None = None,
+        job_queue: JobQueue | None = None,
+        generation_cache: GenerationCache | None = None,
+        syntax_checker: NodeSyntaxChecker | None = None,
+        simulator: HeadlessSimulator | None = None,
+        simulation_repair_attempts: int = 1,
+        modify_fast_path: bool = True,
+        artifact_store: ArtifactStore | None = None,
+        artifact_gc_interval_seconds: float = 600,
+        coalesce: bool = True,
+        max_flight_followers: int = 20,
+        default_deadline_seconds: float = 0,
+        rate_limiter: ClientRateLimiter | None = None,
+        max_batch_jobs: int = 100,
+    ):
         self.artifacts_root = artifacts_root
         self.plan_generator = plan_generator
-        self._jobs: dict[str, JobRecord] = {}
+        self.job_store: JobStore = job_store if job_store is not None else InMemoryJobStore()
+        self.job_ttl_seconds = job_ttl_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.scheduler = scheduler if scheduler is not None else JobScheduler()
+        # With a shared job queue this process only enqueues; `python -m app.worker` runs the pipelines.
+        self.job_queue = job_queue
+        self.generation_cache = generation_cache
+        self.syntax_checker = syntax_checker if syntax_checker is not None else NodeSyntaxChecker()
+        self.simulator = simulator
+        self.simulation_repair_attempts = max(0, simulation_repair_attempts)
+        self.modify_fast_path = modify_fast_path
+        self.artifact_store = artifact_store if artifact_store is not None else ArtifactStore(artifacts_root)
+        self.artifact_gc_interval_seconds = artifact_gc_interval_seconds
+        self.coalesce = coalesce
+        self.max_flight_followers = max(1, max_flight_followers)
+        # Singleflight: coalescing key -> flight, and leader job_id -> key.
+        self._flights: dict[str, _Flight] = {}
+        self._leading: dict[str, str] = {}
+        self._flight_lock = threading.Lock()
+        self.default_deadline_seconds = default_deadline_seconds
+        self.rate_limiter = rate_limiter
+        self.max_batch_jobs = max(1, max_batch_jobs)
+        self._running: dict[str, _RunningJob] = {}
+        self._gc_stop = threading.Event()
+        self._gc_thread: threading.Thread | None = None
+        self._last_sweep = time.monotonic()
+        self._sweep_lock = threading.Lock()
+        self._record_lock = threading.Lock()
+        # job_id -> (stage, monotonic start) for the stage-duration histogram.
+        self._stage_clock: dict[str, tuple[JobStatus, float]] = {}
+        self.notifier = JobNotifier()
+        REGISTRY.register(
+            CallbackGauge("ggen_queue_depth", "Jobs waiting to start, per lane.", ("lane",), self._queue_depth_samples)
+        )
+        REGISTRY.register(
+            CallbackGauge("ggen_jobs_in_flight", "Jobs holding a stage slot.", ("stage",), self._in_flight_samples)
+        )
+
+    def create_job(
+        self,
+        prompt: str,
+        mode: GenerationMode,
+        base_game_id: str | None,
+        deadline_seconds: float | None = None,
+        client_id: str = "",
+    ) -> JobRecord:
+        self._admit(mode, base_game_id, client_id)
+        job = self._new_job(prompt, mode, base_game_id, deadline_seconds, client_id)
+        self._maybe_evict_finished()
+        return job
 
-    def create_job(self, prompt: str, mode: GenerationMode, base_game_id: str | None) -> JobRecord:
+    def create_batch(
+        self,
+        prompts: list[str],
+        mode: GenerationMode,
+        base_game_id: str | None,
+        deadline_seconds: float | None = None,
+        client_id: str = "",
+    ) -> tuple[str, list[JobRecord]]:
+        # One rate-limit token per prompt, taken as a whole. A batch may fill only part of the shared
+        # queue, so other clients' jobs still find room while it drains.
+        max_jobs = min(self.max_batch_jobs, max(1, int(self.scheduler.max_queue_size * BATCH_QUEUE_SHARE)))
+        if len(prompts) > max_jobs:
+            raise ValueError(f"A batch may hold at most {max_jobs} prompts")
+        self._admit(mode, base_game_id, client_id, cost=len(prompts))
+        batch_id = uuid.uuid4().hex
+        jobs = [
+            self._new_job(prompt, mode, base_game_id, deadline_seconds, client_id, batch_id=batch_id)
+            for prompt in prompts
+        ]
+        self._maybe_evict_finished()
+        return batch_id, jobs
+
+    def _admit(self, mode: GenerationMode, base_game_id: str | None, client_id: str, cost: int = 1) -> None:
         if mode == GenerationMode.MODIFY and not base_game_id:
             raise ValueError("base_game_id is required when mode is 'modify'")
         if base_game_id is not None and not self._game_exists(base_game_id):
             raise ValueError(f"Base game '{base_game_id}' does not exist")
+        if self.rate_limiter is not None:
+            try:
+                self.rate_limiter.acquire(client_id, cost)
+            except RateLimitedError:
+                JOBS_THROTTLED.inc()
+                raise
 
+    def _new_job(
+        self,
+        prompt: str,
+        mode: GenerationMode,
+        base_game_id: str | None,
+        deadline_seconds: float | None,
+        client_id: str,
+        batch_id: str | None = None,
+    ) -> JobRecord:
         now = datetime.now(timezone.utc)
-        job_id = uuid.uuid4().hex
+        budget = deadline_seconds if deadline_seconds is not None else self.default_deadline_seconds
         job = JobRecord(
-            job_id=job_id,
+            job_id=uuid.uuid4().hex,
             prompt=prompt,
             mode=mode,
             base_game_id=base_game_id,
             status=JobStatus.DESIGNING,
             created_at=now,
             updated_at=now,
+            deadline_at=now + timedelta(seconds=budget) if budget > 0 else None,
+            client_id=client_id,
+            batch_id=batch_id,
         )
-        self._jobs[job_id] = job
+        self.job_store.put(job)
         return job
 
     def get_job(self, job_id: str) -> JobRecord | None:
-        return self._jobs.get(job_id)
+        return self.job_store.get(job_id)
 
-    def process_job(self, job_id: str) -> None:
-        job = self._jobs[job_id]
-        try:
+    def get_jobs(self, job_ids: list[str]) -> list[JobRecord]:
+        return self.job_store.get_many(job_ids)
+
+    def get_batch(self, batch_id: str) -> list[JobRecord]:
+        return self.job_store.list_by_batch(batch_id)
+
+    def recover_jobs(self) -> list[str]:
+        # Stage outputs are not persisted, so interrupted jobs restart from the design stage.
+        recovered: list[str] = []
+        for job in self.job_store.list_by_status(ACTIVE_STATUSES):
+            job.error = None
             self._set_status(job, JobStatus.DESIGNING)
-            previous_plan = self._load_game_plan(job.base_game_id) if job.mode == GenerationMode.MODIFY else None
-            plan = self.plan_generator.generate_plan(job.prompt, previous_plan=previous_plan)
+            # Re-queued: the pipeline's own DESIGNING transition should count as the end of a wait.
+            self._stage_clock.pop(job.job_id, None)
+            recovered.append(job.job_id)
+        return recovered
 
-            self._set_status(job, JobStatus.BUILDING)
-            previous_scene_code = self._load_scene_module_code(job.base_game_id) if job.mode == GenerationMode.MODIFY else None
-            scene_module_js = self.plan_generator.generate_game_code(
-                job.prompt,
-                plan=plan,
-                previous_code=previous_scene_code,
+    def evict_finished_jobs(self) -> int:
+        if self.job_ttl_seconds <= 0:
+            return 0
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.job_ttl_seconds)
+        return self.job_store.evict_finished(cutoff)
+
+    def start(self) -> None:
+        # Publish the shared runtime up front; a missing runtime still only fails the builds that need it.
+        with contextlib.suppress(FileNotFoundError):
+            publish_phaser_runtime(self.artifacts_root)
+        if self.artifact_gc_interval_seconds > 0 and self._gc_thread is None:
+            self._gc_stop.clear()
+            self._gc_thread = threading.Thread(target=self._artifact_gc_loop, name="artifact-gc", daemon=True)
+            self._gc_thread.start()
+        if self.job_queue is not None:
+            if self.coalesce:
+                logger.warning(
+                    "job coalescing is disabled with external execution; identical in-flight jobs run separately"
+                )
+            return
+        self.scheduler.start()
+        for job_id in self.recover_jobs():
+            self.submit_job(job_id, force=True)
+
+    def stop(self) -> None:
+        self._gc_stop.set()
+        if self._gc_thread is not None:
+            self._gc_thread.join(timeout=5)
+            self._gc_thread = None
+        self.scheduler.stop()
+        self.syntax_checker.close()
+
+    def submit_job(self, job_id: str, force: bool = False, reserved: bool = False) -> None:
+        lane = self._lane()
+        client_id = self._require_job(job_id).client_id
+        if self.job_queue is None:
+            if lane == STANDARD_LANE and self._join_flight(job_id, force, reserved):
+                return
+            self.scheduler.submit(
+                job_id, self.run_job, lane=lane, force=force, client_id=client_id, reserved=reserved
             )
-            artifact = build_game_artifact(
-                job_id=job_id,
-                plan=plan,
-                scene_module_js=scene_module_js,
-                artifacts_root=self.artifacts_root,
+            return
+        queued = self._external_queued()
+        if not force and queued >= self.scheduler.max_queue_size:
+            raise QueueFullError(
+                "Job queue is full, try again later.",
+                retry_after=self.scheduler.estimate_retry_after(queued),
             )
+        self.job_queue.enqueue(job_id, lane, client_id, self.scheduler.client_weights.get(client_id, 1.0))
+
+    def submit_batch(self, jobs: list[JobRecord]) -> None:
+        # All members are admitted against the queue capacity at once, or none are. Queued back to
+        # back, they reach the provider together, so identical prompts coalesce and the rest find
+        # the prompt and generation caches warm.
+        if self.job_queue is not None:
+            lane, weights = self._lane(), self.scheduler.client_weights
+            items = [(job.job_id, lane, job.client_id, weights.get(job.client_id, 1.0)) for job in jobs]
+            if not self.job_queue.enqueue_many(items, self.scheduler.max_queue_size):
+                queued = self._external_queued()
+                raise QueueFullError(
+                    "Job queue is full, try again later.",
+                    retry_after=self.scheduler.estimate_retry_after(queued + len(jobs) - 1),
+                )
+            return
+        self.scheduler.reserve(len(jobs))
+        submitted = 0
+        try:
+            for job in jobs:
+                self.submit_job(job.job_id, reserved=True)
+                submitted += 1
+        finally:
+            if submitted < len(jobs):
+                self.scheduler.unreserve(len(jobs) - submitted)
+
+    def _external_queued(self) -> int:
+        depth = self.job_queue.depth() if self.job_queue is not None else {}
+        return sum(depth.get(name, 0) for name in LANES)
+
+    def cancel_job(self, job_id: str) -> JobRecord | None:
+        job = self.get_job(job_id)
+        if job is None or job.status in FINISHED_STATUSES:
+            return job
+        job.error = "Cancelled by client."
+        self._set_status(job, JobStatus.CANCELLED)
+        self._interrupt(job_id)
+        return job
+
+    def interrupt_cancelled(self, job_ids: Iterable[str]) -> None:
+        # Workers: a job cancelled through the API process only changes in the shared store.
+        for job_id in job_ids:
+            if job_id not in self._running:
+                continue
+            stored = self.job_store.get(job_id)
+            if stored is not None and stored.status == JobStatus.CANCELLED:
+                self._interrupt(job_id)
+
+    def detach_job(self, job_id: str) -> None:
+        # Workers: the job's lease was reclaimed, so another worker now runs it. The local run
+        # stops without writing anything more to the shared store.
+        running = self._running.get(job_id)
+        if running is None:
+            return
+        running.detached = True
+        self._interrupt(job_id)
 
-            self._set_status(job, JobStatus.TESTING)
-            self._run_smoke_checks(artifact.game_dir)
+    def reject_job(self, job: JobRecord, reason: str) -> None:
+        job.error = reason
+        self._set_status(job, JobStatus.FAILED)
 
-            job.plan = plan
-            job.game_url = artifact.game_url
-            self._set_status(job, JobStatus.READY)
+    def cache_stats(self) -> dict[str, object]:
+        if self.generation_cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.generation_cache.stats()}
+
+    def artifact_stats(self) -> dict[str, object]:
+        return self.artifact_store.stats()
+
+    def collect_artifacts(self) -> GcReport:
+        # Games being built, and the base games of jobs still running, are never collected.
+        protected: set[str] = set()
+        for job in self.job_store.list_by_status(ACTIVE_STATUSES):
+            protected.add(job.job_id)
+            if job.base_game_id is not None:
+                protected.add(job.base_game_id)
+        return self.artifact_store.collect(protected)
+
+    def provider_stats(self) -> dict[str, object]:
+        provider_stats = getattr(self.plan_generator, "provider_stats", None)
+        return {"providers": provider_stats() if provider_stats is not None else []}
+
+    def scheduler_stats(self) -> dict[str, object]:
+        if self.job_queue is not None:
+            return {
+                "execution": "external",
+                "queue_depth": self.job_queue.depth(),
+                "coalescing": {"enabled": False},
+                **self._rate_limit_stats(),
+            }
+        with self._flight_lock:
+            coalescing = {
+                "enabled": self.coalesce,
+                "flights": len(self._flights),
+                "followers": sum(len(flight.followers) for flight in self._flights.values()),
+            }
+        return {"execution": "inline", **self.scheduler.stats(), "coalescing": coalescing, **self._rate_limit_stats()}
+
+    def _rate_limit_stats(self) -> dict[str, object]:
+        if self.rate_limiter is None:
+            return {"rate_limit": {"enabled": False}}
+        return {"rate_limit": {"enabled": True, **self.rate_limiter.stats()}}
+
+    async def wait_for_update(self, job_id: str, since: int, timeout: float) -> JobRecord | None:
+        deadline = time.monotonic() + max(0.0, timeout)
+        while True:
+            waiter = self.notifier.subscribe(job_id)
+            try:
+                job = self.get_job(job_id)
+                if job is None or job.version > since or job.status in FINISHED_STATUSES:
+                    return job
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return job
+                if self.job_queue is not None:
+                    remaining = min(remaining, SHARED_STORE_POLL_SECONDS)
+                try:
+                    await asyncio.wait_for(waiter.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    pass
+            finally:
+                self.notifier.unsubscribe(job_id, waiter)
+
+    async def run_job(self, job_id: str) -> None:
+        job = self._require_job(job_id)
+        if job.status in FINISHED_STATUSES:
+            # Cancelled while it waited in the queue.
+            return
+        with self._job_scope(job):
+            await self._run_pipeline(job)
+
+    @contextlib.contextmanager
+    def _job_scope(self, job: JobRecord) -> Iterator[Deadline]:
+        # Binds the job's event log and deadline to everything the pipeline calls, and lets
+        # cancel_job() interrupt it. An interrupted pipeline has already recorded its final status.
+        expires_at = None
+        if job.deadline_at is not None:
+            expires_at = time.monotonic() + (job.deadline_at - datetime.now(timezone.utc)).total_seconds()
+        deadline = Deadline(expires_at)
+        try:
+            task, loop = asyncio.current_task(), asyncio.get_running_loop()
+        except RuntimeError:
+            task, loop = None, None
+        running = _RunningJob(deadline, task, loop)
+        self._running[job.job_id] = running
+        try:
+            with event_reporter(lambda kind, message: self._record_event(job, kind, message)), job_deadline(deadline):
+                yield deadline
+        except asyncio.CancelledError:
+            if not deadline.cancelled or task is None:
+                raise
+            task.uncancel()
+        finally:
+            if self._running.get(job.job_id) is running:
+                del self._running[job.job_id]
+
+    async def _run_pipeline(self, job: JobRecord) -> None:
+        job_id = job.job_id
+        try:
+            async with self.scheduler.stage(job_id, JobStatus.DESIGNING):
+                check_deadline()
+                self._set_status(job, JobStatus.DESIGNING)
+                plan = await self._adesign(job)
+
+            async with self.scheduler.stage(job_id, JobStatus.BUILDING):
+                check_deadline()
+                self._set_status(job, JobStatus.BUILDING)
+                artifact = await self._abuild(job, plan)
+
+            for attempt in range(self.simulation_repair_attempts + 1):
+                async with self.scheduler.stage(job_id, JobStatus.TESTING):
+                    check_deadline()
+                    self._set_status(job, JobStatus.TESTING)
+                    await asyncio.to_thread(self._run_smoke_checks, artifact.game_id)
+                    violations = await asyncio.to_thread(self._run_simulation, job, artifact.game_id)
+                if not violations:
+                    break
+                await asyncio.to_thread(self._reject_scene_module, job, plan, violations, attempt)
+                async with self.scheduler.stage(job_id, JobStatus.BUILDING):
+                    check_deadline()
+                    self._set_status(job, JobStatus.BUILDING)
+                    artifact = await self._arepair_build(job, plan, violations)
+
+            self._finish(job, artifact)
         except Exception as exc:  # noqa: BLE001
-            job.error = str(exc)
-            self._set_status(job, JobStatus.FAILED)
-
-    def _set_status(self, job: JobRecord, status: JobStatus) -> None:
-        job.status = status
-        job.updated_at = datetime.now(timezone.utc)
-
-    def _run_smoke_checks(self, game_dir: Path) -> None:
-        if not (game_dir / "index.html").exists():
-            raise RuntimeError("Missing artifact: index.html")
-        if not (game_dir / "game.js").exists():
-            raise RuntimeError("Missing artifact: game.js")
-        if not (game_dir / "phaser.min.js").exists():
-            raise RuntimeError("Missing artifact: phaser.min.js")
-        if not (game_dir / "plan.json").exists():
-            raise RuntimeError("Missing artifact: plan.json")
-
-        node_bin = shutil.which("node")
-        if node_bin:
-            check = subprocess.run(
-                [node_bin, "--check", str(game_dir / "game.js")],
-                capture_output=True,
-                text=True,
+            self._fail(job, exc)
+
+    async def _run_follower(self, job_id: str, leader_id: str) -> None:
+        job = self._require_job(job_id)
+        if job.status in FINISHED_STATUSES:
+            return
+        with self._job_scope(job):
+            try:
+                async with self.scheduler.stage(job_id, JobStatus.BUILDING):
+                    check_deadline()
+                    self._set_status(job, JobStatus.BUILDING)
+                    plan = await asyncio.to_thread(self._load_game_plan, leader_id)
+                    scene_module_js = await asyncio.to_thread(self._load_scene_module_code, leader_id)
+                    artifact = await asyncio.to_thread(self._build_artifact, job, plan, scene_module_js)
+                # Same plan and module as the leader's game, which already passed the checks and simulation.
+                self._finish(job, artifact)
+            except Exception as exc:  # noqa: BLE001
+                self._fail(job, exc)
+
+    def _join_flight(self, job_id: str, force: bool = False, reserved: bool = False) -> bool:
+        # True when the job attached to an identical in-flight job; otherwise it now leads its own flight,
+        # or runs outside any flight when the identical one is full. A follower holds a queue place.
+        if not self.coalesce:
+            return False
+        job = self._require_job(job_id)
+        key = self._flight_key(job)
+        with self._flight_lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                self._flights[key] = _Flight(job_id)
+                self._leading[job_id] = key
+                return False
+            if len(flight.followers) >= self.max_flight_followers:
+                return False
+            self.scheduler.park(force, reserved)
+            flight.followers.append(job_id)
+            leader_id = flight.leader_id
+        JOBS_COALESCED.inc()
+        self._record_event(job, "coalesced", f"Waiting for identical in-flight job {leader_id}")
+        return True
+
+    def _settle_flight(self, job: JobRecord, retryable: bool = True) -> None:
+        with self._flight_lock:
+            key = self._leading.pop(job.job_id, None)
+            if key is None:
+                # A follower cancelled before its leader finished.
+                for flight in self._flights.values():
+                    if job.job_id in flight.followers:
+                        flight.followers.remove(job.job_id)
+                        self.scheduler.unpark()
+                        break
+                return
+            flight = self._flights.pop(key)
+            if not flight.followers:
+                return
+            successor = None
+            if job.status != JobStatus.READY and retryable:
+                # The leader failed: the next follower runs the pipeline itself and the rest wait for it.
+                successor = flight.followers.pop(0)
+                self._flights[key] = _Flight(successor, flight.followers)
+                self._leading[successor] = key
+        if job.status != JobStatus.READY and not retryable:
+            # The same pipeline would fail the same way for every follower.
+            for follower_id in flight.followers:
+                follower = self._require_job(follower_id)
+                follower.error = f"Identical job {job.job_id} failed: {job.error}"
+                self.scheduler.unpark()
+                self._set_status(follower, JobStatus.FAILED)
+            return
+        if successor is not None:
+            successor_job = self._require_job(successor)
+            self._record_event(
+                successor_job,
+                "coalesced",
+                f"Identical job {job.job_id} failed; running this job's own pipeline",
+            )
+            self.scheduler.submit(
+                successor, self.run_job, lane=STANDARD_LANE, client_id=successor_job.client_id, parked=True
+            )
+            return
+        runner = functools.partial(self._run_follower, leader_id=job.job_id)
+        for follower_id in flight.followers:
+            follower = self._require_job(follower_id)
+            self._record_event(
+                follower,
+                "coalesced",
+                f"Identical job {job.job_id} finished; building from its plan and scene module",
+            )
+            # Building from a finished plan and module needs no LLM slot.
+            self.scheduler.submit(follower_id, runner, lane=FAST_LANE, client_id=follower.client_id, parked=True)
+
+    def _flight_key(self, job: JobRecord) -> str:
+        return cache_key(
+            "job",
+            _normalize_prompt(job.prompt),
+            job.mode.value,
+            job.base_game_id,
+            self._generator_fingerprint(),
+        )
+
+    def _require_job(self, job_id: str) -> JobRecord:
+        job = self.job_store.get(job_id)
+        if job is None:
+            raise KeyError(f"Unknown job '{job_id}'")
+        return job
+
+    def _lane(self) -> str:
+        if isinstance(self.plan_generator, DeterministicPlanGenerator):
+            return FAST_LANE
+        return STANDARD_LANE
+
+    async def _adesign(self, job: JobRecord) -> GamePlan:
+        previous_plan = await asyncio.to_thread(self._previous_plan, job)
+        cache_key = self._plan_cache_key(job, previous_plan)
+        cached = await asyncio.to_thread(self._cached_plan, cache_key)
+        if cached is not None:
+            return cached
+        if isinstance(self.plan_generator, AsyncPlanGenerator):
+            plan = await self.plan_generator.agenerate_plan(job.prompt, previous_plan=previous_plan)
+        else:
+            plan = await asyncio.to_thread(self.plan_generator.generate_plan, job.prompt, previous_plan)
+        await asyncio.to_thread(self._store_plan, cache_key, plan)
+        return plan
+
+    async def _abuild(self, job: JobRecord, plan: GamePlan) -> BuildArtifact:
+        reused = await asyncio.to_thread(self._reusable_scene_module, job, plan)
+        if reused is not None:
+            return await asyncio.to_thread(self._build_artifact, job, plan, reused)
+        previous_scene_code = await asyncio.to_thread(self._previous_scene_code, job)
+        cache_key = self._code_cache_key(job, plan, previous_scene_code)
+        scene_module_js = await asyncio.to_thread(self._cached_scene_module, cache_key)
+        if scene_module_js is None:
+            if isinstance(self.plan_generator, AsyncPlanGenerator):
+                scene_module_js = await self.plan_generator.agenerate_game_code(
+                    job.prompt,
+                    plan=plan,
+                    previous_code=previous_scene_code,
+                )
+            else:
+                scene_module_js = await asyncio.to_thread(
+                    self.plan_generator.generate_game_code,
+                    job.prompt,
+                    plan,
+                    previous_scene_code,
+                )
+            await asyncio.to_thread(self._store_scene_module, cache_key, scene_module_js)
+        return await asyncio.to_thread(self._build_artifact, job, plan, scene_module_js)
+
+    async def _arepair_build(
+        self,
+        job: JobRecord,
+        plan: GamePlan,
+        violations: list[str],
+    ) -> BuildArtifact:
+        previous_scene_code = await asyncio.to_thread(self._previous_scene_code, job)
+        invalid_code = await asyncio.to_thread(self._load_scene_module_code, job.job_id)
+        if hasattr(self.plan_generator, "arepair_game_code"):
+            scene_module_js = await self.plan_generator.arepair_game_code(
+                job.prompt,
+                plan,
+                previous_scene_code,
+                invalid_code,
+                violations,
             )
-            if check.returncode != 0:
-                error_text = (check.stderr or check.stdout).strip()
-                raise RuntimeError(f"Generated JS syntax check failed: {error_text}")
+        else:
+            scene_module_js = await asyncio.to_thread(
+                self.plan_generator.repair_game_code,
+                job.prompt,
+                plan,
+                previous_scene_code,
+                invalid_code,
+                violations,
+            )
+        cache_key = self._code_cache_key(job, plan, previous_scene_code)
+        await asyncio.to_thread(self._store_scene_module, cache_key, scene_module_js)
+        return await asyncio.to_thread(self._build_artifact, job, plan, scene_module_js)
+
+    def _run_simulation(self, job: JobRecord, game_id: str) -> list[str]:
+        if self.simulator is None:
+            return []
+        with SIMULATION_SECONDS.labels().time():
+            report = self.simulator.run(self._load_game_code(game_id))
+        if report is None:
+            return []
+        violations = self.simulator.violations(report)
+        for violation in violations:
+            VALIDATION_FAILURES.labels("simulation", failure_reason(violation)).inc()
+        job.simulation = {**report.as_dict(), "violations": violations}
+        summary = (
+            f"Simulated {report.frames}/{report.requested_frames} frames: p95 {report.p95_frame_ms:.2f} ms, "
+            f"max {report.max_frame_ms:.2f} ms, peak {report.peak_objects} objects"
+        )
+        if violations:
+            summary = f"{summary}; {'; '.join(violations)}"
+        self._record_event(job, "simulation", summary)
+        return violations
+
+    def _reject_scene_module(self, job: JobRecord, plan: GamePlan, violations: list[str], attempt: int) -> None:
+        # Never hand a module that failed the simulation to a later job through the cache.
+        if self.generation_cache is not None:
+            previous_scene_code = self._previous_scene_code(job)
+            self.generation_cache.discard("code", self._code_cache_key(job, plan, previous_scene_code))
+        can_repair = callable(getattr(self.plan_generator, "repair_game_code", None))
+        if not can_repair or attempt >= self.simulation_repair_attempts:
+            raise RuntimeError(f"Headless simulation failed: {'; '.join(violations)}")
+        expected_seconds = getattr(self.plan_generator, "expected_repair_seconds", None)
+        require_time(expected_seconds() if expected_seconds is not None else 0.0, "a scene module repair")
+        report_event(
+            "code_repair",
+            f"Repairing scene module after simulation (attempt {attempt + 1}/{self.simulation_repair_attempts})",
+        )
+
+    def _generator_fingerprint(self) -> dict[str, object]:
+        fingerprint = getattr(self.plan_generator, "cache_fingerprint", None)
+        if callable(fingerprint):
+            return fingerprint()
+        return {"generator": type(self.plan_generator).__name__}
+
+    def _plan_cache_key(self, job: JobRecord, previous_plan: GamePlan | None) -> str:
+        base_plan_hash = content_hash(previous_plan.model_dump_json()) if previous_plan is not None else None
+        return cache_key(
+            "plan",
+            _normalize_prompt(job.prompt),
+            job.mode.value,
+            base_plan_hash,
+            self._generator_fingerprint(),
+        )
+
+    def _code_cache_key(self, job: JobRecord, plan: GamePlan, previous_scene_code: str | None) -> str:
+        return cache_key(
+            "code",
+            _normalize_prompt(job.prompt),
+            job.mode.value,
+            content_hash(plan.model_dump_json()),
+            content_hash(previous_scene_code),
+            self._generator_fingerprint(),
+        )
+
+    def _cached_plan(self, key: str) -> GamePlan | None:
+        if self.generation_cache is None:
+            return None
+        raw = self.generation_cache.get("plan", key)
+        if raw is None:
+            return None
+        try:
+            plan = GamePlan.model_validate_json(raw)
+        except ValidationError:
+            self.generation_cache.discard("plan", key)
+            return None
+        report_event("cache_hit", "Reused cached game plan.")
+        return plan
+
+    def _cached_scene_module(self, key: str) -> str | None:
+        if self.generation_cache is None:
+            return None
+        scene_module_js = self.generation_cache.get("code", key)
+        if scene_module_js is not None:
+            report_event("cache_hit", "Reused cached scene module.")
+        return scene_module_js
+
+    def _store_plan(self, key: str, plan: GamePlan) -> None:
+        if self.generation_cache is not None:
+            self.generation_cache.put("plan", key, plan.model_dump_json())
+
+    def _store_scene_module(self, key: str, scene_module_js: str) -> None:
+        if self.generation_cache is not None:
+            self.generation_cache.put("code", key, scene_module_js)
+
+    def _previous_plan(self, job: JobRecord) -> GamePlan | None:
+        return self._load_game_plan(job.base_game_id) if job.mode == GenerationMode.MODIFY else None
+
+    def _reusable_scene_module(self, job: JobRecord, plan: GamePlan) -> str | None:
+        # game.js gets the PLAN object injected at build time, so a modification that only changes
+        # data fields can keep the base game's scene module and skip code generation.
+        if not self.modify_fast_path or job.mode != GenerationMode.MODIFY:
+            return None
+        changes = diff_plans(self._load_game_plan(job.base_game_id), plan)
+        if not is_data_only(changes):
+            return None
+        scene_module_js = extract_scene_module_from_game_js(self._load_game_code(job.base_game_id))
+        if scene_module_js is None:
+            return None
+        report_event("fast_path", f"Only plan data changed ({describe_changes(changes)}); reusing the base scene module")
+        return scene_module_js
 
-        # Simulate staged work while keeping the MVP deterministic.
-        time.sleep(0.2)
+    def _previous_scene_code(self, job: JobRecord) -> str | None:
+        return self._load_scene_module_code(job.base_game_id) if job.mode == GenerationMode.MODIFY else None
+
+    def _build_artifact(self, job: JobRecord, plan: GamePlan, scene_module_js: str) -> BuildArtifact:
+        return build_game_artifact(
+            job_id=job.job_id,
+            plan=plan,
+            scene_module_js=scene_module_js,
+            artifacts_root=self.artifacts_root,
+            store=self.artifact_store,
+        )
+
+    def _finish(self, job: JobRecord, artifact: BuildArtifact) -> None:
+        job.plan = artifact.plan
+        job.game_url = artifact.game_url
+        self._set_status(job, JobStatus.READY)
+
+    def _fail(self, job: JobRecord, exc: Exception) -> None:
+        if job.status in FINISHED_STATUSES:
+            return
+        status = _failure_status(exc)
+        job.error = str(exc)
+        if status == JobStatus.TIMED_OUT and not isinstance(exc, DeadlineExceededError):
+            job.error = f"Job deadline exceeded: {exc}"
+        self._set_status(job, status, retryable=status != JobStatus.FAILED or is_transient_failure(exc))
+
+    def _set_status(self, job: JobRecord, status: JobStatus, retryable: bool = True) -> None:
+        event: dict[str, object] = {"type": "status", "status": status.value}
+        if status == JobStatus.READY:
+            event["game_url"] = job.game_url
+        elif status in FINISHED_STATUSES:
+            event["message"] = job.error
+        with self._record_lock:
+            if job.status in FINISHED_STATUSES or self._detached(job.job_id):
+                # The first final status wins; a pipeline finishing after cancel_job() changes nothing.
+                return
+            self._observe_transition(job, status)
+            job.status = status
+            self._append_event(job, event)
+            self.job_store.put(job)
+        self.notifier.notify(job.job_id)
+        if status in FINISHED_STATUSES:
+            self._settle_flight(job, retryable)
+
+    def _observe_transition(self, job: JobRecord, status: JobStatus) -> None:
+        now = time.monotonic()
+        previous = self._stage_clock.pop(job.job_id, None)
+        if previous is not None:
+            JOB_STAGE_SECONDS.labels(previous[0].value).observe(now - previous[1])
+        elif status == JobStatus.DESIGNING:
+            # The first stage this process sees; until now the job sat in a queue.
+            JOB_STAGE_SECONDS.labels("queued").observe(_seconds_since(job.created_at))
+        if status in FINISHED_STATUSES:
+            JOB_SECONDS.labels(status.value).observe(_seconds_since(job.created_at))
+        else:
+            self._stage_clock[job.job_id] = (status, now)
+
+    def _interrupt(self, job_id: str) -> None:
+        running = self._running.get(job_id)
+        if running is None:
+            return
+        running.deadline.cancel()
+        if running.task is not None and running.loop is not None:
+            running.loop.call_soon_threadsafe(running.task.cancel)
+
+    def _detached(self, job_id: str) -> bool:
+        running = self._running.get(job_id)
+        return running is not None and running.detached
+
+    def _queue_depth_samples(self) -> list[tuple[tuple[str, ...], float]]:
+        depth = self.job_queue.depth() if self.job_queue is not None else self.scheduler.stats()["queue_depth"]
+        return [((lane,), count) for lane, count in depth.items()]
+
+    def _in_flight_samples(self) -> list[tuple[tuple[str, ...], float]]:
+        return [((stage,), count) for stage, count in self.scheduler.stats()["in_flight"].items()]
+
+    def _record_event(self, job: JobRecord, kind: str, message: str) -> None:
+        with self._record_lock:
+            if self._detached(job.job_id):
+                return
+            self._append_event(job, {"type": kind, "status": job.status.value, "message": message})
+            self.job_store.put(job)
+        self.notifier.notify(job.job_id)
+
+    @staticmethod
+    def _append_event(job: JobRecord, event: dict[str, object]) -> None:
+        now = datetime.now(timezone.utc)
+        job.version += 1
+        job.updated_at = now
+        job.events.append({"version": job.version, "at": now.isoformat(), **event})
+        if len(job.events) > MAX_JOB_EVENTS:
+            del job.events[: len(job.events) - MAX_JOB_EVENTS]
+
+    def _maybe_evict_finished(self) -> None:
+        now = time.monotonic()
+        if now - self._last_sweep < self.sweep_interval_seconds:
+            return
+        if not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_sweep = now
+            self.evict_finished_jobs()
+        finally:
+            self._sweep_lock.release()
+
+    def _artifact_gc_loop(self) -> None:
+        while not self._gc_stop.wait(self.artifact_gc_interval_seconds):
+            try:
+                report = self.collect_artifacts()
+            except Exception:  # noqa: BLE001
+                logger.exception("artifact GC failed")
+                continue
+            if report.games_deleted or report.blobs_deleted or report.legacy_imported:
+                logger.info(
+                    "artifact GC: %d game(s) deleted, %d blob(s) / %d bytes freed, %d legacy game(s) imported",
+                    report.games_deleted,
+                    report.blobs_deleted,
+                    report.bytes_freed,
+                    report.legacy_imported,
+                )
+
+    def _run_smoke_checks(self, game_id: str) -> None:
+        for name in ("index.html", "game.js", "plan.json"):
+            if self.artifact_store.file_path(game_id, name) is None:
+                raise RuntimeError(f"Missing artifact: {name}")
+        if not publish_phaser_runtime(self.artifacts_root).exists():
+            raise RuntimeError("Missing artifact: shared Phaser runtime")
+
+        result = self.syntax_checker.check(self._load_game_code(game_id), filename="game.js")
+        if result is not None and not result.ok:
+            raise RuntimeError(f"Generated JS syntax check failed: {result.describe()}")
 
     def _game_exists(self, game_id: str) -> bool:
-        return (self.artifacts_root / "games" / game_id / "plan.json").exists()
+        return self.artifact_store.exists(game_id)
 
     def _load_game_plan(self, game_id: str | None) -> GamePlan:
         if game_id is None:
             raise ValueError("Missing game_id for plan loading")
-        plan_path = self.artifacts_root / "games" / game_id / "plan.json"
-        if not plan_path.exists():
+        raw = self.artifact_store.read_text(game_id, "plan.json")
+        if raw is None:
             raise ValueError(f"Base game '{game_id}' has no plan.json")
-        raw = json.loads(plan_path.read_text(encoding="utf-8"))
-        return GamePlan.model_validate(raw)
+        return GamePlan.model_validate(json.loads(raw))
 
     def _load_game_code(self, game_id: str | None) -> str:
         if game_id is None:
             raise ValueError("Missing game_id for code loading")
-        code_path = self.artifacts_root / "games" / game_id / "game.js"
-        if not code_path.exists():
+        code = self.artifact_store.read_text(game_id, "game.js")
+        if code is None:
             raise ValueError(f"Base game '{game_id}' has no game.js")
-        return code_path.read_text(encoding="utf-8")
+        return code
 
     def _load_scene_module_code(self, game_id: str | None) -> str:
         full_code = self._load_game_code(game_id)
         extracted = extract_scene_module_from_game_js(full_code)
         return extracted or full_code
+
+
+def _failure_status(exc: Exception) -> JobStatus:
+    if isinstance(exc, JobCancelledError):
+        return JobStatus.CANCELLED
+    deadline = current_deadline()
+    if isinstance(exc, DeadlineExceededError) or (deadline is not None and deadline.expired):
+        # A provider call cut short by the deadline fails with the client's own timeout error.
+        return JobStatus.TIMED_OUT
+    return JobStatus.FAILED
+
+
+def _seconds_since(moment: datetime) -> float:
+    return max(0.0, (datetime.now(timezone.utc) - moment).total_seconds())
+
+
+def _normalize_prompt(prompt: str) -> str:
+    return " ".join(prompt.split())
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import functools
+import re
+from dataclasses import dataclass
+
+# Each rule keeps the pattern text the old regex validators reported, so error strings stay
+# recognizable ("forbidden:\bfetch\s*\(") while matching happens on code tokens only.
+NETWORK_RULES = {
+    r"\bfetch\s*\(": r"fetch\s*\(",
+    r"\bXMLHttpRequest\b": r"XMLHttpRequest",
+    r"\bWebSocket\b": r"WebSocket",
+    r"\bEventSource\b": r"EventSource",
+    r"\bimportScripts\b": r"importScripts",
+    r"\beval\s*\(": r"eval\s*\(",
+    r"\bnew\s+Function\b": r"new\s+Function(?![\w$])",
+}
+
+# Phaser 2 APIs the model keeps reaching for; they do not exist in the Phaser 3 runtime.
+LEGACY_PHASER_RULES = {
+    r"\bPhaser\.State\b": r"Phaser\s*\.\s*State(?![\w$])",
+    r"\bbitmapData\b": r"bitmapData",
+    r"\baddBitmapData\b": r"addBitmapData",
+    r"\bPhaser\.Timer\.SECOND\b": r"Phaser\s*\.\s*Timer\s*\.\s*SECOND(?![\w$])",
+}
+
+STRUCTURE_RULES = {
+    "createGeneratedScene": r"function\s+createGeneratedScene(?![\w$])",
+    "extends Phaser.Scene": r"extends\s+Phaser\s*\.\s*Scene(?![\w$])",
+    "scene_class": r"class",
+    "create_method": r"create\s*\(",
+    "update_method": r"update\s*\(",
+    "new Phaser.Game": r"new\s+Phaser\s*\.\s*Game(?![\w$])",
+    "window.__ggen_runtime__": r"window\s*\.\s*__ggen_runtime__(?![\w$])",
+    "dispose": r"dispose\s*\(",
+}
+
+FORBIDDEN_RULES = {**NETWORK_RULES, **LEGACY_PHASER_RULES}
+
+SCENE_MODULE_MARKERS = ("createGeneratedScene", "extends Phaser.Scene", "scene_class", "create_method", "update_method")
+GAME_SCRIPT_MARKERS = ("new Phaser.Game", "game-root", "window.__ggen_runtime__", "dispose")
+
+# Substrings looked for inside string literals (the scaffold passes DOM ids around as strings).
+STRING_MARKERS = ("game-root",)
+
+
+def _keyword_rules() -> dict[str, list[tuple[str, re.Pattern[str]]]]:
+    # Every rule starts with a keyword; the scanner only stops on those keywords and then tries
+    # the (few) rules hanging off the one it found.
+    grouped: dict[str, list[tuple[str, re.Pattern[str]]]] = {}
+    for name, pattern in {**FORBIDDEN_RULES, **STRUCTURE_RULES}.items():
+        keyword = re.match(r"[A-Za-z_$]+", pattern).group()
+        grouped.setdefault(keyword, []).append((name, re.compile(pattern)))
+    return grouped
+
+
+_KEYWORD_RULES = _keyword_rules()
+_KEYWORDS = "|".join(sorted(_KEYWORD_RULES, key=len, reverse=True))
+# A flat alternation whose branches all start with a literal character lets the regex engine skip
+# plain code in C; identifier boundaries are checked in Python on the few keyword hits.
+_TOKENS = (
+    r"//[^\n]*|/\*.*?\*/"
+    r"|\"[^\"\\\n]*(?:\\.[^\"\\\n]*)*\"|'[^'\\\n]*(?:\\.[^'\\\n]*)*'"
+    rf"|`|/|{_KEYWORDS}"
+)
+_CODE = re.compile(_TOKENS, re.DOTALL)
+_SUBSTITUTION = re.compile(rf"{_TOKENS}|[{{}}]", re.DOTALL)
+_TEMPLATE_CHUNK = re.compile(r"[^`\\$]*(?:(?:\\.|\$(?!\{))[^`\\$]*)*(?P<end>`|\$\{)", re.DOTALL)
+_REGEX_LITERAL = re.compile(r"/(?:[^/\\\n\[]|\\.|\[(?:[^\]\\\n]|\\.)*\])+/[A-Za-z]*")
+_REGEX_PRECEDERS = frozenset("(,=:[!&|?{};+-*%<>~^")
+_IDENT_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_$")
+
+
+@dataclass(frozen=True, slots=True)
+class JsLocation:
+    line: int
+    column: int
+
+
+@dataclass(frozen=True, slots=True)
+class JsAnalysis:
+    # First location of every rule or string marker that matched in code.
+    matches: dict[str, JsLocation]
+
+    def forbidden(self, rules: dict[str, str] = FORBIDDEN_RULES) -> list[str]:
+        return [
+            f"forbidden:{rule} (line {location.line}, column {location.column})"
+            for rule, location in self.matches.items()
+            if rule in rules
+        ]
+
+    def missing(self, markers: tuple[str, ...]) -> list[str]:
+        return [f"missing:{marker}" for marker in markers if marker not in self.matches]
+
+
+@functools.lru_cache(maxsize=512)
+def analyze_js(source: str) -> JsAnalysis:
+    # One pass: comments, strings, regex literals and template text are skipped, template
+    # substitutions (`${...}`) are scanned as code. Cached on the source text itself.
+    matches: dict[str, JsLocation] = {}
+    _scan_code(source, 0, matches, in_substitution=False)
+    return JsAnalysis(matches=matches)
+
+
+def _scan_code(source: str, pos: int, matches: dict[str, JsLocation], in_substitution: bool) -> int:
+    search = (_SUBSTITUTION if in_substitution else _CODE).search
+    length = len(source)
+    depth = 0
+    while True:
+        token = search(source, pos)
+        if token is None:
+            return length
+        start, pos = token.span()
+        first = source[start]
+        if first == "/":
+            if pos - start == 1 and _starts_regex_literal(source, start):
+                literal = _REGEX_LITERAL.match(source, start)
+                if literal is not None:
+                    pos = literal.end()
+        elif first == '"' or first == "'":
+            for marker in STRING_MARKERS:
+                if marker not in matches:
+                    index = source.find(marker, start, pos)
+                    if index != -1:
+                        matches[marker] = _location(source, index)
+        elif first == "`":
+            pos = _scan_template(source, pos, matches)
+        elif first == "{":
+            depth += 1
+        elif first == "}":
+            if depth == 0:
+                return pos
+            depth -= 1
+        elif (start == 0 or source[start - 1] not in _IDENT_CHARS) and (pos == length or source[pos] not in _IDENT_CHARS):
+            for name, rule in _KEYWORD_RULES[token.group()]:
+                if name not in matches and rule.match(source, start):
+                    matches[name] = _location(source, start)
+
+
+def _scan_template(source: str, pos: int, matches: dict[str, JsLocation]) -> int:
+    while True:
+        chunk = _TEMPLATE_CHUNK.match(source, pos)
+        if chunk is None:
+            return len(source)
+        _scan_string(source, matches, pos, chunk.start("end"))
+        pos = chunk.end()
+        if chunk.group("end") == "`":
+            return pos
+        pos = _scan_code(source, pos, matches, in_substitution=True)
+
+
+def _scan_string(source: str, matches: dict[str, JsLocation], start: int, end: int) -> None:
+    for marker in STRING_MARKERS:
+        if marker not in matches:
+            index = source.find(marker, start, end)
+            if index != -1:
+                matches[marker] = _location(source, index)
+
+
+def _starts_regex_literal(source: str, slash: int) -> bool:
+    index = slash - 1
+    while index >= 0 and source[index] in " \t\r\n":
+        index -= 1
+    if index < 0 or source[index] in _REGEX_PRECEDERS:
+        return True
+    return source.endswith("return", 0, index + 1) and (index < 6 or source[index - 6] not in _IDENT_CHARS)
+
+
+def _location(source: str, offset: int) -> JsLocation:
+    line_start = source.rfind("\n", 0, offset) + 1
+    return JsLocation(line=source.count("\n", 0, offset) + 1, column=offset - line_start + 1)
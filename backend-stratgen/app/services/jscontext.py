@@ -0,0 +1,231 @@
+from __future__ import annotations
+
+import math
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+
+# Strings, comments and template literals are skipped so only structural braces count.
+_BRACE_TOKENS = re.compile(
+    r"//[^\n]*|/\*.*?\*/|\"(?:[^\"\\\n]|\\.)*\"|'(?:[^'\\\n]|\\.)*'|`(?:[^`\\]|\\.)*`|[{}]",
+    re.DOTALL,
+)
+_IDENTIFIERS = re.compile(r"[A-Za-z_$][\w$]*")
+_WORD_PARTS = re.compile(r"[A-Za-z][a-z]+|[A-Z]+(?![a-z])")
+# Lifecycle methods the model has to see to keep the scene working.
+_ESSENTIAL = re.compile(r"\s*(?:async\s+)?(?:constructor|init|preload|create|update)\s*\(")
+_STOP_WORDS = frozenset(
+    "the and for with that this from into make more less add adds change changes game player please should "
+    "would could when then them they also just like want new use".split()
+)
+TRUNCATION_MARKER = "/* CONTEXT TRUNCATED */"
+
+
+@dataclass(slots=True)
+class _Unit:
+    start: int
+    end: int
+    pinned: bool = False
+
+
+def truncate_js(source: str, budget: int, measure: Callable[[str], int] = len, query: str = "") -> str:
+    # Keeps whole top-level statements and class methods, preferring the lifecycle methods and
+    # those sharing the most words with `query`; dropped ones become one-line stubs. `budget` is
+    # in the units of `measure` (characters by default, or tokens).
+    if measure(source) <= budget:
+        return source
+    lines = source.split("\n")
+    depths = _line_depths(source, len(lines))
+    if depths is None:
+        return truncate_middle(source, budget, measure)
+    units = _split_units(lines, depths, budget, measure)
+    # Signature stubs for dropped blocks first; when even those do not fit, bare omission comments.
+    for stubs in (True, False):
+        kept = _select_units(lines, units, budget, measure, query, stubs)
+        if kept is not None:
+            rendered = _render(lines, units, kept, stubs)
+            if measure(rendered) <= budget:
+                return rendered
+    return truncate_middle(source, budget, measure)
+
+
+def truncate_middle(value: str, budget: int, measure: Callable[[str], int] = len) -> str:
+    # The structure-blind fallback: keep the head and tail, shrinking until they fit.
+    chars = len(value)
+    total = max(1, measure(value))
+    truncated = value
+    for _ in range(6):
+        chars = int(chars * min(0.97, budget / total))
+        if chars <= 0:
+            return TRUNCATION_MARKER
+        truncated = f"{value[: chars // 2]}\n{TRUNCATION_MARKER}\n{value[-(chars // 2) :]}"
+        total = max(1, measure(truncated))
+        if total <= budget:
+            break
+    return truncated
+
+
+def _line_depths(source: str, line_count: int) -> list[tuple[int, int]] | None:
+    # (brace depth at the start, depth at the end) for every line; None when braces do not balance.
+    depths = []
+    depth = 0
+    line = 0
+    line_start_depth = 0
+    position = 0
+    for token in _BRACE_TOKENS.finditer(source):
+        newlines = source.count("\n", position, token.start())
+        for _ in range(newlines):
+            depths.append((line_start_depth, depth))
+            line_start_depth = depth
+            line += 1
+        position = token.start()
+        text = token.group()
+        if text == "{":
+            depth += 1
+        elif text == "}":
+            depth -= 1
+            if depth < 0:
+                return None
+    while line < line_count:
+        depths.append((line_start_depth, depth))
+        line_start_depth = depth
+        line += 1
+    return depths if depth == 0 else None
+
+
+def _split_units(
+    lines: list[str],
+    depths: list[tuple[int, int]],
+    budget: int,
+    measure: Callable[[str], int],
+) -> list[_Unit]:
+    units = []
+    pending = [(0, len(lines) - 1, 0)]
+    while pending:
+        start, end, depth = pending.pop()
+        for unit in _members(lines, depths, start, end, depth):
+            head = _head_line(lines, unit)
+            # Blocks too large to keep or drop as a whole (the scene factory, the scene class,
+            # an oversized method) are opened up; their first and last lines are always kept.
+            if (
+                head is not None
+                and head + 1 < unit.end
+                and depths[head] == (depth, depth + 1)
+                and depths[unit.end][0] == depth + 1
+                and measure("\n".join(lines[unit.start : unit.end + 1])) > budget // 2
+            ):
+                units.append(_Unit(unit.start, head, pinned=True))
+                units.append(_Unit(unit.end, unit.end, pinned=True))
+                pending.append((head + 1, unit.end - 1, depth + 1))
+            else:
+                units.append(unit)
+    units.sort(key=lambda unit: unit.start)
+    return units
+
+
+def _members(lines: list[str], depths: list[tuple[int, int]], start: int, end: int, depth: int) -> list[_Unit]:
+    # Runs of lines that leave the brace depth where they found it. Blank and comment lines stay
+    # with the statement that follows them.
+    members = []
+    member_start = start
+    for index in range(start, end + 1):
+        if depths[index][1] != depth:
+            continue
+        if index < end and depths[index][0] == depth and _is_trivia(lines[index]):
+            continue
+        members.append(_Unit(member_start, index))
+        member_start = index + 1
+    if member_start <= end:
+        members.append(_Unit(member_start, end))
+    return members
+
+
+def _select_units(
+    lines: list[str],
+    units: list[_Unit],
+    budget: int,
+    measure: Callable[[str], int],
+    query: str,
+    stubs: bool,
+) -> set[int] | None:
+    # Costs include the joining newline; omission comments are small enough to leave to the
+    # final measurement.
+    texts = ["\n".join(lines[unit.start : unit.end + 1]) for unit in units]
+    costs = [measure(f"{text}\n") for text in texts]
+    stub_costs = [measure(f"{_stub(lines, unit)}\n") if stubs and _stub(lines, unit) else 0 for unit in units]
+    used = sum(costs[index] if unit.pinned else stub_costs[index] for index, unit in enumerate(units))
+    if used > budget:
+        return None
+    kept = {index for index, unit in enumerate(units) if unit.pinned}
+    unit_words = [_words(text) for text in texts]
+    query_words = _words(query) - _STOP_WORDS
+    # Words found in every unit say nothing about which one the prompt is about.
+    spread = {word: sum(word in words for words in unit_words) for word in query_words}
+    weights = {word: math.log((len(units) + 1) / (count + 0.5)) for word, count in spread.items() if count}
+
+    def priority(index: int) -> tuple[int, float, int]:
+        head = _head_line(lines, units[index])
+        essential = 1 if head is not None and _ESSENTIAL.match(lines[head]) else 0
+        relevance = sum(weights.get(word, 0.0) for word in unit_words[index])
+        return (essential, relevance / math.sqrt(max(1, costs[index])), -index)
+
+    for index in sorted((index for index in range(len(units)) if index not in kept), key=priority, reverse=True):
+        extra = costs[index] - stub_costs[index]
+        if used + extra <= budget:
+            kept.add(index)
+            used += extra
+    return kept
+
+
+def _render(lines: list[str], units: list[_Unit], kept: set[int], stubs: bool) -> str:
+    output: list[str] = []
+    omitted = 0
+    for index, unit in enumerate(units):
+        if index in kept:
+            if omitted:
+                output.append(_omitted_comment(lines[unit.start], omitted))
+                omitted = 0
+            output.extend(lines[unit.start : unit.end + 1])
+            continue
+        stub = _stub(lines, unit) if stubs else ""
+        if stub:
+            if omitted:
+                output.append(_omitted_comment(lines[unit.start], omitted))
+                omitted = 0
+            output.append(stub)
+        else:
+            omitted += unit.end - unit.start + 1
+    if omitted:
+        output.append(_omitted_comment(lines[units[-1].end], omitted))
+    return "\n".join(output)
+
+
+def _stub(lines: list[str], unit: _Unit) -> str:
+    # A dropped block keeps its signature so the model still knows the method exists.
+    head = _head_line(lines, unit)
+    if head is None or head == unit.end or not lines[head].rstrip().endswith("{"):
+        return ""
+    return f"{lines[head].rstrip()} /* {unit.end - head - 1} lines omitted */ {lines[unit.end].strip()}"
+
+
+def _head_line(lines: list[str], unit: _Unit) -> int | None:
+    return next((index for index in range(unit.start, unit.end + 1) if not _is_trivia(lines[index])), None)
+
+
+def _omitted_comment(neighbour: str, count: int) -> str:
+    indent = neighbour[: len(neighbour) - len(neighbour.lstrip())]
+    return f"{indent}/* {count} lines omitted */"
+
+
+def _is_trivia(line: str) -> bool:
+    stripped = line.lstrip()
+    return not stripped or stripped.startswith(("//", "/*", "*"))
+
+
+def _words(text: str) -> set[str]:
+    # Whole identifiers ("spawnenemy7") plus their camelCase parts ("spawn", "enemy").
+    words = set()
+    for identifier in _IDENTIFIERS.findall(text):
+        words.add(identifier.lower())
+        words.update(part.lower() for part in _WORD_PARTS.findall(identifier) if len(part) > 2)
+    return words
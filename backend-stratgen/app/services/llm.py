@@ -1,20 +1,44 @@
 from __future__ import annotations
 
+import asyncio
+import functools
 import json
-import os
-import re
-import shutil
 import socket
-import subprocess
-import tempfile
+import threading
 import time
-from typing import Protocol
+import weakref
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Protocol, runtime_checkable
 from urllib import error, request
 
-from openai import OpenAI
+import httpx
+from openai import APIConnectionError, APITimeoutError, AsyncOpenAI, OpenAI
 from pydantic import ValidationError
 
 from app.models import DifficultyParams, EnemyArchetype, GamePlan, PhysicsRules, PlayerConfig, SceneObject
+from app.services.deadlines import call_timeout, deadline_expired, require_time
+from app.services.events import report_event
+from app.services.hedging import CallBudget, CallBudgetExhausted, LatencyWindow, first_success
+from app.services.jsanalysis import SCENE_MODULE_MARKERS, analyze_js
+from app.services.jscontext import truncate_js, truncate_middle
+from app.services.metrics import LLM_CALL_SECONDS, VALIDATION_FAILURES, VALIDATION_SECONDS, failure_reason
+from app.services.nodecheck import NodeSyntaxChecker
+from app.services.patching import PatchApplyError, apply_search_replace, numbered_excerpt, parse_search_replace
+from app.services.resilience import (
+    OUTCOME_CANCELLED,
+    OUTCOME_OK,
+    OUTCOME_OVERLOADED,
+    OUTCOME_TIMEOUT,
+    OUTCOME_UNAVAILABLE,
+    ProviderGuard,
+    ProviderUnavailableError,
+    backoff_delay,
+    retry_after_seconds,
+    status_outcome,
+)
+from app.services.routing import Endpoint, EndpointRouter, Route
+from app.services.tokens import HeuristicTokenCounter, TokenCounter
 
 
 class PlanGenerator(Protocol):
@@ -25,6 +49,34 @@ class PlanGenerator(Protocol):
         ...
 
 
+@runtime_checkable
+class AsyncPlanGenerator(Protocol):
+    async def agenerate_plan(self, prompt: str, previous_plan: GamePlan | None = None) -> GamePlan:
+        ...
+
+    async def agenerate_game_code(self, prompt: str, plan: GamePlan, previous_code: str | None = None) -> str:
+        ...
+
+
+TRANSIENT_STATUS_CODES = {429, 500, 502, 503, 504}
+_FAILOVER_OUTCOMES = {OUTCOME_OVERLOADED, OUTCOME_TIMEOUT, OUTCOME_UNAVAILABLE}
+SYSTEM_PROMPT = "You are an expert Phaser game generation assistant."
+# Kept free in the context window: the smallest useful completion, and chat-template overhead.
+MIN_OUTPUT_TOKENS = 512
+RESERVED_TOKENS = 128
+
+
+def _validate_plan(raw_plan: str) -> GamePlan:
+    with VALIDATION_SECONDS.labels("plan").time():
+        try:
+            return GamePlan.model_validate_json(raw_plan)
+        except ValidationError as exc:
+            for detail in exc.errors():
+                field = detail["loc"][0] if detail["loc"] else "plan"
+                VALIDATION_FAILURES.labels("plan", f"{field}:{detail['type']}").inc()
+            raise
+
+
 class DeterministicPlanGenerator:
     def generate_plan(self, prompt: str, previous_plan: GamePlan | None = None) -> GamePlan:
         if previous_plan is not None:
@@ -146,6 +198,15 @@ function createGeneratedScene(Phaser, PLAN) {
 }
 """
 
+    async def agenerate_plan(self, prompt: str, previous_plan: GamePlan | None = None) -> GamePlan:
+        return self.generate_plan(prompt, previous_plan=previous_plan)
+
+    def cache_fingerprint(self) -> dict[str, object]:
+        return {"generator": "deterministic"}
+
+    async def agenerate_game_code(self, prompt: str, plan: GamePlan, previous_code: str | None = None) -> str:
+        return self.generate_game_code(prompt, plan, previous_code=previous_code)
+
     @staticmethod
     def _extract_title(prompt: str) -> str:
         stripped = " ".join(prompt.split())
@@ -154,7 +215,113 @@ function createGeneratedScene(Phaser, PLAN) {
         return stripped[:57].rstrip() + "..."
 
 
+# Bump whenever prompt wording changes so cached generations from older prompts are not reused.
+PROMPT_VERSION = 2
+
+PLAN_KEY_CONTRACT = (
+    "Top-level required keys:\n"
+    "- title, genre, core_loop, controls, mechanics, player, enemy_archetypes,\n"
+    "  player_rules, enemy_rules, physics_rules, win_condition, lose_condition,\n"
+    "  ui_text, difficulty, scene_graph_objects\n\n"
+    "Required object shapes:\n"
+    "- physics_rules: { gravity, max_speed, friction }\n"
+    "- difficulty: { enemy_spawn_interval_ms, enemy_speed, score_per_enemy, target_score }\n"
+    "- player: { speed, radius, color, health }\n"
+    "- enemy_archetypes[]: { id, movement, speed, radius, color, count }\n"
+    "- scene_graph_objects[]: { id, kind }\n\n"
+    "Forbidden examples (do NOT use):\n"
+    "- physics_rules.collision_type, physics_rules.description\n"
+    "- difficulty.scaling_factor, difficulty.description\n"
+    "- scene_graph_objects[].name"
+)
+
+CODE_REQUIREMENTS = (
+    "You write JavaScript scene modules for Phaser 2D games.\n"
+    "Requirements:\n"
+    "- Output only JavaScript code (no markdown).\n"
+    "- Must define: function createGeneratedScene(Phaser, PLAN) { ... return class ... }\n"
+    "- Use Phaser 3 API only.\n"
+    "- Returned scene class must extend Phaser.Scene.\n"
+    "- Do not create new Phaser.Game (runtime scaffold handles that).\n"
+    "- Scene must rely on provided PLAN and Phaser only.\n"
+    "- Offline only. Do not use network APIs (fetch/XMLHttpRequest/WebSocket/EventSource/importScripts).\n"
+    "- Include mechanics, enemies, player behavior, and visual style from plan.\n"
+    "- Use generated in-code visuals (graphics/shapes/procedural textures), no external assets.\n"
+    "- Implement create()/update() methods in returned scene class.\n\n"
+    "Performance and size constraints:\n"
+    "- Keep implementation lightweight and browser-friendly.\n"
+    "- Target stable 60fps on a typical laptop.\n"
+    "- Keep active object count modest (prefer under ~120 objects).\n"
+    "- Avoid heavy particle systems, shader effects, and large procedural texture loops.\n"
+    "- Prefer simple geometry and pooled/reused objects where possible.\n"
+    "- Keep generated source concise (prefer under ~600 lines).\n\n"
+)
+
+PATCH_REPAIR_INSTRUCTIONS = (
+    "Fix the errors in this Phaser 3 scene module (createGeneratedScene(Phaser, PLAN) returns a class "
+    "extending Phaser.Scene with create()/update(); no network APIs, no Phaser 2 APIs).\n"
+    "Reply ONLY with search/replace blocks, no prose and no markdown:\n"
+    "<<<<<<< SEARCH\n<lines copied exactly from the code, without the line-number prefix>\n=======\n"
+    "<replacement lines>\n>>>>>>> REPLACE\n"
+    "Each SEARCH must match the code exactly once. Keep blocks small; use several blocks for several fixes.\n\n"
+)
+
+
+def _minified_json(value: object) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def _strip_schema_titles(node: object) -> object:
+    # Pydantic's auto-generated "title" annotations just repeat the field name; the model gains nothing from them.
+    if isinstance(node, dict):
+        return {
+            key: _strip_schema_titles(value)
+            for key, value in node.items()
+            if not (key == "title" and isinstance(value, str))
+        }
+    if isinstance(node, list):
+        return [_strip_schema_titles(item) for item in node]
+    return node
+
+
+PLAN_PREAMBLE = (
+    "You design 2D Phaser browser games as JSON plans. Keep games offline-only and within 1-3 mechanics.\n\n"
+    f"Key contract:\n{PLAN_KEY_CONTRACT}\n\n"
+)
+
+
+def _guard_outcome(outcome: str) -> str:
+    # A timeout the job's own deadline imposed says nothing about the provider.
+    return OUTCOME_CANCELLED if outcome == OUTCOME_TIMEOUT and deadline_expired() else outcome
+
+
+def is_transient_failure(exc: BaseException | None) -> bool:
+    # True when the provider, not the request, failed: the same job may succeed when run again.
+    while exc is not None:
+        if isinstance(exc, ProviderUnavailableError):
+            return True
+        if FeatherlessPlanGenerator._provider_outcome(exc)[0] in _FAILOVER_OUTCOMES:
+            return True
+        exc = exc.__cause__
+    return False
+
+
+@functools.cache
+def _plan_context() -> str:
+    # Byte-identical head of every design prompt; repair prompts share the preamble part of it, so
+    # provider prefix caches can reuse it across jobs.
+    schema = _minified_json(_strip_schema_titles(GamePlan.model_json_schema()))
+    return f"{PLAN_PREAMBLE}Required JSON schema:\n{schema}\n\n"
+
+
+@functools.cache
+def _plan_template() -> str:
+    return DeterministicPlanGenerator().generate_plan("Example Game").model_dump_json()
+
+
 class GeminiPlanGenerator:
+    metrics_name = "gemini"
+
     def __init__(
         self,
         api_key: str,
@@ -162,69 +329,209 @@ class GeminiPlanGenerator:
         max_retries: int = 2,
         timeout_seconds: int = 90,
         http_retries: int = 2,
+        pool_size: int = 100,
+        syntax_checker: NodeSyntaxChecker | None = None,
+        code_candidates: int = 1,
+        hedge_percentile: float = 0.0,
+        max_code_calls: int = 0,
+        patch_repairs: bool = True,
+        provider_guard: ProviderGuard | None = None,
     ):
         self.api_key = api_key
         self.model = model
         self.max_retries = max_retries
         self.timeout_seconds = timeout_seconds
         self.http_retries = http_retries
+        self.pool_size = pool_size
+        self.syntax_checker = syntax_checker if syntax_checker is not None else NodeSyntaxChecker()
+        self.code_candidates = max(1, code_candidates)
+        self.hedge_percentile = hedge_percentile
+        self.max_code_calls = max_code_calls
+        self.patch_repairs = patch_repairs
+        self.provider_guard = provider_guard if provider_guard is not None else ProviderGuard(self.metrics_name)
+        self._code_latency = LatencyWindow()
+        self._call_latency: dict[str, LatencyWindow] = {}
         self.endpoint = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={api_key}"
+        self._client_lock = threading.Lock()
+        self._async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def cache_fingerprint(self) -> dict[str, object]:
+        # Everything that changes what the model is asked or how its output is accepted.
+        return {
+            "generator": type(self).__name__,
+            "endpoint": getattr(self, "base_url", "gemini"),
+            "model": self.model,
+            "max_tokens": getattr(self, "max_tokens", 8192),
+            "context_window": getattr(self, "context_window", None),
+            "context_chars": getattr(self, "context_chars", 12000),
+            "max_retries": self.max_retries,
+            "prompt_version": PROMPT_VERSION,
+        }
 
     def generate_plan(self, prompt: str, previous_plan: GamePlan | None = None) -> GamePlan:
         raw_plan = self._generate_raw_plan(prompt, previous_plan)
         for attempt in range(self.max_retries + 1):
             try:
-                return GamePlan.model_validate_json(raw_plan)
+                return _validate_plan(raw_plan)
             except ValidationError as exc:
                 if attempt >= self.max_retries:
                     raise RuntimeError(f"Gemini plan validation failed after retries: {exc}") from exc
+                require_time(self._expected_call_seconds("plan_repair"), "a plan repair")
+                report_event(
+                    "plan_repair",
+                    f"Repairing plan (attempt {attempt + 1}/{self.max_retries}): {exc.error_count()} error(s)",
+                )
                 raw_plan = self._repair_raw_plan(prompt, raw_plan, exc, previous_plan)
         raise RuntimeError("Unexpected plan generation state.")
 
     def generate_game_code(self, prompt: str, plan: GamePlan, previous_code: str | None = None) -> str:
         raw_code = self._generate_raw_code(prompt, plan, previous_code)
+        return self._validated_code(prompt, plan, previous_code, raw_code)
+
+    def repair_game_code(
+        self,
+        prompt: str,
+        plan: GamePlan,
+        previous_code: str | None,
+        invalid_code: str,
+        errors: list[str],
+    ) -> str:
+        raw_code = self._repair_raw_code(prompt, plan, previous_code, invalid_code, errors)
+        return self._validated_code(prompt, plan, previous_code, raw_code)
+
+    def _validated_code(self, prompt: str, plan: GamePlan, previous_code: str | None, raw_code: str) -> str:
         errors = self._validate_scene_module(raw_code)
         for attempt in range(self.max_retries + 1):
             if not errors:
                 return raw_code
             if attempt >= self.max_retries:
                 raise RuntimeError(f"Gemini game code validation failed: {', '.join(errors)}")
+            require_time(self.expected_repair_seconds(), "a scene module repair")
+            report_event(
+                "code_repair",
+                f"Repairing scene module (attempt {attempt + 1}/{self.max_retries}): {', '.join(errors)}",
+            )
             raw_code = self._repair_raw_code(prompt, plan, previous_code, raw_code, errors)
             errors = self._validate_scene_module(raw_code)
         raise RuntimeError("Unexpected code generation state.")
 
+    async def agenerate_plan(self, prompt: str, previous_plan: GamePlan | None = None) -> GamePlan:
+        raw_plan = self._extract_json(await self._acall_model(self._plan_prompt(prompt, previous_plan), "plan"))
+        for attempt in range(self.max_retries + 1):
+            try:
+                return _validate_plan(raw_plan)
+            except ValidationError as exc:
+                if attempt >= self.max_retries:
+                    raise RuntimeError(f"Gemini plan validation failed after retries: {exc}") from exc
+                require_time(self._expected_call_seconds("plan_repair"), "a plan repair")
+                report_event(
+                    "plan_repair",
+                    f"Repairing plan (attempt {attempt + 1}/{self.max_retries}): {exc.error_count()} error(s)",
+                )
+                repair_prompt = self._plan_repair_prompt(prompt, raw_plan, exc, previous_plan)
+                raw_plan = self._extract_json(await self._acall_model(repair_prompt, "plan_repair"))
+        raise RuntimeError("Unexpected plan generation state.")
+
+    async def agenerate_game_code(self, prompt: str, plan: GamePlan, previous_code: str | None = None) -> str:
+        if self.code_candidates <= 1:
+            return await self._agenerate_candidate(prompt, plan, previous_code, budget=None)
+        budget = CallBudget(self.max_code_calls or self.code_candidates + self.max_retries)
+
+        def announce(index: int) -> None:
+            if index > 1:
+                report_event("code_candidate", f"Starting scene module candidate {index}/{self.code_candidates}")
+
+        return await first_success(
+            lambda _: self._agenerate_candidate(prompt, plan, previous_code, budget),
+            max_candidates=self.code_candidates,
+            hedge_delay=self._hedge_delay(),
+            can_start=lambda: budget.remaining > 0,
+            on_start=announce,
+        )
+
+    async def _agenerate_candidate(
+        self,
+        prompt: str,
+        plan: GamePlan,
+        previous_code: str | None,
+        budget: CallBudget | None,
+    ) -> str:
+        if budget is not None:
+            budget.take()
+        started = time.monotonic()
+        reply = await self._acall_model(self._code_prompt(prompt, plan, previous_code), "code")
+        raw_code = self._extract_javascript(reply)
+        self._code_latency.observe(time.monotonic() - started)
+        return await self._avalidated_code(prompt, plan, previous_code, raw_code, budget)
+
+    def _hedge_delay(self) -> float | None:
+        # 0 starts every candidate at once; otherwise the next one starts when the current one is
+        # slower than that percentile of recent generations (and only on failure until we know).
+        if self.hedge_percentile <= 0:
+            return 0.0
+        return self._code_latency.percentile(self.hedge_percentile)
+
+    async def arepair_game_code(
+        self,
+        prompt: str,
+        plan: GamePlan,
+        previous_code: str | None,
+        invalid_code: str,
+        errors: list[str],
+    ) -> str:
+        raw_code = await self._arepair_raw_code(prompt, plan, previous_code, invalid_code, errors)
+        return await self._avalidated_code(prompt, plan, previous_code, raw_code)
+
+    async def _avalidated_code(
+        self,
+        prompt: str,
+        plan: GamePlan,
+        previous_code: str | None,
+        raw_code: str,
+        budget: CallBudget | None = None,
+    ) -> str:
+        errors = await asyncio.to_thread(self._validate_scene_module, raw_code)
+        for attempt in range(self.max_retries + 1):
+            if not errors:
+                return raw_code
+            if attempt >= self.max_retries:
+                raise RuntimeError(f"Gemini game code validation failed: {', '.join(errors)}")
+            require_time(self.expected_repair_seconds(), "a scene module repair")
+            if budget is not None:
+                try:
+                    budget.take()
+                except CallBudgetExhausted as exc:
+                    raise RuntimeError(f"{exc}; last validation errors: {', '.join(errors)}") from exc
+            report_event(
+                "code_repair",
+                f"Repairing scene module (attempt {attempt + 1}/{self.max_retries}): {', '.join(errors)}",
+            )
+            raw_code = await self._arepair_raw_code(prompt, plan, previous_code, raw_code, errors, budget)
+            errors = await asyncio.to_thread(self._validate_scene_module, raw_code)
+        raise RuntimeError("Unexpected code generation state.")
+
     def _generate_raw_plan(self, prompt: str, previous_plan: GamePlan | None = None) -> str:
-        schema = json.dumps(GamePlan.model_json_schema(), indent=2)
-        key_contract = self._plan_key_contract()
+        return self._extract_json(self._call_model(self._plan_prompt(prompt, previous_plan), "plan"))
+
+    def _plan_prompt(self, prompt: str, previous_plan: GamePlan | None = None) -> str:
         if previous_plan is None:
-            template_plan = DeterministicPlanGenerator().generate_plan(prompt).model_dump_json(indent=2)
-            instruction = (
-                "You design 2D Phaser browser games. Output only one valid JSON object matching schema. "
-                "No markdown/comments. Keep game offline-only and within 1-3 mechanics. "
-                "Use EXACT keys from schema/template; do not add or rename keys."
-            )
-            user_prompt = (
-                f"{instruction}\n\n"
-                f"User prompt:\n{prompt}\n\n"
-                f"Key contract:\n{key_contract}\n\n"
-                f"Canonical template (match this key shape exactly):\n{template_plan}\n\n"
-                f"Required JSON schema:\n{schema}\n"
-            )
-        else:
-            base_plan_json = previous_plan.model_dump_json(indent=2)
-            instruction = (
-                "Update the existing 2D Phaser game plan. Preserve parts not requested to change. "
-                "Output only one valid JSON object matching schema. "
-                "Use EXACT keys from schema; do not add new object shapes."
-            )
-            user_prompt = (
-                f"{instruction}\n\n"
-                f"User modification prompt:\n{prompt}\n\n"
-                f"Key contract:\n{key_contract}\n\n"
-                f"Current plan JSON:\n{base_plan_json}\n\n"
-                f"Required JSON schema:\n{schema}\n"
+            return (
+                f"{_plan_context()}"
+                f"Canonical template (match this key shape exactly):\n{_plan_template()}\n\n"
+                "Task: design a new game. Output only one valid JSON object matching schema. No markdown/comments. "
+                "Use EXACT keys from schema/template; do not add or rename keys.\n\n"
+                f"User prompt:\n{prompt}\n"
             )
-        return self._extract_json(self._call_model(user_prompt))
+        return (
+            f"{_plan_context()}"
+            "Task: update the existing game plan. Preserve parts not requested to change. "
+            "Output only one valid JSON object matching schema. "
+            "Use EXACT keys from schema; do not add new object shapes.\n\n"
+            f"Current plan JSON:\n{previous_plan.model_dump_json()}\n\n"
+            f"User modification prompt:\n{prompt}\n"
+        )
 
     def _repair_raw_plan(
         self,
@@ -233,72 +540,47 @@ class GeminiPlanGenerator:
         validation_error: ValidationError,
         previous_plan: GamePlan | None = None,
     ) -> str:
-        validation_details = json.dumps(validation_error.errors(include_url=False), indent=2)
-        base_plan = previous_plan.model_dump_json(indent=2) if previous_plan else "None"
-        repair_prompt = (
-            "Repair this JSON to satisfy schema and validation errors. Return only JSON.\n"
-            "Important: keep EXACT key names required by schema, remove unknown fields, and fill missing required fields.\n\n"
-            f"Key contract:\n{self._plan_key_contract()}\n\n"
-            f"Original prompt:\n{prompt}\n\n"
+        repair_prompt = self._plan_repair_prompt(prompt, previous_raw_plan, validation_error, previous_plan)
+        return self._extract_json(self._call_model(repair_prompt, "plan_repair"))
+
+    def _plan_repair_prompt(
+        self,
+        prompt: str,
+        previous_raw_plan: str,
+        validation_error: ValidationError,
+        previous_plan: GamePlan | None = None,
+    ) -> str:
+        validation_details = _minified_json(validation_error.errors(include_url=False))
+        base_plan = previous_plan.model_dump_json() if previous_plan else "None"
+        return (
+            f"{PLAN_PREAMBLE}"
+            "Task: repair invalid JSON to satisfy schema and validation errors. Return only JSON. "
+            "Keep EXACT key names required by schema, remove unknown fields, and fill missing required fields.\n\n"
             f"Previous plan:\n{base_plan}\n\n"
+            f"Original prompt:\n{prompt}\n\n"
             f"Invalid JSON:\n{previous_raw_plan}\n\n"
             f"Validation errors:\n{validation_details}\n"
         )
-        return self._extract_json(self._call_model(repair_prompt))
-
-    @staticmethod
-    def _plan_key_contract() -> str:
-        return (
-            "Top-level required keys:\n"
-            "- title, genre, core_loop, controls, mechanics, player, enemy_archetypes,\n"
-            "  player_rules, enemy_rules, physics_rules, win_condition, lose_condition,\n"
-            "  ui_text, difficulty, scene_graph_objects\n\n"
-            "Required object shapes:\n"
-            "- physics_rules: { gravity, max_speed, friction }\n"
-            "- difficulty: { enemy_spawn_interval_ms, enemy_speed, score_per_enemy, target_score }\n"
-            "- player: { speed, radius, color, health }\n"
-            "- enemy_archetypes[]: { id, movement, speed, radius, color, count }\n"
-            "- scene_graph_objects[]: { id, kind }\n\n"
-            "Forbidden examples (do NOT use):\n"
-            "- physics_rules.collision_type, physics_rules.description\n"
-            "- difficulty.scaling_factor, difficulty.description\n"
-            "- scene_graph_objects[].name"
-        )
 
     def _generate_raw_code(self, prompt: str, plan: GamePlan, previous_code: str | None = None) -> str:
-        plan_json = plan.model_dump_json(indent=2)
+        return self._extract_javascript(self._call_model(self._code_prompt(prompt, plan, previous_code), "code"))
+
+    def _code_prompt(self, prompt: str, plan: GamePlan, previous_code: str | None = None) -> str:
         mode_line = "MODIFY EXISTING CODE" if previous_code else "CREATE NEW CODE"
-        previous_code_block = (
-            self._truncate_context(previous_code, max_chars=getattr(self, "context_chars", 12000))
-            if previous_code
-            else "None"
-        )
-        prompt_text = (
-            "Generate JavaScript scene module for a Phaser 2D game.\n"
-            "Requirements:\n"
-            "- Output only JavaScript code (no markdown).\n"
-            "- Must define: function createGeneratedScene(Phaser, PLAN) { ... return class ... }\n"
-            "- Use Phaser 3 API only.\n"
-            "- Returned scene class must extend Phaser.Scene.\n"
-            "- Do not create new Phaser.Game (runtime scaffold handles that).\n"
-            "- Scene must rely on provided PLAN and Phaser only.\n"
-            "- Offline only. Do not use network APIs (fetch/XMLHttpRequest/WebSocket/EventSource/importScripts).\n"
-            "- Include mechanics, enemies, player behavior, and visual style from plan.\n"
-            "- Use generated in-code visuals (graphics/shapes/procedural textures), no external assets.\n"
-            "- Implement create()/update() methods in returned scene class.\n\n"
-            "Performance and size constraints:\n"
-            "- Keep implementation lightweight and browser-friendly.\n"
-            "- Target stable 60fps on a typical laptop.\n"
-            "- Keep active object count modest (prefer under ~120 objects).\n"
-            "- Avoid heavy particle systems, shader effects, and large procedural texture loops.\n"
-            "- Prefer simple geometry and pooled/reused objects where possible.\n"
-            "- Keep generated source concise (prefer under ~600 lines).\n\n"
+        head = (
+            f"{CODE_REQUIREMENTS}"
             f"Mode: {mode_line}\n"
-            f"User prompt:\n{prompt}\n\n"
-            f"Game plan JSON:\n{plan_json}\n\n"
-            f"Previous code:\n{previous_code_block}\n"
+            f"Game plan JSON:\n{plan.model_dump_json()}\n\n"
+            "Previous code:\n"
         )
-        return self._extract_javascript(self._call_model(prompt_text))
+        tail = f"\n\nUser prompt:\n{prompt}\n"
+        previous_code_block = self._fit_code_context(previous_code, prompt, head + tail) if previous_code else "None"
+        return f"{head}{previous_code_block}{tail}"
+
+    def _fit_code_context(self, code: str, query: str, surrounding: str) -> str:
+        # Previous code is context, not the thing being edited: whole methods are dropped (the ones
+        # least related to `query` first) instead of cutting the module in the middle.
+        return truncate_js(code, getattr(self, "context_chars", 12000), query=query)
 
     def _repair_raw_code(
         self,
@@ -308,83 +590,134 @@ class GeminiPlanGenerator:
         invalid_code: str,
         errors: list[str],
     ) -> str:
-        plan_json = plan.model_dump_json(indent=2)
-        previous_code_block = previous_code if previous_code else "None"
-        repair_prompt = (
-            "Patch this JavaScript so it satisfies all errors. Return only JavaScript.\n\n"
-            f"User prompt:\n{prompt}\n\n"
-            f"Game plan JSON:\n{plan_json}\n\n"
-            f"Previous code:\n{previous_code_block}\n\n"
+        if self.patch_repairs:
+            reply = self._call_model(self._code_patch_prompt(invalid_code, errors), "code_patch")
+            patched = self._apply_patch_reply(invalid_code, reply)
+            if patched is not None:
+                return patched
+        repair_prompt = self._code_repair_prompt(prompt, plan, previous_code, invalid_code, errors)
+        return self._extract_javascript(self._call_model(repair_prompt, "code_repair"))
+
+    async def _arepair_raw_code(
+        self,
+        prompt: str,
+        plan: GamePlan,
+        previous_code: str | None,
+        invalid_code: str,
+        errors: list[str],
+        budget: CallBudget | None = None,
+    ) -> str:
+        if self.patch_repairs:
+            reply = await self._acall_model(self._code_patch_prompt(invalid_code, errors), "code_patch")
+            patched = self._apply_patch_reply(invalid_code, reply)
+            if patched is not None:
+                return patched
+            if budget is not None:
+                budget.take()
+        repair_prompt = self._code_repair_prompt(prompt, plan, previous_code, invalid_code, errors)
+        return self._extract_javascript(await self._acall_model(repair_prompt, "code_repair"))
+
+    def _code_patch_prompt(self, invalid_code: str, errors: list[str]) -> str:
+        # Only the errors and the code around them: no plan, prompt or previous version, and the
+        # reply is a patch instead of the whole module.
+        excerpt, complete = numbered_excerpt(invalid_code, errors)
+        heading = "Code" if complete else "Code excerpts around the errors"
+        return f"{PATCH_REPAIR_INSTRUCTIONS}Errors:\n{_minified_json(errors)}\n\n{heading} (line-numbered):\n{excerpt}\n"
+
+    @staticmethod
+    def _apply_patch_reply(invalid_code: str, reply: str) -> str | None:
+        blocks = parse_search_replace(reply)
+        try:
+            patched = apply_search_replace(invalid_code, blocks)
+        except PatchApplyError as exc:
+            report_event("code_repair", f"Patch did not apply ({exc}); falling back to a full rewrite")
+            return None
+        report_event("code_patch", f"Applied {len(blocks)} search/replace block(s)")
+        return patched
+
+    def _code_repair_prompt(
+        self,
+        prompt: str,
+        plan: GamePlan,
+        previous_code: str | None,
+        invalid_code: str,
+        errors: list[str],
+    ) -> str:
+        head = (
+            f"{CODE_REQUIREMENTS}"
+            "Mode: REPAIR INVALID CODE. Patch the invalid code so it satisfies all errors. Return only JavaScript.\n"
+            f"Game plan JSON:\n{plan.model_dump_json()}\n\n"
+            "Previous code:\n"
+        )
+        tail = (
+            f"\n\nUser prompt:\n{prompt}\n\n"
             f"Invalid code:\n{invalid_code}\n\n"
-            f"Errors:\n{json.dumps(errors, indent=2)}\n"
+            f"Errors:\n{_minified_json(errors)}\n"
+        )
+        previous_code_block = (
+            self._fit_code_context(previous_code, f"{prompt}\n{' '.join(errors)}", head + tail)
+            if previous_code
+            else "None"
         )
-        return self._extract_javascript(self._call_model(repair_prompt))
+        return f"{head}{previous_code_block}{tail}"
 
     def _validate_scene_module(self, code: str) -> list[str]:
-        errors: list[str] = []
-        forbidden_patterns = [
-            r"\bfetch\s*\(",
-            r"\bXMLHttpRequest\b",
-            r"\bWebSocket\b",
-            r"\bEventSource\b",
-            r"\bimportScripts\b",
-            r"\beval\s*\(",
-            r"\bnew\s+Function\b",
-            r"\bPhaser\.State\b",
-            r"\bbitmapData\b",
-            r"\baddBitmapData\b",
-            r"\bPhaser\.Timer\.SECOND\b",
-        ]
-        for pattern in forbidden_patterns:
-            if re.search(pattern, code):
-                errors.append(f"forbidden:{pattern}")
-        if "function createGeneratedScene" not in code:
-            errors.append("missing:createGeneratedScene")
-        if "extends Phaser.Scene" not in code:
-            errors.append("missing:extends Phaser.Scene")
-        if "return class" not in code and "class " not in code:
-            errors.append("missing:scene_class")
-        if "create(" not in code:
-            errors.append("missing:create_method")
-        if "update(" not in code:
-            errors.append("missing:update_method")
-        node_bin = shutil.which("node")
-        if node_bin:
-            wrapped = (
-                "(function () {\n"
-                f"{code}\n"
-                "if (typeof createGeneratedScene !== 'function') {\n"
-                "  throw new Error('createGeneratedScene missing');\n"
-                "}\n"
-                "})();\n"
-            )
-            with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False, encoding="utf-8") as tmp:
-                tmp.write(wrapped)
-                tmp_path = tmp.name
-            try:
-                check = subprocess.run(
-                    [node_bin, "--check", tmp_path],
-                    capture_output=True,
-                    text=True,
-                )
-                if check.returncode != 0:
-                    detail = (check.stderr or check.stdout).strip()
-                    errors.append(f"syntax:{detail}")
-            finally:
-                try:
-                    os.remove(tmp_path)
-                except OSError:
-                    pass
+        started = time.perf_counter()
+        analysis = analyze_js(code)
+        errors = analysis.forbidden() + analysis.missing(SCENE_MODULE_MARKERS)
+        # The wrapper opens on the module's first line so reported line numbers match the module.
+        wrapped = (
+            "(function () { "
+            f"{code}\n"
+            "if (typeof createGeneratedScene !== 'function') {\n"
+            "  throw new Error('createGeneratedScene missing');\n"
+            "}\n"
+            "})();\n"
+        )
+        result = self.syntax_checker.check(wrapped, filename="scene_module.js")
+        if result is not None and not result.ok:
+            errors.append(f"syntax:{result.describe()}")
+        VALIDATION_SECONDS.labels("scene_module").observe(time.perf_counter() - started)
+        for item in errors:
+            VALIDATION_FAILURES.labels("scene_module", failure_reason(item)).inc()
         return errors
 
-    def _call_model(self, prompt_text: str) -> str:
-        payload = {
-            "contents": [{"parts": [{"text": prompt_text}]}],
-            "generationConfig": {
-                "temperature": 0.25,
-                "maxOutputTokens": getattr(self, "max_tokens", 8192),
-            },
-        }
+    def provider_stats(self) -> list[dict[str, object]]:
+        return [self.provider_guard.stats()]
+
+    def _call_model(self, prompt_text: str, prompt_kind: str = "other") -> str:
+        with self._timed_call(prompt_kind):
+            return self._request_completion(prompt_text)
+
+    async def _acall_model(self, prompt_text: str, prompt_kind: str = "other") -> str:
+        with self._timed_call(prompt_kind):
+            return await self._arequest_completion(prompt_text)
+
+    @contextmanager
+    def _timed_call(self, prompt_kind: str) -> Iterator[None]:
+        # One observation per call, HTTP retries included: that is the latency a stage waits for.
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            yield
+            outcome = "ok"
+        finally:
+            elapsed = time.perf_counter() - started
+            LLM_CALL_SECONDS.labels(self.metrics_name, self.model, prompt_kind, outcome).observe(elapsed)
+            if outcome == "ok":
+                self._call_latency.setdefault(prompt_kind, LatencyWindow(min_samples=3)).observe(elapsed)
+
+    def _expected_call_seconds(self, prompt_kind: str) -> float:
+        # Median of recent successful calls of this kind; 0 until there is history.
+        window = self._call_latency.get(prompt_kind)
+        median = window.percentile(0.5) if window is not None else None
+        return median or 0.0
+
+    def expected_repair_seconds(self) -> float:
+        return self._expected_call_seconds("code_patch" if self.patch_repairs else "code_repair")
+
+    def _request_completion(self, prompt_text: str) -> str:
+        payload = self._gemini_payload(prompt_text)
         req = request.Request(
             self.endpoint,
             data=json.dumps(payload).encode("utf-8"),
@@ -393,43 +726,123 @@ class GeminiPlanGenerator:
         )
         last_error: Exception | None = None
         for attempt in range(self.http_retries + 1):
+            # The limiter slot covers the request only, never the backoff sleep.
+            probe = self.provider_guard.acquire()
+            outcome, retry_after = OUTCOME_CANCELLED, None
             try:
-                with request.urlopen(req, timeout=self.timeout_seconds) as response:
-                    data = json.loads(response.read().decode("utf-8"))
+                with request.urlopen(req, timeout=call_timeout(self.timeout_seconds)) as response:
+                    raw = response.read()
+                outcome = OUTCOME_OK
+                data = json.loads(raw.decode("utf-8"))
                 break
             except error.HTTPError as exc:
                 body = exc.read().decode("utf-8", errors="replace")
+                outcome, retry_after = status_outcome(exc.code), retry_after_seconds(exc.headers)
                 # Retry only on transient server/rate-limit errors.
-                if exc.code in {429, 500, 502, 503, 504} and attempt < self.http_retries:
-                    time.sleep(0.8 * (2**attempt))
-                    last_error = RuntimeError(f"Gemini API transient HTTP {exc.code}: {body}")
-                    continue
-                raise RuntimeError(f"Gemini API HTTP {exc.code}: {body}") from exc
+                if exc.code not in TRANSIENT_STATUS_CODES or attempt >= self.http_retries:
+                    raise RuntimeError(f"Gemini API HTTP {exc.code}: {body}") from exc
+                last_error = RuntimeError(f"Gemini API transient HTTP {exc.code}: {body}")
             except (TimeoutError, socket.timeout) as exc:
-                if attempt < self.http_retries:
-                    time.sleep(0.8 * (2**attempt))
-                    last_error = RuntimeError(
-                        f"Gemini API timed out after {self.timeout_seconds}s (attempt {attempt + 1}/{self.http_retries + 1})"
-                    )
-                    continue
-                raise RuntimeError(
-                    f"Gemini API timed out after {self.timeout_seconds}s. "
-                    "Increase GEMINI_TIMEOUT_SECONDS or reduce prompt complexity."
-                ) from exc
+                outcome = OUTCOME_TIMEOUT
+                if attempt >= self.http_retries:
+                    raise RuntimeError(
+                        f"Gemini API timed out after {self.timeout_seconds}s. "
+                        "Increase GEMINI_TIMEOUT_SECONDS or reduce prompt complexity."
+                    ) from exc
+                last_error = RuntimeError(
+                    f"Gemini API timed out after {self.timeout_seconds}s (attempt {attempt + 1}/{self.http_retries + 1})"
+                )
             except error.URLError as exc:
                 # URLError can wrap timeout-like transient failures.
                 reason_text = str(exc.reason)
-                timeout_like = "timed out" in reason_text.lower()
-                if (timeout_like or attempt < self.http_retries) and attempt < self.http_retries:
-                    time.sleep(0.8 * (2**attempt))
-                    last_error = RuntimeError(f"Gemini API request failed (retrying): {reason_text}")
-                    continue
-                raise RuntimeError(f"Gemini API request failed: {exc}") from exc
+                outcome = OUTCOME_TIMEOUT if "timed out" in reason_text.lower() else OUTCOME_UNAVAILABLE
+                if attempt >= self.http_retries:
+                    raise RuntimeError(f"Gemini API request failed: {exc}") from exc
+                last_error = RuntimeError(f"Gemini API request failed (retrying): {reason_text}")
+            finally:
+                outcome = _guard_outcome(outcome)
+                self.provider_guard.release(probe, outcome, retry_after)
+            delay = backoff_delay(attempt, retry_after)
+            require_time(delay, "a provider retry")
+            report_event("http_retry", str(last_error))
+            time.sleep(delay)
+        else:
+            if last_error is not None:
+                raise last_error
+            raise RuntimeError("Gemini API request failed without details.")
+
+        return self._gemini_text(data)
+
+    async def _arequest_completion(self, prompt_text: str) -> str:
+        payload = self._gemini_payload(prompt_text)
+        client = self._async_http_client()
+        last_error: Exception | None = None
+        for attempt in range(self.http_retries + 1):
+            probe = await self.provider_guard.aacquire()
+            outcome, retry_after = OUTCOME_CANCELLED, None
+            try:
+                response = await client.post(self.endpoint, json=payload, timeout=call_timeout(self.timeout_seconds))
+                if response.status_code < 400:
+                    outcome = OUTCOME_OK
+                    data = response.json()
+                    break
+                outcome, retry_after = status_outcome(response.status_code), retry_after_seconds(response.headers)
+                if response.status_code not in TRANSIENT_STATUS_CODES or attempt >= self.http_retries:
+                    raise RuntimeError(f"Gemini API HTTP {response.status_code}: {response.text}")
+                last_error = RuntimeError(f"Gemini API transient HTTP {response.status_code}: {response.text}")
+            except httpx.TimeoutException as exc:
+                outcome = OUTCOME_TIMEOUT
+                if attempt >= self.http_retries:
+                    raise RuntimeError(
+                        f"Gemini API timed out after {self.timeout_seconds}s. "
+                        "Increase GEMINI_TIMEOUT_SECONDS or reduce prompt complexity."
+                    ) from exc
+                last_error = RuntimeError(
+                    f"Gemini API timed out after {self.timeout_seconds}s (attempt {attempt + 1}/{self.http_retries + 1})"
+                )
+            except httpx.TransportError as exc:
+                outcome = OUTCOME_UNAVAILABLE
+                if attempt >= self.http_retries:
+                    raise RuntimeError(f"Gemini API request failed: {exc}") from exc
+                last_error = RuntimeError(f"Gemini API request failed (retrying): {exc}")
+            finally:
+                outcome = _guard_outcome(outcome)
+                self.provider_guard.release(probe, outcome, retry_after)
+            delay = backoff_delay(attempt, retry_after)
+            require_time(delay, "a provider retry")
+            report_event("http_retry", str(last_error))
+            await asyncio.sleep(delay)
         else:
             if last_error is not None:
                 raise last_error
             raise RuntimeError("Gemini API request failed without details.")
 
+        return self._gemini_text(data)
+
+    def _gemini_payload(self, prompt_text: str) -> dict[str, object]:
+        return {
+            "contents": [{"parts": [{"text": prompt_text}]}],
+            "generationConfig": {
+                "temperature": 0.25,
+                "maxOutputTokens": getattr(self, "max_tokens", 8192),
+            },
+        }
+
+    def _async_http_client(self) -> httpx.AsyncClient:
+        # httpx pools are bound to the event loop that first used them, so keep one per loop.
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = httpx.AsyncClient(
+                    timeout=self.timeout_seconds,
+                    limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                )
+                self._async_clients[loop] = client
+        return client
+
+    @staticmethod
+    def _gemini_text(data: dict) -> str:
         candidates = data.get("candidates")
         if not candidates:
             raise RuntimeError(f"Gemini API returned no candidates: {data}")
@@ -440,16 +853,6 @@ class GeminiPlanGenerator:
             raise RuntimeError(f"Gemini API returned empty text: {data}")
         return text
 
-    @staticmethod
-    def _truncate_context(value: str | None, max_chars: int) -> str:
-        if not value:
-            return ""
-        if len(value) <= max_chars:
-            return value
-        head = value[: max_chars // 2]
-        tail = value[-(max_chars // 2) :]
-        return f"{head}\n/* CONTEXT TRUNCATED */\n{tail}"
-
     @staticmethod
     def _extract_json(text: str) -> str:
         stripped = text.strip()
@@ -477,6 +880,8 @@ class GeminiPlanGenerator:
 
 
 class FeatherlessPlanGenerator(GeminiPlanGenerator):
+    metrics_name = "featherless"
+
     def __init__(
         self,
         api_key: str,
@@ -488,6 +893,15 @@ class FeatherlessPlanGenerator(GeminiPlanGenerator):
         max_retries: int = 2,
         timeout_seconds: int = 90,
         http_retries: int = 2,
+        pool_size: int = 100,
+        syntax_checker: NodeSyntaxChecker | None = None,
+        code_candidates: int = 1,
+        hedge_percentile: float = 0.0,
+        max_code_calls: int = 0,
+        patch_repairs: bool = True,
+        token_counter: TokenCounter | None = None,
+        provider_guard: ProviderGuard | None = None,
+        router: EndpointRouter | None = None,
     ):
         self.api_key = api_key
         self.model = model
@@ -499,57 +913,186 @@ class FeatherlessPlanGenerator(GeminiPlanGenerator):
         self.timeout_seconds = timeout_seconds
         self.http_retries = http_retries
         self.endpoint = f"{self.base_url}/chat/completions"
+        self.pool_size = pool_size
+        self.syntax_checker = syntax_checker if syntax_checker is not None else NodeSyntaxChecker()
+        self.code_candidates = max(1, code_candidates)
+        self.hedge_percentile = hedge_percentile
+        self.max_code_calls = max_code_calls
+        self.patch_repairs = patch_repairs
+        self.token_counter = token_counter or HeuristicTokenCounter()
+        if router is None:
+            guard = provider_guard if provider_guard is not None else ProviderGuard(self.base_url)
+            router = EndpointRouter([Route(Endpoint(self.base_url, self.base_url, api_key, model), guard)])
+        self.router = router
+        self.provider_guard = router.primary.guard
+        self._code_latency = LatencyWindow()
+        self._call_latency: dict[str, LatencyWindow] = {}
+        self._client_lock = threading.Lock()
+        self._clients: dict[str, OpenAI] = {}
+        self._async_openai_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, AsyncOpenAI]] = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def cache_fingerprint(self) -> dict[str, object]:
+        fingerprint = super().cache_fingerprint()
+        if len(self.router.routes) > 1:
+            fingerprint["models"] = sorted({route.endpoint.model for route in self.router.routes})
+        return fingerprint
 
-    def _call_model(self, prompt_text: str) -> str:
-        system_prompt = "You are an expert Phaser game generation assistant."
+    def provider_stats(self) -> list[dict[str, object]]:
+        return self.router.stats()
+
+    def _request_completion(self, prompt_text: str) -> str:
+        system_prompt = SYSTEM_PROMPT
         prompt_text, output_tokens = self._fit_prompt_and_output_budget(system_prompt, prompt_text)
 
-        client = OpenAI(
-            base_url=self.base_url,
-            api_key=self.api_key,
-            timeout=self.timeout_seconds,
-        )
+        last_error: Exception | None = None
+        tried: list[Route] = []
+        for attempt in range(self.http_retries + 1):
+            route = self.router.pick(tried)
+            try:
+                probe = route.guard.acquire()
+            except ProviderUnavailableError as exc:
+                # The breaker opened between pick and acquire; another endpoint may still answer.
+                tried.append(route)
+                if not self.router.has_alternative(tried):
+                    raise
+                last_error = exc
+                continue
+            outcome, retry_after, detail = OUTCOME_CANCELLED, None, None
+            started = time.perf_counter()
+            try:
+                completion = self._openai_client(route).chat.completions.create(
+                    **self._completion_request(route.endpoint.model, system_prompt, prompt_text, output_tokens),
+                    timeout=call_timeout(self.timeout_seconds),
+                )
+                outcome = OUTCOME_OK
+                break
+            except Exception as exc:  # noqa: BLE001
+                outcome, retry_after = self._provider_outcome(exc)
+                detail = str(exc)
+                last_error = self._failover_error(route, tried, exc, attempt, outcome)
+            finally:
+                outcome = _guard_outcome(outcome)
+                route.guard.release(probe, outcome, retry_after)
+                route.observe(time.perf_counter() - started, outcome, detail)
+            report_event("http_retry", str(last_error))
+            if route not in tried or not self.router.has_alternative(tried):
+                # Failing over to another endpoint needs no backoff; retrying the same one does.
+                delay = backoff_delay(attempt, retry_after)
+                require_time(delay, "a provider retry")
+                time.sleep(delay)
+        else:
+            if last_error is not None:
+                raise last_error
+            raise RuntimeError("Featherless API request failed without details.")
+
+        return self._completion_text(completion)
+
+    async def _arequest_completion(self, prompt_text: str) -> str:
+        system_prompt = SYSTEM_PROMPT
+        prompt_text, output_tokens = self._fit_prompt_and_output_budget(system_prompt, prompt_text)
 
         last_error: Exception | None = None
+        tried: list[Route] = []
         for attempt in range(self.http_retries + 1):
+            route = self.router.pick(tried)
             try:
-                completion = client.chat.completions.create(
-                    model=self.model,
-                    max_tokens=output_tokens,
-                    temperature=0.25,
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": prompt_text},
-                    ],
+                probe = await route.guard.aacquire()
+            except ProviderUnavailableError as exc:
+                # The breaker opened between pick and acquire; another endpoint may still answer.
+                tried.append(route)
+                if not self.router.has_alternative(tried):
+                    raise
+                last_error = exc
+                continue
+            outcome, retry_after, detail = OUTCOME_CANCELLED, None, None
+            started = time.perf_counter()
+            try:
+                completion = await self._async_openai_client(route).chat.completions.create(
+                    **self._completion_request(route.endpoint.model, system_prompt, prompt_text, output_tokens),
+                    timeout=call_timeout(self.timeout_seconds),
                 )
+                outcome = OUTCOME_OK
                 break
             except Exception as exc:  # noqa: BLE001
-                status_code = getattr(exc, "status_code", None)
-                body = str(exc)
-                if status_code == 403:
-                    raise RuntimeError(
-                        "Featherless returned 403 (unauthorized for this model). "
-                        "This typically means the model is gated and must be unlocked, "
-                        "or it is not available on your current plan. "
-                        f"Model: {self.model}. Response: {body}"
-                    ) from exc
-                if status_code in {429, 500, 502, 503, 504} and attempt < self.http_retries:
-                    time.sleep(0.8 * (2**attempt))
-                    last_error = RuntimeError(f"Featherless API transient HTTP {status_code}: {body}")
-                    continue
-                reason_text = body
-                timeout_like = "timed out" in reason_text.lower()
-                if (timeout_like or attempt < self.http_retries) and attempt < self.http_retries:
-                    time.sleep(0.8 * (2**attempt))
-                    last_error = RuntimeError(f"Featherless API request failed (retrying): {reason_text}")
-                    continue
-                raise RuntimeError(f"Featherless API request failed: {exc}") from exc
+                outcome, retry_after = self._provider_outcome(exc)
+                detail = str(exc)
+                last_error = self._failover_error(route, tried, exc, attempt, outcome)
+            finally:
+                outcome = _guard_outcome(outcome)
+                route.guard.release(probe, outcome, retry_after)
+                route.observe(time.perf_counter() - started, outcome, detail)
+            report_event("http_retry", str(last_error))
+            if route not in tried or not self.router.has_alternative(tried):
+                # Failing over to another endpoint needs no backoff; retrying the same one does.
+                delay = backoff_delay(attempt, retry_after)
+                require_time(delay, "a provider retry")
+                await asyncio.sleep(delay)
         else:
             if last_error is not None:
                 raise last_error
             raise RuntimeError("Featherless API request failed without details.")
 
-        choices = completion.choices
+        return self._completion_text(completion)
+
+    def _completion_request(
+        self, model: str, system_prompt: str, prompt_text: str, output_tokens: int
+    ) -> dict[str, object]:
+        return {
+            "model": model,
+            "max_tokens": output_tokens,
+            "temperature": 0.25,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt_text},
+            ],
+        }
+
+    @staticmethod
+    def _provider_outcome(exc: Exception) -> tuple[str, float | None]:
+        status_code = getattr(exc, "status_code", None)
+        if isinstance(status_code, int):
+            headers = getattr(getattr(exc, "response", None), "headers", None)
+            return status_outcome(status_code), retry_after_seconds(headers)
+        if isinstance(exc, (APITimeoutError, httpx.TimeoutException)) or "timed out" in str(exc).lower():
+            return OUTCOME_TIMEOUT, None
+        if isinstance(exc, (APIConnectionError, httpx.TransportError)):
+            return OUTCOME_UNAVAILABLE, None
+        return OUTCOME_CANCELLED, None
+
+    def _failover_error(
+        self, route: Route, tried: list[Route], exc: Exception, attempt: int, outcome: str
+    ) -> RuntimeError:
+        # A failure of the endpoint moves on to an untried healthy one while attempts remain. A
+        # rejected request would be rejected by every endpoint, so it stays where it is.
+        if outcome in _FAILOVER_OUTCOMES:
+            tried.append(route)
+            if attempt < self.http_retries and self.router.has_alternative(tried):
+                return RuntimeError(f"Featherless endpoint {route.endpoint.name} failed, failing over: {exc}")
+        return self._retryable_error(exc, attempt, route.endpoint.model)
+
+    def _retryable_error(self, exc: Exception, attempt: int, model: str | None = None) -> RuntimeError:
+        # Returns the error to report if retries run out; raises when the failure is final.
+        status_code = getattr(exc, "status_code", None)
+        body = str(exc)
+        if status_code == 403:
+            raise RuntimeError(
+                "Featherless returned 403 (unauthorized for this model). "
+                "This typically means the model is gated and must be unlocked, "
+                "or it is not available on your current plan. "
+                f"Model: {model or self.model}. Response: {body}"
+            ) from exc
+        if status_code in TRANSIENT_STATUS_CODES and attempt < self.http_retries:
+            return RuntimeError(f"Featherless API transient HTTP {status_code}: {body}")
+        timeout_like = "timed out" in body.lower()
+        if (timeout_like or attempt < self.http_retries) and attempt < self.http_retries:
+            return RuntimeError(f"Featherless API request failed (retrying): {body}")
+        raise RuntimeError(f"Featherless API request failed: {exc}") from exc
+
+    @staticmethod
+    def _completion_text(completion: object) -> str:
+        choices = getattr(completion, "choices", None)
         if not choices:
             raise RuntimeError("Featherless API returned no choices.")
         content = choices[0].message.content
@@ -557,32 +1100,69 @@ class FeatherlessPlanGenerator(GeminiPlanGenerator):
             raise RuntimeError("Featherless API returned empty content.")
         return str(content)
 
-    @staticmethod
-    def _estimate_tokens(text: str) -> int:
-        # Fast approximation for budgeting that works across providers.
-        return max(1, (len(text) + 3) // 4)
+    def _openai_client(self, route: Route) -> OpenAI:
+        # One long-lived client per endpoint keeps TLS connections alive across calls.
+        with self._client_lock:
+            client = self._clients.get(route.endpoint.name)
+            if client is None:
+                client = OpenAI(
+                    base_url=route.endpoint.base_url,
+                    api_key=route.endpoint.api_key,
+                    timeout=self.timeout_seconds,
+                    max_retries=0,
+                    http_client=httpx.Client(
+                        limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                    ),
+                )
+                self._clients[route.endpoint.name] = client
+            return client
 
-    def _fit_prompt_and_output_budget(self, system_prompt: str, prompt_text: str) -> tuple[str, int]:
-        min_output_tokens = 512
-        reserved_tokens = 128
-        max_input_tokens = self.context_window - min_output_tokens - reserved_tokens
+    def _async_openai_client(self, route: Route) -> AsyncOpenAI:
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            clients = self._async_openai_clients.setdefault(loop, {})
+            client = clients.get(route.endpoint.name)
+            if client is None:
+                client = AsyncOpenAI(
+                    base_url=route.endpoint.base_url,
+                    api_key=route.endpoint.api_key,
+                    timeout=self.timeout_seconds,
+                    max_retries=0,
+                    http_client=httpx.AsyncClient(
+                        limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                    ),
+                )
+                clients[route.endpoint.name] = client
+            return client
 
+    def _estimate_tokens(self, text: str) -> int:
+        return self.token_counter.count(text)
+
+    def _max_input_tokens(self) -> int:
+        max_input_tokens = self.context_window - MIN_OUTPUT_TOKENS - RESERVED_TOKENS
         if max_input_tokens <= 0:
             raise RuntimeError(
                 "Invalid context window configuration. Increase FEATHERLESS_CONTEXT_WINDOW "
                 "or reduce FEATHERLESS_MAX_TOKENS."
             )
+        return max_input_tokens
+
+    def _fit_code_context(self, code: str, query: str, surrounding: str) -> str:
+        code = super()._fit_code_context(code, query, surrounding)
+        budget = self._max_input_tokens() - self._estimate_tokens(f"{SYSTEM_PROMPT}\n{surrounding}")
+        return truncate_js(code, max(0, budget), self._estimate_tokens, query=query)
 
-        combined = f"{system_prompt}\n{prompt_text}"
-        combined_tokens = self._estimate_tokens(combined)
+    def _fit_prompt_and_output_budget(self, system_prompt: str, prompt_text: str) -> tuple[str, int]:
+        max_input_tokens = self._max_input_tokens()
+        combined_tokens = self._estimate_tokens(f"{system_prompt}\n{prompt_text}")
         if combined_tokens > max_input_tokens:
-            prompt_budget_chars = max(800, max_input_tokens * 4 - len(system_prompt) - 1)
-            prompt_text = self._truncate_context(prompt_text, max_chars=prompt_budget_chars)
-            combined = f"{system_prompt}\n{prompt_text}"
-            combined_tokens = self._estimate_tokens(combined)
+            # Code prompts are already fitted through _fit_code_context; this is the blunt fallback.
+            prompt_budget = max_input_tokens - self._estimate_tokens(f"{system_prompt}\n")
+            prompt_text = truncate_middle(prompt_text, max(1, prompt_budget), self._estimate_tokens)
+            combined_tokens = self._estimate_tokens(f"{system_prompt}\n{prompt_text}")
 
-        available_output = self.context_window - combined_tokens - reserved_tokens
-        if available_output < min_output_tokens:
+        available_output = self.context_window - combined_tokens - RESERVED_TOKENS
+        if available_output < MIN_OUTPUT_TOKENS:
             raise RuntimeError(
                 "Prompt is too large for model context window after truncation. "
                 "Reduce prompt size or FEATHERLESS_CONTEXT_CHARS."
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import bisect
+import math
+import re
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Prometheus text exposition format 0.0.4, without a client library. Label children are created
+# once and cached, so the hot path is a dict lookup plus a short locked update.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+_REASON_SEPARATORS = re.compile(r"\s\(|:\s|\n")
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "buckets", "sum", "count", "_lock")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.buckets[index] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._children: dict[tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: object):
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {key}")
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self) -> object:
+        raise NotImplementedError
+
+    def samples(self) -> Iterable[tuple[str, tuple[tuple[str, str], ...], float]]:
+        raise NotImplementedError
+
+    def _label_pairs(self, key: tuple[str, ...]) -> tuple[tuple[str, str], ...]:
+        return tuple(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def samples(self) -> Iterable[tuple[str, tuple[tuple[str, str], ...], float]]:
+        for key, child in list(self._children.items()):
+            yield f"{self.name}_total", self._label_pairs(key), child.value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets))
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.bounds)
+
+    def samples(self) -> Iterable[tuple[str, tuple[tuple[str, str], ...], float]]:
+        for key, child in list(self._children.items()):
+            pairs = self._label_pairs(key)
+            with child._lock:
+                buckets, total, count = list(child.buckets), child.sum, child.count
+            cumulative = 0
+            for bound, hits in zip((*self.bounds, math.inf), buckets):
+                cumulative += hits
+                yield f"{self.name}_bucket", (*pairs, ("le", _format_value(bound))), cumulative
+            yield f"{self.name}_sum", pairs, total
+            yield f"{self.name}_count", pairs, count
+
+
+class CallbackGauge(_Metric):
+    # Sampled at scrape time, for values another component already tracks (queue depth, in-flight).
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...],
+        collect: Callable[[], Iterable[tuple[tuple[str, ...], float]]],
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def samples(self) -> Iterable[tuple[str, tuple[tuple[str, str], ...], float]]:
+        for key, value in self.collect():
+            yield self.name, self._label_pairs(tuple(str(part) for part in key)), value
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        # Re-registering a name replaces the old metric (a rebuilt JobService re-binds its gauges).
+        with self._lock:
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: list[str] = []
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as exc:  # noqa: BLE001
+                lines.append(f"# {metric.name} collection failed: {_escape(str(exc))}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, pairs, value in samples:
+                labels = ",".join(f'{key}="{_escape(str(label))}"' for key, label in pairs)
+                lines.append(f"{name}{{{labels}}} {_format_value(value)}" if labels else f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0", registry: MetricsRegistry | None = None) -> ThreadingHTTPServer:
+    # Workers have no HTTP app of their own; this exposes their registry for scraping.
+    source = registry if registry is not None else REGISTRY
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:  # noqa: N802
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = source.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def failure_reason(error: str) -> str:
+    # Bounded label values: "forbidden:\bfetch\s*\( (line 3, column 5)" -> "forbidden:\bfetch\s*\(",
+    # "syntax:SyntaxError: ..." -> "syntax", "frame_budget: p95 ..." -> "frame_budget".
+    head = _REASON_SEPARATORS.split(error, maxsplit=1)[0]
+    if head.startswith("syntax:"):
+        return "syntax"
+    return head[:80]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+
+JOB_STAGE_SECONDS = REGISTRY.register(
+    Histogram("ggen_job_stage_duration_seconds", "Time jobs spend in each stage, queueing included.", ("stage",))
+)
+JOB_SECONDS = REGISTRY.register(
+    Histogram("ggen_job_duration_seconds", "Time from job creation to a final status.", ("status",))
+)
+LLM_CALL_SECONDS = REGISTRY.register(
+    Histogram(
+        "ggen_llm_call_duration_seconds",
+        "Latency of provider calls, HTTP retries included.",
+        ("generator", "model", "prompt", "outcome"),
+    )
+)
+VALIDATION_SECONDS = REGISTRY.register(
+    Histogram("ggen_validation_duration_seconds", "Time spent validating generated output.", ("kind",), FAST_BUCKETS)
+)
+NODE_CHECK_SECONDS = REGISTRY.register(
+    Histogram("ggen_node_check_duration_seconds", "Node syntax check round trips.", (), FAST_BUCKETS)
+)
+SIMULATION_SECONDS = REGISTRY.register(
+    Histogram("ggen_simulation_duration_seconds", "Headless simulation runs.", ())
+)
+GENERATOR_EVENTS = REGISTRY.register(
+    Counter(
+        "ggen_generator_events",
+        "Pipeline events by kind (http_retry, plan_repair, code_repair, code_patch, fast_path, ...).",
+        ("kind",),
+    )
+)
+JOBS_COALESCED = REGISTRY.register(
+    Counter("ggen_jobs_coalesced", "Jobs attached to an identical in-flight job instead of running their own.", ())
+)
+JOBS_THROTTLED = REGISTRY.register(
+    Counter("ggen_jobs_throttled", "Job submissions rejected by a client's rate limit.", ())
+)
+VALIDATION_FAILURES = REGISTRY.register(
+    Counter("ggen_validation_failures", "Validation failures by stage and reason.", ("stage", "reason"))
+)
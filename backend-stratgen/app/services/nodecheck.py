@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import json
+import os
+import queue
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+
+from app.services.metrics import NODE_CHECK_SECONDS
+
+# Reads one JSON request per line ({"id", "source", "filename"}) and answers with one JSON line.
+# vm.Script only compiles the source, so nothing from the generated module is ever executed.
+_WORKER_SCRIPT = r"""
+const vm = require('vm');
+const readline = require('readline');
+const rl = readline.createInterface({ input: process.stdin, terminal: false });
+rl.on('line', (line) => {
+  let request;
+  try {
+    request = JSON.parse(line);
+  } catch (error) {
+    return;
+  }
+  const reply = { id: request.id, ok: true };
+  try {
+    new vm.Script(request.source, { filename: request.filename });
+  } catch (error) {
+    reply.ok = false;
+    reply.name = error && error.name ? error.name : 'Error';
+    reply.message = error && error.message ? error.message : String(error);
+    const stack = String((error && error.stack) || '');
+    const location = stack.match(/^[^\n]*:(\d+)\n([^\n]*)\n(\s*)\^/);
+    if (location) {
+      reply.line = Number(location[1]);
+      reply.column = location[3].length + 1;
+      reply.excerpt = location[2];
+    }
+  }
+  process.stdout.write(JSON.stringify(reply) + '\n');
+});
+rl.on('close', () => process.exit(0));
+"""
+
+EXCERPT_RADIUS = 80
+
+_NODE_CHECK_LOCATION = re.compile(r":(\d+)\n([^\n]*)\n(\s*)\^")
+
+
+@dataclass(slots=True)
+class SyntaxCheckResult:
+    ok: bool
+    message: str = ""
+    line: int | None = None
+    column: int | None = None
+    excerpt: str = ""
+
+    def describe(self) -> str:
+        if self.ok:
+            return ""
+        if self.line is None:
+            return self.message
+        detail = f"{self.message} (line {self.line}, column {self.column})"
+        if self.excerpt:
+            # Keep minified one-line sources from flooding repair prompts.
+            offset = max(0, (self.column or 1) - 1)
+            start = max(0, offset - EXCERPT_RADIUS)
+            excerpt = self.excerpt[start : offset + EXCERPT_RADIUS]
+            detail = f"{detail}\n{excerpt}\n{' ' * (offset - start)}^"
+        return detail
+
+
+class _NodeWorker:
+    def __init__(self, node_bin: str):
+        self.process = subprocess.Popen(
+            [node_bin, "-e", _WORKER_SCRIPT],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        self.replies: queue.Queue[str | None] = queue.Queue()
+        self._next_id = 0
+        threading.Thread(target=self._read_replies, name="node-check-reader", daemon=True).start()
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def check(self, source: str, filename: str, timeout_seconds: float) -> SyntaxCheckResult:
+        self._next_id += 1
+        request_id = self._next_id
+        assert self.process.stdin is not None
+        self.process.stdin.write(json.dumps({"id": request_id, "source": source, "filename": filename}) + "\n")
+        self.process.stdin.flush()
+        while True:
+            line = self.replies.get(timeout=timeout_seconds)
+            if line is None:
+                raise BrokenPipeError("Node syntax-check worker exited.")
+            reply = json.loads(line)
+            if reply.get("id") == request_id:
+                break
+        if reply["ok"]:
+            return SyntaxCheckResult(ok=True)
+        return SyntaxCheckResult(
+            ok=False,
+            message=f"{reply.get('name', 'SyntaxError')}: {reply.get('message', '')}",
+            line=reply.get("line"),
+            column=reply.get("column"),
+            excerpt=reply.get("excerpt", ""),
+        )
+
+    def close(self) -> None:
+        try:
+            if self.process.stdin is not None:
+                self.process.stdin.close()
+            self.process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.wait()
+
+    def _read_replies(self) -> None:
+        assert self.process.stdout is not None
+        for line in self.process.stdout:
+            self.replies.put(line)
+        self.replies.put(None)
+
+
+class NodeSyntaxChecker:
+    def __init__(self, pool_size: int = 2, timeout_seconds: float = 10.0, node_bin: str | None = None):
+        self.pool_size = max(1, pool_size)
+        self.timeout_seconds = timeout_seconds
+        self.node_bin = node_bin or shutil.which("node")
+        self._idle: queue.LifoQueue[_NodeWorker] = queue.LifoQueue()
+        self._spawned = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    @property
+    def available(self) -> bool:
+        return self.node_bin is not None
+
+    def check(self, source: str, filename: str = "generated.js") -> SyntaxCheckResult | None:
+        # None means Node is not installed, so callers skip the syntax check as before.
+        if self.node_bin is None:
+            return None
+        with NODE_CHECK_SECONDS.labels().time():
+            return self._check(source, filename)
+
+    def _check(self, source: str, filename: str) -> SyntaxCheckResult:
+        worker = self._acquire()
+        try:
+            result = worker.check(source, filename, self.timeout_seconds)
+        except queue.Empty:
+            worker.kill()
+            self._discard()
+            return SyntaxCheckResult(ok=False, message=f"Syntax check timed out after {self.timeout_seconds:g}s")
+        except (OSError, ValueError):
+            # The worker died mid-check; replace it and answer this one with a one-off `node --check`.
+            worker.kill()
+            self._discard()
+            return self._check_once(source, filename)
+        self._release(worker)
+        return result
+
+    def check_file(self, path: Path) -> SyntaxCheckResult | None:
+        return self.check(path.read_text(encoding="utf-8"), filename=str(path))
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            worker.close()
+            with self._lock:
+                self._spawned -= 1
+
+    def _acquire(self) -> _NodeWorker:
+        while True:
+            with self._lock:
+                can_spawn = self._idle.empty() and self._spawned < self.pool_size
+                if can_spawn:
+                    self._spawned += 1
+            if can_spawn:
+                try:
+                    return _NodeWorker(self.node_bin)
+                except OSError:
+                    with self._lock:
+                        self._spawned -= 1
+                    raise
+            try:
+                # Short waits so a slot freed by a dead worker is noticed without a wakeup.
+                worker = self._idle.get(timeout=0.05)
+            except queue.Empty:
+                continue
+            if worker.alive:
+                return worker
+            self._discard()
+
+    def _release(self, worker: _NodeWorker) -> None:
+        with self._lock:
+            closed = self._closed
+        if closed:
+            worker.close()
+            self._discard()
+            return
+        self._idle.put(worker)
+
+    def _discard(self) -> None:
+        with self._lock:
+            self._spawned -= 1
+
+    def _check_once(self, source: str, filename: str) -> SyntaxCheckResult:
+        assert self.node_bin is not None
+        with tempfile.NamedTemporaryFile("w", suffix=".js", delete=False, encoding="utf-8") as tmp:
+            tmp.write(source)
+            tmp_path = tmp.name
+        try:
+            check = subprocess.run(
+                [self.node_bin, "--check", tmp_path],
+                capture_output=True,
+                text=True,
+                timeout=self.timeout_seconds,
+            )
+        except subprocess.TimeoutExpired:
+            return SyntaxCheckResult(ok=False, message=f"Syntax check timed out after {self.timeout_seconds:g}s")
+        finally:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        if check.returncode == 0:
+            return SyntaxCheckResult(ok=True)
+        detail = (check.stderr or check.stdout).strip().replace(tmp_path, filename)
+        location = _NODE_CHECK_LOCATION.search(detail)
+        message = next((line for line in detail.splitlines() if "Error" in line), detail)
+        if location is None:
+            return SyntaxCheckResult(ok=False, message=message)
+        return SyntaxCheckResult(
+            ok=False,
+            message=message,
+            line=int(location.group(1)),
+            column=len(location.group(3)) + 1,
+            excerpt=location.group(2),
+        )
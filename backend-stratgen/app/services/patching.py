@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+_BLOCK = re.compile(
+    r"^<{5,9} ?SEARCH[^\n]*\n(?P<search>.*?)^={5,9}[ \t]*\n(?P<replace>.*?)^>{5,9} ?REPLACE[^\n]*$",
+    re.DOTALL | re.MULTILINE,
+)
+_ERROR_LINE = re.compile(r"\bline (\d+)")
+
+# Context lines shown around each error location in patch prompts.
+EXCERPT_RADIUS = 8
+# Above this share of the module, excerpts save little and the model loses context; send it all.
+FULL_SOURCE_RATIO = 0.6
+
+
+class PatchApplyError(ValueError):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class SearchReplaceBlock:
+    search: str
+    replace: str
+
+
+def parse_search_replace(text: str) -> list[SearchReplaceBlock]:
+    return [SearchReplaceBlock(match.group("search"), match.group("replace")) for match in _BLOCK.finditer(text)]
+
+
+def apply_search_replace(source: str, blocks: list[SearchReplaceBlock]) -> str:
+    if not blocks:
+        raise PatchApplyError("no SEARCH/REPLACE blocks in the reply")
+    for index, block in enumerate(blocks, start=1):
+        source = _apply_block(source, block, index)
+    return source
+
+
+def _apply_block(source: str, block: SearchReplaceBlock, index: int) -> str:
+    if not block.search.strip():
+        raise PatchApplyError(f"block {index} has an empty SEARCH section")
+    # Exact matches only count at line starts, so a SEARCH that dropped its indentation is not
+    # spliced into the middle of a line.
+    offsets = [
+        match.start()
+        for match in re.finditer(re.escape(block.search), source)
+        if match.start() == 0 or source[match.start() - 1] == "\n"
+    ]
+    if len(offsets) == 1:
+        offset = offsets[0]
+        return source[:offset] + block.replace + source[offset + len(block.search) :]
+    if len(offsets) > 1:
+        raise PatchApplyError(f"block {index} SEARCH text matches {len(offsets)} places")
+
+    # Models often get indentation or trailing whitespace slightly wrong; match line-by-line on
+    # stripped text and accept it only when that is still unambiguous.
+    lines = source.splitlines(keepends=True)
+    needle = [line.strip() for line in block.search.strip("\n").splitlines()]
+    stripped = [line.strip() for line in lines]
+    span = len(needle)
+    starts = [start for start in range(len(lines) - span + 1) if stripped[start : start + span] == needle]
+    if len(starts) != 1:
+        reason = "is not in the code" if not starts else f"matches {len(starts)} places"
+        raise PatchApplyError(f"block {index} SEARCH text {reason}")
+    start = starts[0]
+    replacement = block.replace
+    if replacement and not replacement.endswith("\n") and start + span < len(lines):
+        replacement += "\n"
+    return "".join(lines[:start]) + replacement + "".join(lines[start + span :])
+
+
+def error_lines(errors: list[str]) -> list[int]:
+    return sorted({int(match.group(1)) for error in errors for match in _ERROR_LINE.finditer(error)})
+
+
+def numbered_excerpt(source: str, errors: list[str], radius: int = EXCERPT_RADIUS) -> tuple[str, bool]:
+    # Returns (line-numbered text, whether it is the whole module).
+    lines = source.splitlines()
+    locations = [line for line in error_lines(errors) if 1 <= line <= len(lines)]
+    ranges: list[list[int]] = []
+    for line in locations:
+        start, end = max(1, line - radius), min(len(lines), line + radius)
+        if ranges and start <= ranges[-1][1] + 1:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+    shown = sum(end - start + 1 for start, end in ranges)
+    if not ranges or shown > len(lines) * FULL_SOURCE_RATIO:
+        ranges = [[1, len(lines)]]
+    width = len(str(len(lines)))
+    chunks = [
+        "\n".join(f"{number:>{width}}| {lines[number - 1]}" for number in range(start, end + 1))
+        for start, end in ranges
+    ]
+    return "\n...\n".join(chunks), ranges == [[1, len(lines)]]
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+from app.models import GamePlan
+
+# Plan fields the scene module reads from the injected PLAN object at runtime. Changing only these
+# needs a rebuild of game.js, not new code. Archetype `movement` is not here: the code branches on it.
+DATA_FIELDS = (
+    r"title",
+    r"player\.(speed|radius|color|health)",
+    r"difficulty\.\w+",
+    r"physics_rules\.\w+",
+    r"enemy_archetypes\[[^\]]+\]\.(speed|radius|color|count)",
+    r"ui_text\.[^.]+",
+)
+_DATA_FIELD = re.compile("|".join(f"(?:{pattern})" for pattern in DATA_FIELDS))
+
+_MISSING = object()
+
+
+@dataclass(frozen=True, slots=True)
+class PlanChange:
+    path: str
+    before: object
+    after: object
+
+    @property
+    def data_only(self) -> bool:
+        # Added or removed keys (a new ui_text entry, a new archetype) need code that uses them.
+        return self.before is not _MISSING and self.after is not _MISSING and bool(_DATA_FIELD.fullmatch(self.path))
+
+
+def diff_plans(before: GamePlan, after: GamePlan) -> list[PlanChange]:
+    changes: list[PlanChange] = []
+    _diff(before.model_dump(mode="json"), after.model_dump(mode="json"), "", changes)
+    return changes
+
+
+def is_data_only(changes: list[PlanChange]) -> bool:
+    return bool(changes) and all(change.data_only for change in changes)
+
+
+def describe_changes(changes: list[PlanChange], limit: int = 6) -> str:
+    paths = [change.path for change in changes[:limit]]
+    if len(changes) > limit:
+        paths.append(f"+{len(changes) - limit} more")
+    return ", ".join(paths)
+
+
+def _diff(before: object, after: object, path: str, changes: list[PlanChange]) -> None:
+    if isinstance(before, dict) and isinstance(after, dict):
+        for key in dict.fromkeys([*before, *after]):
+            _diff(before.get(key, _MISSING), after.get(key, _MISSING), _join(path, key), changes)
+    elif isinstance(before, list) and isinstance(after, list) and _keyed(before) and _keyed(after):
+        # Archetypes and scene objects are matched by id rather than position.
+        before_items = {item["id"]: item for item in before}
+        after_items = {item["id"]: item for item in after}
+        for key in dict.fromkeys([*before_items, *after_items]):
+            _diff(before_items.get(key, _MISSING), after_items.get(key, _MISSING), f"{path}[{key}]", changes)
+    elif before != after:
+        changes.append(PlanChange(path, before, after))
+
+
+def _keyed(items: list[object]) -> bool:
+    ids = [item.get("id") for item in items if isinstance(item, dict)]
+    return len(ids) == len(items) and len(set(ids)) == len(ids) and all(isinstance(value, str) for value in ids)
+
+
+def _join(path: str, key: str) -> str:
+    return f"{path}.{key}" if path else key
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Protocol
+
+from app.services.scheduler import LANES
+from app.services.store import add_column
+
+
+@dataclass(slots=True)
+class JobLease:
+    job_id: str
+    lane: str
+    worker_id: str
+    token: str
+    attempts: int
+    expires_at: float
+    client_id: str = ""
+
+
+class JobQueue(Protocol):
+    def enqueue(self, job_id: str, lane: str, client_id: str = "", weight: float = 1.0) -> None:
+        ...
+
+    def enqueue_many(self, items: Sequence[tuple[str, str, str, float]], max_queued: int) -> bool:
+        ...
+
+    def lease(self, worker_id: str, lease_seconds: float) -> JobLease | None:
+        ...
+
+    def heartbeat(self, lease: JobLease, lease_seconds: float) -> bool:
+        ...
+
+    def complete(self, lease: JobLease) -> None:
+        ...
+
+    def release(self, lease: JobLease) -> None:
+        ...
+
+    def reclaim_expired(self) -> int:
+        ...
+
+    def depth(self) -> dict[str, int]:
+        ...
+
+
+class SqliteJobQueue:
+    def __init__(self, db_path: Path, busy_timeout_ms: int = 5000):
+        self.db_path = db_path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_schema()
+
+    def enqueue(self, job_id: str, lane: str, client_id: str = "", weight: float = 1.0) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO job_queue (job_id, lane, enqueued_at, client_id, weight) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET lane = excluded.lane, leased_by = NULL, "
+                "lease_token = NULL, lease_expires_at = NULL",
+                (job_id, lane, time.time(), client_id, weight),
+            )
+
+    def enqueue_many(self, items: Sequence[tuple[str, str, str, float]], max_queued: int) -> bool:
+        # (job_id, lane, client_id, weight) rows, queued all together or, when they would take the
+        # queue past `max_queued` waiting jobs, not at all. The count and the inserts share one write
+        # transaction, so concurrent batches cannot both squeeze in.
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            (queued,) = conn.execute(
+                "SELECT COUNT(*) FROM job_queue WHERE leased_by IS NULL OR lease_expires_at < ?",
+                (now,),
+            ).fetchone()
+            if queued + len(items) > max_queued:
+                conn.execute("ROLLBACK")
+                return False
+            conn.executemany(
+                "INSERT INTO job_queue (job_id, lane, enqueued_at, client_id, weight) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET lane = excluded.lane, leased_by = NULL, "
+                "lease_token = NULL, lease_expires_at = NULL",
+                # Distinct timestamps keep the batch in order for lease().
+                [
+                    (job_id, lane, now + index * 1e-6, client_id, weight)
+                    for index, (job_id, lane, client_id, weight) in enumerate(items)
+                ],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return True
+
+    def lease(self, worker_id: str, lease_seconds: float) -> JobLease | None:
+        now = time.time()
+        token = uuid.uuid4().hex
+        conn = self._connection()
+        # BEGIN IMMEDIATE takes the write lock up front so two workers cannot claim the same row.
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # The client holding the fewest leases per unit of weight goes first, oldest job first,
+            # so one client's backlog cannot keep every worker busy while others wait.
+            row = conn.execute(
+                "SELECT q.job_id, q.lane, q.attempts, q.client_id FROM job_queue q "
+                "WHERE q.leased_by IS NULL OR q.lease_expires_at < ? "
+                "ORDER BY (SELECT COUNT(*) FROM job_queue a WHERE a.client_id = q.client_id "
+                "AND a.leased_by IS NOT NULL AND a.lease_expires_at >= ?) / q.weight, q.enqueued_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            job_id, lane, attempts, client_id = row
+            expires_at = now + lease_seconds
+            conn.execute(
+                "UPDATE job_queue SET leased_by = ?, lease_token = ?, lease_expires_at = ?, attempts = attempts + 1 "
+                "WHERE job_id = ?",
+                (worker_id, token, expires_at, job_id),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return JobLease(
+            job_id=job_id,
+            lane=lane,
+            worker_id=worker_id,
+            token=token,
+            attempts=attempts + 1,
+            expires_at=expires_at,
+            client_id=client_id,
+        )
+
+    def heartbeat(self, lease: JobLease, lease_seconds: float) -> bool:
+        expires_at = time.time() + lease_seconds
+        conn = self._connection()
+        with conn:
+            updated = conn.execute(
+                "UPDATE job_queue SET lease_expires_at = ? WHERE job_id = ? AND lease_token = ?",
+                (expires_at, lease.job_id, lease.token),
+            ).rowcount
+        if updated:
+            lease.expires_at = expires_at
+        return bool(updated)
+
+    def complete(self, lease: JobLease) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "DELETE FROM job_queue WHERE job_id = ? AND lease_token = ?",
+                (lease.job_id, lease.token),
+            )
+
+    def release(self, lease: JobLease) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "UPDATE job_queue SET leased_by = NULL, lease_token = NULL, lease_expires_at = NULL, "
+                "attempts = MAX(attempts - 1, 0) WHERE job_id = ? AND lease_token = ?",
+                (lease.job_id, lease.token),
+            )
+
+    def reclaim_expired(self) -> int:
+        conn = self._connection()
+        with conn:
+            return conn.execute(
+                "UPDATE job_queue SET leased_by = NULL, lease_token = NULL, lease_expires_at = NULL "
+                "WHERE leased_by IS NOT NULL AND lease_expires_at < ?",
+                (time.time(),),
+            ).rowcount
+
+    def depth(self) -> dict[str, int]:
+        counts = {lane: 0 for lane in LANES}
+        counts["leased"] = 0
+        rows = self._connection().execute(
+            "SELECT lane, leased_by IS NOT NULL AND lease_expires_at >= ?, COUNT(*) FROM job_queue GROUP BY 1, 2",
+            (time.time(),),
+        ).fetchall()
+        for lane, leased, count in rows:
+            if leased:
+                counts["leased"] += count
+            else:
+                counts[lane] = counts.get(lane, 0) + count
+        return counts
+
+    def _init_schema(self) -> None:
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS job_queue ("
+                "job_id TEXT PRIMARY KEY, "
+                "lane TEXT NOT NULL, "
+                "enqueued_at REAL NOT NULL, "
+                "leased_by TEXT, "
+                "lease_token TEXT, "
+                "lease_expires_at REAL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "client_id TEXT NOT NULL DEFAULT '', "
+                "weight REAL NOT NULL DEFAULT 1.0)"
+            )
+            add_column(conn, "job_queue", "client_id TEXT NOT NULL DEFAULT ''")
+            add_column(conn, "job_queue", "weight REAL NOT NULL DEFAULT 1.0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_job_queue_enqueued_at ON job_queue (enqueued_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_job_queue_lease_expires_at ON job_queue (lease_expires_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_job_queue_client_id ON job_queue (client_id)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # Autocommit mode so lease() can issue its own BEGIN IMMEDIATE.
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
@@ -0,0 +1,371 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from collections.abc import Mapping
+from email.utils import parsedate_to_datetime
+
+from app.services.metrics import REGISTRY, CallbackGauge
+
+# Outcomes of one provider request, as seen by the limiter and the breaker.
+OUTCOME_OK = "ok"
+OUTCOME_OVERLOADED = "overloaded"  # 429: the provider is up but wants less traffic
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_UNAVAILABLE = "unavailable"  # 5xx or no connection
+OUTCOME_REJECTED = "rejected"  # any other 4xx: says nothing about provider health
+OUTCOME_CANCELLED = "cancelled"
+
+_SHRINKS = {OUTCOME_OVERLOADED, OUTCOME_TIMEOUT, OUTCOME_UNAVAILABLE}
+_BREAKS = {OUTCOME_TIMEOUT, OUTCOME_UNAVAILABLE}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+MAX_RETRY_AFTER_SECONDS = 300.0
+
+
+class ProviderUnavailableError(RuntimeError):
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def status_outcome(status_code: int) -> str:
+    if status_code == 429:
+        return OUTCOME_OVERLOADED
+    if status_code >= 500:
+        return OUTCOME_UNAVAILABLE
+    return OUTCOME_REJECTED
+
+
+def retry_after_seconds(headers: Mapping[str, str] | None) -> float | None:
+    # Retry-After is either delay-seconds or an HTTP date.
+    value = headers.get("retry-after") if headers is not None else None
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    if math.isnan(seconds):
+        return None
+    return min(MAX_RETRY_AFTER_SECONDS, max(0.0, seconds))
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None, base: float = 0.8, cap: float = 20.0) -> float:
+    # Full jitter, so callers that failed together do not retry together; never sooner than asked.
+    delay = random.uniform(0, min(cap, base * 2**attempt))
+    return max(delay, retry_after) if retry_after is not None else delay
+
+
+class _Waiter:
+    __slots__ = ("event", "loop", "future", "granted")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop | None = None):
+        self.loop = loop
+        self.future: asyncio.Future[None] | None = loop.create_future() if loop is not None else None
+        self.event = threading.Event() if loop is None else None
+        self.granted = False
+
+    def grant(self) -> bool:
+        if self.event is not None:
+            self.event.set()
+        else:
+            try:
+                self.loop.call_soon_threadsafe(_resolve, self.future)
+            except RuntimeError:
+                # The waiting loop has closed; nobody is left to use the slot.
+                return False
+        self.granted = True
+        return True
+
+
+def _resolve(future: asyncio.Future[None]) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class AimdLimiter:
+    # Additive increase (about +1 per `limit` successes), multiplicative decrease on overload. One
+    # burst of failures only shrinks the limit once: decreases are spaced by `decrease_interval`.
+    # Waiters are served in arrival order, threads and coroutines alike.
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff_ratio: float = 0.5,
+        decrease_interval: float = 1.0,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.backoff_ratio = min(0.95, max(0.05, backoff_ratio))
+        self.decrease_interval = decrease_interval
+        self._limit = float(min(self.max_limit, max(self.min_limit, initial_limit)))
+        self._in_flight = 0
+        self._waiters: deque[_Waiter] = deque()
+        self._resume_at = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> None:
+        hold = self.hold_remaining()
+        while hold > 0:
+            time.sleep(hold)
+            hold = self.hold_remaining()
+        with self._lock:
+            if not self._waiters and self._in_flight < self.limit:
+                self._in_flight += 1
+                return
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+        waiter.event.wait()
+
+    async def aacquire(self) -> None:
+        hold = self.hold_remaining()
+        while hold > 0:
+            await asyncio.sleep(hold)
+            hold = self.hold_remaining()
+        with self._lock:
+            if not self._waiters and self._in_flight < self.limit:
+                self._in_flight += 1
+                return
+            waiter = _Waiter(asyncio.get_running_loop())
+            self._waiters.append(waiter)
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter.granted:
+                    self._in_flight -= 1
+                    self._grant_locked()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+    def release(self, outcome: str) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._in_flight -= 1
+            if outcome == OUTCOME_OK:
+                self._limit = min(float(self.max_limit), self._limit + 1 / self._limit)
+            elif outcome in _SHRINKS and now - self._last_decrease >= self.decrease_interval:
+                self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+                self._last_decrease = now
+            self._grant_locked()
+
+    def hold(self, seconds: float) -> None:
+        # A provider-wide Retry-After: nobody starts a request before it has passed.
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def hold_remaining(self) -> float:
+        return max(0.0, self._resume_at - time.monotonic())
+
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _grant_locked(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            if self._waiters.popleft().grant():
+                self._in_flight += 1
+
+
+class CircuitBreaker:
+    # Opens after `failure_threshold` consecutive failures; after `reset_seconds` one probe is let
+    # through. A failed probe reopens it for twice as long, up to `max_reset_seconds`.
+    def __init__(self, failure_threshold: int = 5, reset_seconds: float = 30.0, max_reset_seconds: float = 300.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.max_reset_seconds = max(reset_seconds, max_reset_seconds)
+        self._state = CLOSED
+        self._failures = 0
+        self._open_seconds = reset_seconds
+        self._opened_at = 0.0
+        self._probing = False
+        self.opens = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self._current_state() != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self._open_seconds - time.monotonic())
+
+    def allow(self) -> str | None:
+        # CLOSED for a normal request, HALF_OPEN for the probe, None when the request must not go out.
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return CLOSED
+            if state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return HALF_OPEN
+            return None
+
+    def record(self, outcome: str, probe: bool = False) -> None:
+        with self._lock:
+            if probe:
+                self._probing = False
+            if outcome in _BREAKS:
+                self._failures += 1
+                if probe:
+                    self._open(min(self.max_reset_seconds, self._open_seconds * 2))
+                elif self._state == CLOSED and self._failures >= self.failure_threshold:
+                    self._open(self.reset_seconds)
+            elif outcome in (OUTCOME_OK, OUTCOME_OVERLOADED, OUTCOME_REJECTED):
+                # Any answer from the provider proves it is reachable.
+                self._failures = 0
+                if self._state != CLOSED:
+                    self._state = CLOSED
+                    self._open_seconds = self.reset_seconds
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "opens": self.opens,
+            "retry_in_seconds": round(self.retry_in(), 2),
+        }
+
+    def _open(self, seconds: float) -> None:
+        self._state = OPEN
+        self._open_seconds = seconds
+        self._opened_at = time.monotonic()
+        self.opens += 1
+
+    def _current_state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self._open_seconds:
+            self._state = HALF_OPEN
+        return self._state
+
+
+class ProviderGuard:
+    # Wraps every HTTP attempt to one provider: breaker check, Retry-After hold, a limiter slot,
+    # then `release` with the outcome. While the breaker is open calls fail at once, or wait up to
+    # `breaker_wait_seconds` for the next probe.
+    def __init__(
+        self,
+        name: str,
+        limiter: AimdLimiter | None = None,
+        breaker: CircuitBreaker | None = None,
+        breaker_wait_seconds: float = 0.0,
+    ):
+        self.name = name
+        self.limiter = limiter if limiter is not None else AimdLimiter()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.breaker_wait_seconds = breaker_wait_seconds
+        _GUARDS.add(self)
+
+    def acquire(self) -> bool:
+        # Returns whether this request is the breaker's probe; pass it back to `release`.
+        deadline = time.monotonic() + self.breaker_wait_seconds
+        while (admitted := self.breaker.allow()) is None:
+            time.sleep(self._breaker_wait(deadline))
+        self.limiter.acquire()
+        return admitted == HALF_OPEN
+
+    async def aacquire(self) -> bool:
+        deadline = time.monotonic() + self.breaker_wait_seconds
+        while (admitted := self.breaker.allow()) is None:
+            await asyncio.sleep(self._breaker_wait(deadline))
+        try:
+            await self.limiter.aacquire()
+        except asyncio.CancelledError:
+            self.breaker.record(OUTCOME_CANCELLED, probe=admitted == HALF_OPEN)
+            raise
+        return admitted == HALF_OPEN
+
+    def release(self, probe: bool, outcome: str, retry_after: float | None = None) -> None:
+        if retry_after:
+            self.limiter.hold(retry_after)
+        self.limiter.release(outcome)
+        self.breaker.record(outcome, probe=probe)
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "name": self.name,
+            "limit": self.limiter.limit,
+            "min_limit": self.limiter.min_limit,
+            "max_limit": self.limiter.max_limit,
+            "in_flight": self.limiter.in_flight,
+            "waiting": self.limiter.waiting(),
+            "hold_seconds": round(self.limiter.hold_remaining(), 2),
+            "breaker": self.breaker.stats(),
+        }
+
+    def _breaker_wait(self, deadline: float) -> float:
+        retry_in = self.breaker.retry_in()
+        remaining = deadline - time.monotonic()
+        if retry_in > remaining:
+            raise ProviderUnavailableError(
+                f"LLM provider {self.name} is unavailable (circuit open, retry in {math.ceil(retry_in)}s)",
+                retry_after=retry_in,
+            )
+        # Half-open with a probe in flight reports 0: poll until the probe settles.
+        return max(retry_in, 0.05)
+
+
+_GUARDS: weakref.WeakSet[ProviderGuard] = weakref.WeakSet()
+
+
+def _guard_samples(metric: str) -> list[tuple[tuple[str, ...], float]]:
+    samples = []
+    for guard in list(_GUARDS):
+        if metric == "limit":
+            value = guard.limiter.limit
+        elif metric == "in_flight":
+            value = guard.limiter.in_flight
+        else:
+            value = _STATE_VALUES[guard.breaker.state]
+        samples.append(((guard.name,), value))
+    return samples
+
+
+REGISTRY.register(
+    CallbackGauge(
+        "ggen_llm_concurrency_limit",
+        "Current adaptive concurrency limit per provider.",
+        ("provider",),
+        lambda: _guard_samples("limit"),
+    )
+)
+REGISTRY.register(
+    CallbackGauge(
+        "ggen_llm_requests_in_flight",
+        "Provider requests holding a limiter slot.",
+        ("provider",),
+        lambda: _guard_samples("in_flight"),
+    )
+)
+REGISTRY.register(
+    CallbackGauge(
+        "ggen_llm_circuit_state",
+        "Circuit breaker state per provider: 0 closed, 1 half-open, 2 open.",
+        ("provider",),
+        lambda: _guard_samples("state"),
+    )
+)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+import os
+import random
+import threading
+import time
+import weakref
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from app.services.metrics import REGISTRY, CallbackGauge
+from app.services.resilience import OPEN, OUTCOME_CANCELLED, OUTCOME_OK, OUTCOME_REJECTED, ProviderGuard
+
+
+@dataclass(slots=True)
+class Endpoint:
+    name: str
+    base_url: str
+    api_key: str
+    model: str
+    weight: float = 1.0
+    max_concurrency: int = 0
+
+
+class Route:
+    # One endpoint, its provider guard, and what the router has learned about it.
+    def __init__(self, endpoint: Endpoint, guard: ProviderGuard, alpha: float = 0.3):
+        self.endpoint = endpoint
+        self.guard = guard
+        self.alpha = alpha
+        self.latency: float | None = None
+        self.last_sample = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error: str | None = None
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, outcome: str, error: str | None = None) -> None:
+        if outcome == OUTCOME_CANCELLED:
+            # A hedged request that lost, or a cancelled job: its duration says nothing.
+            return
+        with self._lock:
+            if outcome == OUTCOME_OK:
+                self.successes += 1
+                self.consecutive_failures = 0
+            elif outcome != OUTCOME_REJECTED:
+                # A fast 503 must not make a failing endpoint look fast.
+                seconds = max(seconds, 2 * (self.latency or seconds))
+                self.failures += 1
+                self.consecutive_failures += 1
+                self.last_error = (error or outcome)[:200]
+            self.latency = seconds if self.latency is None else self.latency + self.alpha * (seconds - self.latency)
+            self.last_sample = time.monotonic()
+
+    def load(self) -> float:
+        limiter = self.guard.limiter
+        return (limiter.in_flight + limiter.waiting()) / max(1, limiter.limit)
+
+    def healthy(self) -> bool:
+        return self.guard.breaker.state != OPEN
+
+    def stats(self) -> dict[str, object]:
+        return {
+            **self.guard.stats(),
+            "base_url": self.endpoint.base_url,
+            "model": self.endpoint.model,
+            "weight": self.endpoint.weight,
+            "latency_ewma_seconds": round(self.latency, 3) if self.latency is not None else None,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+        }
+
+
+class EndpointRouter:
+    # Picks the endpoint with the lowest expected wait: EWMA latency scaled by how full its limiter
+    # is, penalised by recent failures and divided by its weight. With more than two healthy
+    # endpoints two are sampled by weight and the better one wins, so a briefly fast endpoint does
+    # not take every request. Latency older than `stale_seconds` is forgotten, so an endpoint that
+    # was slow once gets traffic again.
+    def __init__(self, routes: Sequence[Route], stale_seconds: float = 30.0):
+        if not routes:
+            raise ValueError("EndpointRouter needs at least one endpoint.")
+        self.routes = list(routes)
+        self.stale_seconds = stale_seconds
+        _ROUTERS.add(self)
+
+    @property
+    def primary(self) -> Route:
+        return self.routes[0]
+
+    def pick(self, tried: Sequence[Route] = ()) -> Route:
+        candidates = [route for route in self.routes if route not in tried] or self.routes
+        healthy = [route for route in candidates if route.healthy()]
+        if not healthy:
+            # Every breaker is open: the one closest to its probe lets its guard wait or fail fast.
+            return min(candidates, key=lambda route: route.guard.breaker.retry_in())
+        if len(healthy) > 2:
+            first = random.choices(healthy, weights=[route.endpoint.weight for route in healthy])[0]
+            rest = [route for route in healthy if route is not first]
+            healthy = [first, random.choices(rest, weights=[route.endpoint.weight for route in rest])[0]]
+        now = time.monotonic()
+        known = [route.latency for route in self.routes if self._fresh(route, now)]
+        fallback = min(known) if known else 1.0
+        return min(healthy, key=lambda route: self._score(route, now, fallback))
+
+    def has_alternative(self, tried: Sequence[Route]) -> bool:
+        return any(route not in tried and route.healthy() for route in self.routes)
+
+    def stats(self) -> list[dict[str, object]]:
+        return [route.stats() for route in self.routes]
+
+    def _fresh(self, route: Route, now: float) -> bool:
+        return route.latency is not None and now - route.last_sample < self.stale_seconds
+
+    def _score(self, route: Route, now: float, fallback: float) -> float:
+        latency = route.latency if self._fresh(route, now) else fallback
+        return latency * (1 + route.load()) * (1 + route.consecutive_failures) / route.endpoint.weight
+
+
+def parse_endpoints(raw: str, default_key: str | None, default_model: str) -> list[Endpoint]:
+    # LLM_ENDPOINTS: a JSON list of {"base_url", "api_key" or "api_key_env", "model", "weight",
+    # "max_concurrency", "name"}. Missing keys and models fall back to LLM_API_KEY / LLM_MODEL.
+    try:
+        items = json.loads(raw)
+    except ValueError as exc:
+        raise RuntimeError(f"LLM_ENDPOINTS is not valid JSON: {exc}") from exc
+    if not isinstance(items, list) or not items:
+        raise RuntimeError("LLM_ENDPOINTS must be a non-empty JSON list of endpoint objects.")
+    endpoints: list[Endpoint] = []
+    names: set[str] = set()
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or not item.get("base_url"):
+            raise RuntimeError(f"LLM_ENDPOINTS[{index}] must be an object with a base_url.")
+        base_url = str(item["base_url"]).rstrip("/")
+        api_key = item.get("api_key") or os.getenv(str(item.get("api_key_env", ""))) or default_key
+        if not api_key:
+            raise RuntimeError(f"LLM_ENDPOINTS[{index}] has no api_key, api_key_env or LLM_API_KEY fallback.")
+        weight = float(item.get("weight", 1.0))
+        if weight <= 0:
+            raise RuntimeError(f"LLM_ENDPOINTS[{index}] weight must be positive.")
+        name = str(item.get("name") or base_url)
+        if name in names:
+            # Several keys on one base URL: keep the names apart for stats and metrics.
+            name = f"{name}#{index}"
+        names.add(name)
+        endpoints.append(
+            Endpoint(
+                name=name,
+                base_url=base_url,
+                api_key=str(api_key),
+                model=str(item.get("model") or default_model),
+                weight=weight,
+                max_concurrency=int(item.get("max_concurrency", 0)),
+            )
+        )
+    return endpoints
+
+
+_ROUTERS: weakref.WeakSet[EndpointRouter] = weakref.WeakSet()
+
+
+def _latency_samples() -> list[tuple[tuple[str, ...], float]]:
+    return [
+        ((route.endpoint.name,), route.latency)
+        for router in list(_ROUTERS)
+        for route in router.routes
+        if route.latency is not None
+    ]
+
+
+REGISTRY.register(
+    CallbackGauge(
+        "ggen_llm_endpoint_latency_seconds",
+        "EWMA request latency per LLM endpoint, as used for routing.",
+        ("endpoint",),
+        _latency_samples,
+    )
+)
@@ -0,0 +1,400 @@
+from __future__ import annotations
+
+import asyncio
+import functools
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Generic, TypeVar
+
+from app.models import JobStatus
+
+STANDARD_LANE = "standard"
+FAST_LANE = "fast"
+LANES = (STANDARD_LANE, FAST_LANE)
+
+LLM_STAGES = (JobStatus.DESIGNING, JobStatus.BUILDING)
+LOCAL_STAGES = (JobStatus.TESTING,)
+
+JobRunner = Callable[[str], Awaitable[None]]
+T = TypeVar("T")
+
+
+class QueueFullError(RuntimeError):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass(slots=True)
+class _QueuedJob:
+    job_id: str
+    runner: JobRunner
+    lane: str
+    client_id: str = ""
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+class _FairQueue(Generic[T]):
+    # Self-clocked weighted fair queuing: each item is tagged with its client's virtual finish time,
+    # so clients with queued work take turns in proportion to their weights, however much each of
+    # them has queued. A client that was idle starts at the current virtual time and gets no credit.
+    def __init__(self) -> None:
+        self._heap: list[tuple[float, int, str, T]] = []
+        self._finish: dict[str, float] = {}
+        self._queued: dict[str, int] = {}
+        self._virtual = 0.0
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def clients(self) -> int:
+        return len(self._queued)
+
+    def push(self, client_id: str, weight: float, item: T) -> None:
+        tag = max(self._virtual, self._finish.get(client_id, 0.0)) + 1.0 / weight
+        self._finish[client_id] = tag
+        self._queued[client_id] = self._queued.get(client_id, 0) + 1
+        heapq.heappush(self._heap, (tag, next(self._sequence), client_id, item))
+
+    def pop(self, eligible: Callable[[str], bool] | None = None) -> tuple[str, T] | None:
+        # The lowest tag among clients that may run more; capped clients keep their place.
+        skipped = []
+        found = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            if eligible is None or eligible(entry[2]):
+                found = entry
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        if found is None:
+            return None
+        tag, _, client_id, item = found
+        self._virtual = max(self._virtual, tag)
+        self._queued[client_id] -= 1
+        if not self._queued[client_id]:
+            del self._queued[client_id]
+            if self._finish[client_id] <= self._virtual:
+                del self._finish[client_id]
+        return client_id, item
+
+
+class _FairSlots:
+    # The LLM slots, granted in weighted fair order across clients and with an optional cap on how
+    # many one client may hold. Only used from the scheduler's event loop.
+    def __init__(self, capacity: int, per_client: int = 0):
+        self.capacity = capacity
+        self.per_client = per_client
+        self._in_use: dict[str, int] = {}
+        self._used = 0
+        self._waiters: _FairQueue[asyncio.Future[None]] = _FairQueue()
+
+    async def acquire(self, client_id: str, weight: float) -> None:
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        self._waiters.push(client_id, weight, future)
+        self._grant()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(client_id)
+            raise
+
+    def release(self, client_id: str) -> None:
+        self._used -= 1
+        self._in_use[client_id] -= 1
+        if not self._in_use[client_id]:
+            del self._in_use[client_id]
+        self._grant()
+
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _eligible(self, client_id: str) -> bool:
+        return not self.per_client or self._in_use.get(client_id, 0) < self.per_client
+
+    def _grant(self) -> None:
+        while self._used < self.capacity:
+            waiter = self._waiters.pop(self._eligible)
+            if waiter is None:
+                return
+            client_id, future = waiter
+            if future.done():
+                # Cancelled while it waited.
+                continue
+            self._used += 1
+            self._in_use[client_id] = self._in_use.get(client_id, 0) + 1
+            future.set_result(None)
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        max_queue_size: int = 100,
+        llm_concurrency: int = 4,
+        testing_concurrency: int = 2,
+        fast_lane_concurrency: int = 8,
+        client_llm_concurrency: int = 0,
+        client_weights: Mapping[str, float] | None = None,
+    ):
+        self.max_queue_size = max(1, max_queue_size)
+        self.llm_concurrency = max(1, llm_concurrency)
+        self.testing_concurrency = max(1, testing_concurrency)
+        self.fast_lane_concurrency = max(1, fast_lane_concurrency)
+        # 0: a single client may use every LLM slot while nobody else is waiting.
+        self.client_llm_concurrency = max(0, client_llm_concurrency)
+        self.client_weights = dict(client_weights or {})
+        # Pipelines per lane may run ahead into the next stage while others wait on the LLM slots.
+        self._lane_limits = {
+            STANDARD_LANE: self.llm_concurrency + self.testing_concurrency,
+            FAST_LANE: self.fast_lane_concurrency,
+        }
+        self._queues: dict[str, _FairQueue[_QueuedJob]] = {lane: _FairQueue() for lane in LANES}
+        self._active: dict[str, int] = {lane: 0 for lane in LANES}
+        # Standard-lane pipelines per client; capped like the lane itself so that a client at its
+        # LLM limit cannot fill the lane with jobs that only wait.
+        self._client_active: dict[str, int] = {}
+        self._client_job_limit = (
+            self.client_llm_concurrency + self.testing_concurrency if self.client_llm_concurrency else 0
+        )
+        self._job_lanes: dict[str, str] = {}
+        self._job_clients: dict[str, str] = {}
+        # Queue places promised to a batch by reserve() and not yet taken by its submits.
+        self._reserved = 0
+        # Queue places held by jobs waiting outside the queues, such as coalesced followers.
+        self._parked = 0
+        self._in_flight: dict[JobStatus, int] = {stage: 0 for stage in (*LLM_STAGES, *LOCAL_STAGES)}
+        self._lock = threading.Lock()
+        self._avg_job_seconds = 30.0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._llm_slots: _FairSlots | None = None
+        self._testing_slots: asyncio.Semaphore | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+        self._started = threading.Event()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            raise RuntimeError("Job scheduler is not running.")
+        return self._loop
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run_loop, name="job-scheduler", daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is None or self._loop is None:
+            return
+        loop = self._loop
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        self._loop = None
+        self._started.clear()
+
+    def submit(
+        self,
+        job_id: str,
+        runner: JobRunner,
+        lane: str = STANDARD_LANE,
+        force: bool = False,
+        client_id: str = "",
+        reserved: bool = False,
+        parked: bool = False,
+    ) -> None:
+        if lane not in self._queues:
+            raise ValueError(f"Unknown scheduler lane '{lane}'")
+        loop = self.loop
+        with self._lock:
+            if parked:
+                self._parked -= 1
+            else:
+                self._take_place(force, reserved)
+            queued = _QueuedJob(job_id=job_id, runner=runner, lane=lane, client_id=client_id)
+            self._queues[lane].push(client_id, self._weight(client_id), queued)
+            self._job_lanes[job_id] = lane
+            self._job_clients[job_id] = client_id
+        loop.call_soon_threadsafe(self._notify)
+
+    @asynccontextmanager
+    async def stage(self, job_id: str, status: JobStatus) -> AsyncIterator[None]:
+        lane = self._job_lanes.get(job_id, STANDARD_LANE)
+        release = await self._acquire_slot(status, lane, self._job_clients.get(job_id, ""))
+        with self._lock:
+            self._in_flight[status] = self._in_flight.get(status, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._in_flight[status] -= 1
+            if release is not None:
+                release()
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "queue_depth": {lane: len(queue) for lane, queue in self._queues.items()},
+                "queue_capacity": self.max_queue_size,
+                "parked": self._parked,
+                "active_jobs": dict(self._active),
+                "in_flight": {stage.value: count for stage, count in self._in_flight.items()},
+                "clients_queued": {lane: queue.clients() for lane, queue in self._queues.items()},
+                "clients_active": len(self._client_active),
+                "llm_waiting": self._llm_slots.waiting() if self._llm_slots is not None else 0,
+                "limits": {
+                    "llm": self.llm_concurrency,
+                    "testing": self.testing_concurrency,
+                    "fast_lane": self.fast_lane_concurrency,
+                    "client_llm": self.client_llm_concurrency,
+                },
+            }
+
+    def _run_loop(self) -> None:
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        loop.set_default_executor(
+            ThreadPoolExecutor(
+                max_workers=self.llm_concurrency + self.testing_concurrency + self.fast_lane_concurrency,
+                thread_name_prefix="job-stage",
+            )
+        )
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._llm_slots = _FairSlots(self.llm_concurrency, self.client_llm_concurrency)
+        self._testing_slots = asyncio.Semaphore(self.testing_concurrency)
+        dispatcher = loop.create_task(self._dispatch())
+        self._started.set()
+        try:
+            loop.run_forever()
+        finally:
+            dispatcher.cancel()
+            for task in list(self._tasks):
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(dispatcher, *self._tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_default_executor())
+            loop.close()
+
+    def _notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _dispatch(self) -> None:
+        assert self._wakeup is not None
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            for queued in self._take_runnable():
+                task = asyncio.get_running_loop().create_task(self._run(queued))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    def _take_runnable(self) -> list[_QueuedJob]:
+        runnable: list[_QueuedJob] = []
+        with self._lock:
+            for lane, queue in self._queues.items():
+                eligible = self._below_client_limit if lane == STANDARD_LANE and self._client_job_limit else None
+                while queue and self._active[lane] < self._lane_limits[lane]:
+                    taken = queue.pop(eligible)
+                    if taken is None:
+                        break
+                    client_id, queued = taken
+                    runnable.append(queued)
+                    self._active[lane] += 1
+                    if lane == STANDARD_LANE:
+                        self._client_active[client_id] = self._client_active.get(client_id, 0) + 1
+        return runnable
+
+    def _below_client_limit(self, client_id: str) -> bool:
+        return self._client_active.get(client_id, 0) < self._client_job_limit
+
+    def _weight(self, client_id: str) -> float:
+        return self.client_weights.get(client_id, 1.0)
+
+    async def _run(self, queued: _QueuedJob) -> None:
+        started = time.monotonic()
+        try:
+            await queued.runner(queued.job_id)
+        finally:
+            elapsed = time.monotonic() - started
+            with self._lock:
+                self._active[queued.lane] -= 1
+                self._job_lanes.pop(queued.job_id, None)
+                self._job_clients.pop(queued.job_id, None)
+                if queued.lane == STANDARD_LANE:
+                    self._client_active[queued.client_id] -= 1
+                    if not self._client_active[queued.client_id]:
+                        del self._client_active[queued.client_id]
+                    self._avg_job_seconds = 0.8 * self._avg_job_seconds + 0.2 * elapsed
+            self._notify()
+
+    async def _acquire_slot(self, status: JobStatus, lane: str, client_id: str) -> Callable[[], None] | None:
+        if status in LLM_STAGES:
+            # Fast-lane jobs never reach a provider, so they skip the LLM slots entirely.
+            if lane == FAST_LANE or self._llm_slots is None:
+                return None
+            await self._llm_slots.acquire(client_id, self._weight(client_id))
+            return functools.partial(self._llm_slots.release, client_id)
+        if status in LOCAL_STAGES and self._testing_slots is not None:
+            await self._testing_slots.acquire()
+            return self._testing_slots.release
+        return None
+
+    def park(self, force: bool = False, reserved: bool = False) -> None:
+        # Holds a queue place for a job that waits elsewhere; submit(parked=True) or unpark() frees it.
+        with self._lock:
+            self._take_place(force, reserved)
+            self._parked += 1
+
+    def unpark(self, count: int = 1) -> None:
+        with self._lock:
+            self._parked -= count
+
+    def _take_place(self, force: bool, reserved: bool) -> None:
+        if reserved:
+            self._reserved -= 1
+            return
+        queued = self._occupied()
+        if not force and queued >= self.max_queue_size:
+            raise QueueFullError(
+                "Job queue is full, try again later.",
+                retry_after=self.estimate_retry_after(queued),
+            )
+
+    def reserve(self, count: int) -> None:
+        # Admits `count` jobs as a whole; each later submit(reserved=True) takes one of the places.
+        with self._lock:
+            queued = self._occupied()
+            if queued + count > self.max_queue_size:
+                raise QueueFullError(
+                    "Job queue is full, try again later.",
+                    retry_after=self.estimate_retry_after(queued + count - 1),
+                )
+            self._reserved += count
+
+    def unreserve(self, count: int = 1) -> None:
+        with self._lock:
+            self._reserved -= count
+
+    def estimate_retry_after(self, queued: int) -> int:
+        waves = queued / self._lane_limits[STANDARD_LANE]
+        return max(1, math.ceil(waves * self._avg_job_seconds))
+
+    def _queued_total(self) -> int:
+        return sum(len(queue) for queue in self._queues.values())
+
+    def _occupied(self) -> int:
+        return self._queued_total() + self._reserved + self._parked
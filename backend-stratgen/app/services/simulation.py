@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+import math
+import shutil
+import subprocess
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+# Reads one JSON request on stdin and writes one JSON report; see the header of the script.
+HARNESS_PATH = Path(__file__).with_name("headless_phaser.js")
+
+SCENE_MODULE_MARKER = "// BEGIN GENERATED_SCENE_MODULE"
+# Guards the harness process against generated code that allocates without bound.
+HARNESS_MAX_OLD_SPACE_MB = 256
+
+
+@dataclass(slots=True)
+class SimulationReport:
+    frames: int
+    requested_frames: int
+    mean_frame_ms: float
+    p95_frame_ms: float
+    max_frame_ms: float
+    create_ms: float
+    peak_objects: int
+    objects_created: int
+    restarts: int
+    errors: list[str] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, object]:
+        return asdict(self)
+
+
+class HeadlessSimulator:
+    def __init__(
+        self,
+        frames: int = 3000,
+        frame_budget_ms: float = 8.0,
+        object_budget: int = 500,
+        timeout_seconds: float = 20.0,
+        seed: int = 1337,
+        node_bin: str | None = None,
+    ):
+        self.frames = max(1, frames)
+        self.frame_budget_ms = frame_budget_ms
+        self.object_budget = max(1, object_budget)
+        self.timeout_seconds = timeout_seconds
+        self.seed = seed
+        self.node_bin = node_bin or shutil.which("node")
+
+    @property
+    def available(self) -> bool:
+        return self.node_bin is not None
+
+    def run(self, game_js: str) -> SimulationReport | None:
+        # None means Node is not installed; the TESTING stage then skips the simulation.
+        if self.node_bin is None:
+            return None
+        request = {
+            "source": game_js,
+            "frames": self.frames,
+            "seed": self.seed,
+            # Past 4x the budget the verdict is already clear, so stop before memory becomes the problem.
+            "object_limit": self.object_budget * 4,
+            "timeout_ms": int(self.timeout_seconds * 1000),
+        }
+        try:
+            completed = subprocess.run(
+                [self.node_bin, f"--max-old-space-size={HARNESS_MAX_OLD_SPACE_MB}", str(HARNESS_PATH)],
+                input=json.dumps(request),
+                capture_output=True,
+                text=True,
+                encoding="utf-8",
+                # The harness enforces the budget itself; this only catches a wedged process.
+                timeout=self.timeout_seconds * 2 + 5,
+            )
+        except subprocess.TimeoutExpired:
+            return self._failed_report(f"Simulation did not finish within {self.timeout_seconds * 2 + 5:g}s")
+        try:
+            raw = json.loads(completed.stdout)
+        except json.JSONDecodeError:
+            detail = (completed.stderr or completed.stdout).strip().splitlines()
+            reason = detail[-1] if detail else f"exit code {completed.returncode}"
+            return self._failed_report(f"Simulation crashed: {reason}")
+        return self._report(raw, game_js)
+
+    def violations(self, report: SimulationReport) -> list[str]:
+        problems = [f"runtime_error: {error}" for error in report.errors]
+        if report.frames and report.p95_frame_ms > self.frame_budget_ms:
+            problems.append(
+                f"frame_budget: p95 frame time {report.p95_frame_ms:.2f} ms exceeds {self.frame_budget_ms:g} ms "
+                f"(mean {report.mean_frame_ms:.2f} ms, max {report.max_frame_ms:.2f} ms over {report.frames} frames)"
+            )
+        if report.peak_objects > self.object_budget:
+            problems.append(
+                f"object_budget: peak live objects {report.peak_objects} exceeds {self.object_budget} "
+                f"({report.objects_created} created over {report.frames} frames)"
+            )
+        return problems
+
+    def _report(self, raw: dict[str, object], game_js: str) -> SimulationReport:
+        frame_ms = sorted(float(value) for value in raw.get("frame_ms", []))
+        errors = [_describe_error(error, game_js) for error in raw.get("errors", [])]
+        return SimulationReport(
+            frames=int(raw.get("frames", 0)),
+            requested_frames=self.frames,
+            mean_frame_ms=round(sum(frame_ms) / len(frame_ms), 4) if frame_ms else 0.0,
+            p95_frame_ms=round(_percentile(frame_ms, 0.95), 4),
+            max_frame_ms=round(frame_ms[-1], 4) if frame_ms else 0.0,
+            create_ms=round(float(raw.get("create_ms", 0.0)), 4),
+            peak_objects=int(raw.get("peak_objects", 0)),
+            objects_created=int(raw.get("objects_created", 0)),
+            restarts=int(raw.get("restarts", 0)),
+            errors=errors,
+        )
+
+    def _failed_report(self, message: str) -> SimulationReport:
+        return SimulationReport(
+            frames=0,
+            requested_frames=self.frames,
+            mean_frame_ms=0.0,
+            p95_frame_ms=0.0,
+            max_frame_ms=0.0,
+            create_ms=0.0,
+            peak_objects=0,
+            objects_created=0,
+            restarts=0,
+            errors=[message],
+        )
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _describe_error(error: dict[str, object], game_js: str) -> str:
+    detail = f"{error.get('message', 'Error')} ({error.get('phase', 'run')}, frame {error.get('frame', 0)}"
+    line = error.get("line")
+    if isinstance(line, int):
+        # Report lines relative to the scene module, which is what code repair sees.
+        marker_line = game_js.count("\n", 0, game_js.find(SCENE_MODULE_MARKER)) + 1 if SCENE_MODULE_MARKER in game_js else 0
+        source_lines = game_js.splitlines()
+        if marker_line and line > marker_line:
+            detail = f"{detail}, scene module line {line - marker_line}"
+        else:
+            detail = f"{detail}, game.js line {line}"
+        if 0 < line <= len(source_lines):
+            detail = f"{detail}: {source_lines[line - 1].strip()[:160]}"
+    return f"{detail})"
@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Protocol
+
+from app.models import GamePlan, GenerationMode, JobStatus
+from app.services.types import JobRecord
+
+ACTIVE_STATUSES = (JobStatus.DESIGNING, JobStatus.BUILDING, JobStatus.TESTING)
+FINISHED_STATUSES = (JobStatus.READY, JobStatus.FAILED, JobStatus.CANCELLED, JobStatus.TIMED_OUT)
+_FINISHED_SQL = ", ".join(f"'{status.value}'" for status in FINISHED_STATUSES)
+
+
+class JobStore(Protocol):
+    def put(self, job: JobRecord) -> None:
+        ...
+
+    def get(self, job_id: str) -> JobRecord | None:
+        ...
+
+    def get_many(self, job_ids: Iterable[str]) -> list[JobRecord]:
+        ...
+
+    def list_by_batch(self, batch_id: str) -> list[JobRecord]:
+        ...
+
+    def list_by_status(self, statuses: Iterable[JobStatus]) -> list[JobRecord]:
+        ...
+
+    def evict_finished(self, older_than: datetime) -> int:
+        ...
+
+
+class InMemoryJobStore:
+    def __init__(self) -> None:
+        self._jobs: dict[str, JobRecord] = {}
+        self._lock = threading.Lock()
+
+    def put(self, job: JobRecord) -> None:
+        with self._lock:
+            self._jobs[job.job_id] = job
+
+    def get(self, job_id: str) -> JobRecord | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_many(self, job_ids: Iterable[str]) -> list[JobRecord]:
+        with self._lock:
+            return [job for job_id in job_ids if (job := self._jobs.get(job_id)) is not None]
+
+    def list_by_batch(self, batch_id: str) -> list[JobRecord]:
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.batch_id == batch_id]
+        return sorted(jobs, key=lambda job: job.created_at)
+
+    def list_by_status(self, statuses: Iterable[JobStatus]) -> list[JobRecord]:
+        wanted = set(statuses)
+        with self._lock:
+            return [job for job in self._jobs.values() if job.status in wanted]
+
+    def evict_finished(self, older_than: datetime) -> int:
+        with self._lock:
+            expired = [
+                job_id
+                for job_id, job in self._jobs.items()
+                if job.status in FINISHED_STATUSES and job.updated_at < older_than
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+
+class SqliteJobStore:
+    def __init__(self, db_path: Path, cache_size: int = 256, busy_timeout_ms: int = 5000, shared: bool = False):
+        self.db_path = db_path
+        self.cache_size = max(0, cache_size)
+        # Other processes may update active jobs, so a shared store only caches finished (immutable) ones.
+        self.shared = shared
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._cache: OrderedDict[str, JobRecord] = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_schema()
+
+    def put(self, job: JobRecord) -> None:
+        # Write-through: SQLite is the source of truth, the LRU only saves reads for hot jobs.
+        # A finished row is final: a worker still writing a job that was cancelled elsewhere must not revive it.
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO jobs (job_id, status, created_at, updated_at, data, batch_id) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(job_id) DO UPDATE SET status = excluded.status, "
+                "updated_at = excluded.updated_at, data = excluded.data "
+                f"WHERE jobs.status NOT IN ({_FINISHED_SQL})",
+                (
+                    job.job_id,
+                    job.status.value,
+                    job.created_at.timestamp(),
+                    job.updated_at.timestamp(),
+                    _encode_record(job),
+                    job.batch_id,
+                ),
+            )
+        if cursor.rowcount:
+            self._remember(job)
+
+    def get(self, job_id: str) -> JobRecord | None:
+        with self._cache_lock:
+            cached = self._cache.get(job_id)
+            if cached is not None:
+                self._cache.move_to_end(job_id)
+                return cached
+        row = self._connection().execute(
+            "SELECT job_id, status, created_at, updated_at, data FROM jobs WHERE job_id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        job = _decode_row(row)
+        self._remember(job)
+        return job
+
+    def get_many(self, job_ids: Iterable[str]) -> list[JobRecord]:
+        found: dict[str, JobRecord] = {}
+        missing: list[str] = []
+        wanted = list(dict.fromkeys(job_ids))
+        with self._cache_lock:
+            for job_id in wanted:
+                cached = self._cache.get(job_id)
+                if cached is not None:
+                    found[job_id] = cached
+                else:
+                    missing.append(job_id)
+        # One query per chunk instead of one per job; SQLite caps the number of bound parameters.
+        for start in range(0, len(missing), 500):
+            chunk = missing[start : start + 500]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = self._connection().execute(
+                f"SELECT job_id, status, created_at, updated_at, data FROM jobs WHERE job_id IN ({placeholders})",
+                chunk,
+            ).fetchall()
+            for row in rows:
+                found[row[0]] = self._prefer_cached(_decode_row(row))
+        return [found[job_id] for job_id in wanted if job_id in found]
+
+    def list_by_batch(self, batch_id: str) -> list[JobRecord]:
+        rows = self._connection().execute(
+            "SELECT job_id, status, created_at, updated_at, data FROM jobs WHERE batch_id = ? ORDER BY created_at",
+            (batch_id,),
+        ).fetchall()
+        return [self._prefer_cached(_decode_row(row)) for row in rows]
+
+    def list_by_status(self, statuses: Iterable[JobStatus]) -> list[JobRecord]:
+        values = [status.value for status in statuses]
+        if not values:
+            return []
+        placeholders = ", ".join("?" for _ in values)
+        rows = self._connection().execute(
+            "SELECT job_id, status, created_at, updated_at, data FROM jobs "
+            f"WHERE status IN ({placeholders}) ORDER BY created_at",
+            values,
+        ).fetchall()
+        return [self._prefer_cached(_decode_row(row)) for row in rows]
+
+    def evict_finished(self, older_than: datetime) -> int:
+        values = [status.value for status in FINISHED_STATUSES]
+        placeholders = ", ".join("?" for _ in values)
+        conn = self._connection()
+        with conn:
+            rows = conn.execute(
+                f"SELECT job_id FROM jobs WHERE status IN ({placeholders}) AND updated_at < ?",
+                (*values, older_than.timestamp()),
+            ).fetchall()
+            conn.executemany("DELETE FROM jobs WHERE job_id = ?", rows)
+        with self._cache_lock:
+            for (job_id,) in rows:
+                self._cache.pop(job_id, None)
+        return len(rows)
+
+    def _init_schema(self) -> None:
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "job_id TEXT PRIMARY KEY, "
+                "status TEXT NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "updated_at REAL NOT NULL, "
+                "data TEXT NOT NULL, "
+                "batch_id TEXT)"
+            )
+            add_column(conn, "jobs", "batch_id TEXT")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs (updated_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_batch_id ON jobs (batch_id) WHERE batch_id IS NOT NULL")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=self.busy_timeout_ms / 1000)
+            conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _remember(self, job: JobRecord) -> None:
+        if self.cache_size == 0:
+            return
+        if self.shared and job.status not in FINISHED_STATUSES:
+            with self._cache_lock:
+                self._cache.pop(job.job_id, None)
+            return
+        with self._cache_lock:
+            self._cache[job.job_id] = job
+            self._cache.move_to_end(job.job_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _prefer_cached(self, job: JobRecord) -> JobRecord:
+        # Keep object identity stable for records that are currently being mutated in-process.
+        with self._cache_lock:
+            return self._cache.get(job.job_id, job)
+
+
+def _encode_record(job: JobRecord) -> str:
+    return json.dumps(
+        {
+            "prompt": job.prompt,
+            "mode": job.mode.value,
+            "base_game_id": job.base_game_id,
+            "error": job.error,
+            "game_url": job.game_url,
+            "plan": job.plan.model_dump(mode="json") if job.plan is not None else None,
+            "version": job.version,
+            "events": job.events,
+            "simulation": job.simulation,
+            "deadline_at": job.deadline_at.timestamp() if job.deadline_at is not None else None,
+            "client_id": job.client_id,
+            "batch_id": job.batch_id,
+        },
+        separators=(",", ":"),
+    )
+
+
+def _decode_row(row: tuple[str, str, float, float, str]) -> JobRecord:
+    job_id, status, created_at, updated_at, data = row
+    payload = json.loads(data)
+    plan = payload.get("plan")
+    deadline_at = payload.get("deadline_at")
+    return JobRecord(
+        job_id=job_id,
+        prompt=payload["prompt"],
+        mode=GenerationMode(payload["mode"]),
+        base_game_id=payload.get("base_game_id"),
+        status=JobStatus(status),
+        created_at=datetime.fromtimestamp(created_at, tz=timezone.utc),
+        updated_at=datetime.fromtimestamp(updated_at, tz=timezone.utc),
+        error=payload.get("error"),
+        game_url=payload.get("game_url"),
+        plan=GamePlan.model_validate(plan) if plan is not None else None,
+        version=payload.get("version", 0),
+        events=payload.get("events", []),
+        simulation=payload.get("simulation"),
+        deadline_at=datetime.fromtimestamp(deadline_at, tz=timezone.utc) if deadline_at is not None else None,
+        client_id=payload.get("client_id", ""),
+        batch_id=payload.get("batch_id"),
+    )
+
+
+def add_column(conn: sqlite3.Connection, table: str, definition: str) -> None:
+    # Databases created before a column existed get it on startup; another process may win the race.
+    name = definition.split()[0]
+    if any(row[1] == name for row in conn.execute(f"PRAGMA table_info({table})")):
+        return
+    try:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {definition}")
+    except sqlite3.OperationalError as exc:
+        if "duplicate column" not in str(exc):
+            raise
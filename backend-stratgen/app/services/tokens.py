@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import math
+import re
+from pathlib import Path
+from typing import Protocol
+
+try:
+    from tokenizers import Tokenizer
+except ImportError:  # optional: byte-level and SentencePiece BPE files are also read without it
+    Tokenizer = None
+
+logger = logging.getLogger("ggen.tokens")
+
+# Llama 3 / GPT-2 style pre-tokenization with the stdlib `re` (no \p{L}); close enough for counting, since
+# it only decides where BPE merges may not cross.
+_BYTE_LEVEL_SPLIT = re.compile(
+    r"""'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?(?:[^\s\w]|_)+[\r\n]*|\s*[\r\n]+|\s+(?!\S)|\s+"""
+)
+_METASPACE = "▁"
+
+
+class TokenCounter(Protocol):
+    name: str
+
+    def count(self, text: str) -> int:
+        ...
+
+
+class HeuristicTokenCounter:
+    name = "heuristic"
+
+    def __init__(self, chars_per_token: float = 4.0):
+        self.chars_per_token = chars_per_token
+
+    def count(self, text: str) -> int:
+        return max(1, math.ceil(len(text) / self.chars_per_token))
+
+
+class HuggingFaceTokenCounter:
+    name = "tokenizers"
+
+    def __init__(self, path: Path):
+        self._tokenizer = Tokenizer.from_file(str(path))
+        self.count = functools.lru_cache(maxsize=256)(self._count)
+
+    def _count(self, text: str) -> int:
+        return len(self._tokenizer.encode(text, add_special_tokens=False).ids)
+
+
+class BpeTokenCounter:
+    # Reads the BPE model out of a tokenizer.json and counts with it. Encodings are cached per
+    # pre-token, and prompts repeat most of their words (requirements, plan keys, previous code).
+    name = "bpe"
+
+    def __init__(self, path: Path):
+        spec = json.loads(path.read_text(encoding="utf-8"))
+        model = spec.get("model") or {}
+        if model.get("type") != "BPE":
+            raise ValueError(f"unsupported tokenizer model {model.get('type')!r}")
+        self._vocab: dict[str, int] = model["vocab"]
+        self._ranks: dict[tuple[str, str], int] = {}
+        for rank, merge in enumerate(model.get("merges", [])):
+            pair = tuple(merge.split(" ", 1)) if isinstance(merge, str) else tuple(merge)
+            self._ranks.setdefault(pair, rank)
+        components = json.dumps([spec.get("pre_tokenizer"), spec.get("decoder"), spec.get("normalizer")])
+        if '"ByteLevel"' in components:
+            self._byte_level = True
+        elif _METASPACE in components or '"Metaspace"' in components or model.get("byte_fallback"):
+            self._byte_level = False
+        else:
+            raise ValueError("tokenizer is neither byte-level nor SentencePiece BPE")
+        self._bytes = _bytes_to_unicode()
+        self._word_tokens = functools.lru_cache(maxsize=65536)(self._merge)
+
+    def count(self, text: str) -> int:
+        if self._byte_level:
+            words = (
+                "".join(self._bytes[byte] for byte in word.encode("utf-8")) for word in _BYTE_LEVEL_SPLIT.findall(text)
+            )
+        else:
+            marked = _METASPACE + text.replace(" ", _METASPACE)
+            words = (word for word in re.split(f"(?={_METASPACE})|(?<=\n)", marked) if word)
+        return sum(self._word_tokens(word) for word in words)
+
+    def _merge(self, word: str) -> int:
+        if word in self._vocab:
+            return 1
+        parts = list(word)
+        while len(parts) > 1:
+            ranked = [(self._ranks.get(pair, math.inf), index) for index, pair in enumerate(zip(parts, parts[1:]))]
+            rank, index = min(ranked)
+            if rank == math.inf:
+                break
+            parts[index : index + 2] = [parts[index] + parts[index + 1]]
+        if self._byte_level:
+            return len(parts)
+        # SentencePiece byte fallback: a piece missing from the vocab costs one token per UTF-8 byte.
+        return sum(1 if part in self._vocab else len(part.encode("utf-8")) for part in parts)
+
+
+def load_token_counter(path: str | None) -> TokenCounter:
+    if not path:
+        return HeuristicTokenCounter()
+    tokenizer_path = Path(path)
+    try:
+        if Tokenizer is not None:
+            return HuggingFaceTokenCounter(tokenizer_path)
+        return BpeTokenCounter(tokenizer_path)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("cannot load tokenizer %s (%s); estimating 4 characters per token", path, exc)
+        return HeuristicTokenCounter()
+
+
+@functools.cache
+def _bytes_to_unicode() -> dict[int, str]:
+    # The printable byte alphabet byte-level BPE vocabularies are written in.
+    printable = [*range(ord("!"), ord("~") + 1), *range(ord("¡"), ord("¬") + 1), *range(ord("®"), ord("ÿ") + 1)]
+    mapping = {byte: chr(byte) for byte in printable}
+    extra = 0
+    for byte in range(256):
+        if byte not in mapping:
+            mapping[byte] = chr(256 + extra)
+            extra += 1
+    return mapping
@@ -1,13 +1,33 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from pathlib import Path
+from dataclasses import dataclass, field
+from datetime import datetime
 
-from app.models import GamePlan
+from app.models import GamePlan, GenerationMode, JobStatus
 
 
 @dataclass(slots=True)
 class BuildArtifact:
-    game_dir: Path
+    game_id: str
     game_url: str
     plan: GamePlan
+
+
+@dataclass(slots=True)
+class JobRecord:
+    job_id: str
+    prompt: str
+    mode: GenerationMode
+    base_game_id: str | None
+    status: JobStatus
+    created_at: datetime
+    updated_at: datetime
+    error: str | None = None
+    game_url: str | None = None
+    plan: GamePlan | None = None
+    version: int = 0
+    simulation: dict[str, object] | None = None
+    deadline_at: datetime | None = None
+    client_id: str = ""
+    batch_id: str | None = None
+    events: list[dict[str, object]] = field(default_factory=list)
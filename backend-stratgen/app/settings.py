@@ -39,6 +39,59 @@ class Settings:
     featherless_max_retries: int
     featherless_timeout_seconds: int
     featherless_http_retries: int
+    featherless_pool_size: int
+    llm_code_candidates: int
+    llm_hedge_percentile: float
+    llm_max_code_calls: int
+    llm_patch_repairs: bool
+    llm_tokenizer_path: str | None
+    llm_endpoints: str | None
+    llm_concurrency_initial: int
+    llm_concurrency_min: int
+    llm_concurrency_max: int
+    llm_breaker_failures: int
+    llm_breaker_reset_seconds: float
+    llm_breaker_wait_seconds: float
+    artifacts_dir: str | None
+    job_store_backend: str
+    job_db_path: str | None
+    job_cache_size: int
+    job_ttl_seconds: int
+    job_sweep_interval_seconds: int
+    scheduler_queue_size: int
+    scheduler_llm_concurrency: int
+    scheduler_testing_concurrency: int
+    scheduler_fast_concurrency: int
+    scheduler_client_llm_concurrency: int
+    api_keys: str
+    api_key_header: str
+    trusted_proxies: tuple[str, ...]
+    client_rate_per_minute: float
+    client_burst: int
+    batch_max_jobs: int
+    job_execution: str
+    generation_cache_enabled: bool
+    generation_cache_memory_entries: int
+    generation_cache_max_bytes: int
+    worker_lease_seconds: int
+    worker_poll_interval_seconds: float
+    worker_max_attempts: int
+    worker_metrics_port: int
+    node_check_pool_size: int
+    node_check_timeout_seconds: float
+    simulation_enabled: bool
+    simulation_frames: int
+    simulation_frame_budget_ms: float
+    simulation_object_budget: int
+    simulation_timeout_seconds: float
+    simulation_repair_attempts: int
+    modify_fast_path: bool
+    job_coalescing: bool
+    job_coalescing_max_followers: int
+    job_deadline_seconds: float
+    artifact_max_age_seconds: int
+    artifact_max_bytes: int
+    artifact_gc_interval_seconds: float
 
     @classmethod
     def from_env(cls) -> Settings:
@@ -58,4 +111,61 @@ class Settings:
             featherless_max_retries=int(os.getenv("FEATHERLESS_MAX_RETRIES", "2")),
             featherless_timeout_seconds=int(os.getenv("FEATHERLESS_TIMEOUT_SECONDS", "90")),
             featherless_http_retries=int(os.getenv("FEATHERLESS_HTTP_RETRIES", "2")),
+            featherless_pool_size=int(os.getenv("LLM_POOL_SIZE", "100")),
+            llm_code_candidates=int(os.getenv("LLM_CODE_CANDIDATES", "1")),
+            llm_hedge_percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0")),
+            llm_max_code_calls=int(os.getenv("LLM_MAX_CODE_CALLS", "0")),
+            llm_patch_repairs=os.getenv("LLM_PATCH_REPAIRS", "1").strip().lower() not in {"0", "false", "no"},
+            llm_tokenizer_path=os.getenv("LLM_TOKENIZER_PATH") or None,
+            llm_endpoints=os.getenv("LLM_ENDPOINTS") or None,
+            llm_concurrency_initial=int(os.getenv("LLM_CONCURRENCY_INITIAL", "8")),
+            llm_concurrency_min=int(os.getenv("LLM_CONCURRENCY_MIN", "1")),
+            llm_concurrency_max=int(os.getenv("LLM_CONCURRENCY_MAX", "64")),
+            llm_breaker_failures=int(os.getenv("LLM_BREAKER_FAILURES", "5")),
+            llm_breaker_reset_seconds=float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30")),
+            llm_breaker_wait_seconds=float(os.getenv("LLM_BREAKER_WAIT_SECONDS", "0")),
+            artifacts_dir=os.getenv("ARTIFACTS_DIR") or None,
+            job_store_backend=os.getenv("JOB_STORE", "sqlite").strip().lower(),
+            job_db_path=os.getenv("JOB_DB_PATH") or None,
+            job_cache_size=int(os.getenv("JOB_CACHE_SIZE", "256")),
+            job_ttl_seconds=int(os.getenv("JOB_TTL_SECONDS", "86400")),
+            job_sweep_interval_seconds=int(os.getenv("JOB_SWEEP_INTERVAL_SECONDS", "300")),
+            scheduler_queue_size=int(os.getenv("SCHEDULER_QUEUE_SIZE", "100")),
+            scheduler_llm_concurrency=int(os.getenv("SCHEDULER_LLM_CONCURRENCY", "4")),
+            scheduler_testing_concurrency=int(os.getenv("SCHEDULER_TESTING_CONCURRENCY", "2")),
+            scheduler_fast_concurrency=int(os.getenv("SCHEDULER_FAST_CONCURRENCY", "8")),
+            scheduler_client_llm_concurrency=int(os.getenv("SCHEDULER_CLIENT_LLM_CONCURRENCY", "0")),
+            api_keys=os.getenv("API_KEYS", ""),
+            api_key_header=os.getenv("API_KEY_HEADER", "X-API-Key"),
+            trusted_proxies=tuple(
+                address.strip()
+                for address in os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1").split(",")
+                if address.strip()
+            ),
+            client_rate_per_minute=float(os.getenv("CLIENT_RATE_PER_MINUTE", "30")),
+            client_burst=int(os.getenv("CLIENT_BURST", "10")),
+            batch_max_jobs=int(os.getenv("BATCH_MAX_JOBS", "100")),
+            job_execution=os.getenv("JOB_EXECUTION", "inline").strip().lower(),
+            generation_cache_enabled=os.getenv("GENERATION_CACHE_ENABLED", "1").strip().lower() not in {"0", "false", "no"},
+            generation_cache_memory_entries=int(os.getenv("GENERATION_CACHE_MEMORY_ENTRIES", "256")),
+            generation_cache_max_bytes=int(os.getenv("GENERATION_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+            worker_lease_seconds=int(os.getenv("WORKER_LEASE_SECONDS", "30")),
+            worker_poll_interval_seconds=float(os.getenv("WORKER_POLL_INTERVAL_SECONDS", "1.0")),
+            worker_max_attempts=int(os.getenv("WORKER_MAX_ATTEMPTS", "3")),
+            worker_metrics_port=int(os.getenv("WORKER_METRICS_PORT", "0")),
+            node_check_pool_size=int(os.getenv("NODE_CHECK_POOL_SIZE", "2")),
+            node_check_timeout_seconds=float(os.getenv("NODE_CHECK_TIMEOUT_SECONDS", "10")),
+            simulation_enabled=os.getenv("SIMULATION_ENABLED", "1").strip().lower() not in {"0", "false", "no"},
+            simulation_frames=int(os.getenv("SIMULATION_FRAMES", "3000")),
+            simulation_frame_budget_ms=float(os.getenv("SIMULATION_FRAME_BUDGET_MS", "8")),
+            simulation_object_budget=int(os.getenv("SIMULATION_OBJECT_BUDGET", "500")),
+            simulation_timeout_seconds=float(os.getenv("SIMULATION_TIMEOUT_SECONDS", "20")),
+            simulation_repair_attempts=int(os.getenv("SIMULATION_REPAIR_ATTEMPTS", "1")),
+            modify_fast_path=os.getenv("MODIFY_FAST_PATH", "1").strip().lower() not in {"0", "false", "no"},
+            job_coalescing=os.getenv("JOB_COALESCING", "1").strip().lower() not in {"0", "false", "no"},
+            job_coalescing_max_followers=int(os.getenv("JOB_COALESCING_MAX_FOLLOWERS", "20")),
+            job_deadline_seconds=float(os.getenv("JOB_DEADLINE_SECONDS", "600")),
+            artifact_max_age_seconds=int(os.getenv("ARTIFACT_MAX_AGE_SECONDS", str(30 * 86400))),
+            artifact_max_bytes=int(os.getenv("ARTIFACT_MAX_BYTES", str(2 * 1024 * 1024 * 1024))),
+            artifact_gc_interval_seconds=float(os.getenv("ARTIFACT_GC_INTERVAL_SECONDS", "600")),
         )
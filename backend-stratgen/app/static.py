@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import mimetypes
+import os
+
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.services.artifacts import ArtifactStore
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Preferred first; each variant is a sibling file named "<file><suffix>".
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def _accepted_encodings(scope: Scope) -> set[str]:
+    accepted: set[str] = set()
+    for item in Headers(scope=scope).get("accept-encoding", "").split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = params.replace(" ", "").removeprefix("q=")
+        try:
+            if params and float(quality) <= 0:
+                continue
+        except ValueError:
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    # Serves pre-built .br/.gz siblings when the client accepts them, always with the same Cache-Control.
+    def __init__(self, *args: object, cache_control: str = IMMUTABLE_CACHE_CONTROL, **kwargs: object):
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        accepted = _accepted_encodings(scope)
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                response = await super().get_response(f"{path}{suffix}", scope)
+            except HTTPException:
+                continue
+            if response.status_code not in (200, 304):
+                continue
+            response.headers["content-encoding"] = encoding
+            media_type, _ = mimetypes.guess_type(path)
+            if media_type and response.status_code == 200:
+                charset = "; charset=utf-8" if media_type.startswith("text/") else ""
+                response.headers["content-type"] = f"{media_type}{charset}"
+            return self._with_cache_headers(response)
+        return self._with_cache_headers(await super().get_response(path, scope))
+
+    def _with_cache_headers(self, response: Response) -> Response:
+        response.headers["cache-control"] = self.cache_control
+        response.headers["vary"] = "Accept-Encoding"
+        return response
+
+
+class ArtifactStaticFiles(StaticFiles):
+    # Serves /games/<game_id>/<file> through the artifact store's manifests instead of a directory tree.
+    def __init__(self, store: ArtifactStore, **kwargs: object):
+        super().__init__(directory=store.blobs_dir, html=True, **kwargs)
+        self.store = store
+
+    def lookup_path(self, path: str) -> tuple[str, os.stat_result | None]:
+        game_id, _, name = path.replace(os.sep, "/").partition("/")
+        if not name:
+            # A bare game id acts as a directory, so StaticFiles redirects to ".../" and serves index.html.
+            if self.store.exists(game_id):
+                return str(self.store.blobs_dir), os.stat(self.store.blobs_dir)
+            return "", None
+        blob_path = self.store.file_path(game_id, name)
+        if blob_path is None:
+            return "", None
+        try:
+            stat_result = os.stat(blob_path)
+        except FileNotFoundError:
+            return "", None
+        self.store.touch(game_id)
+        return str(blob_path), stat_result
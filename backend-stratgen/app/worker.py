@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+
+from app.bootstrap import build_job_queue, build_job_service, resolve_artifacts_dir
+from app.services.jobs import JobService
+from app.services.metrics import serve_metrics
+from app.services.queue import JobLease, JobQueue
+from app.settings import Settings
+
+logger = logging.getLogger("ggen.worker")
+
+
+class Worker:
+    def __init__(
+        self,
+        job_service: JobService,
+        job_queue: JobQueue,
+        worker_id: str,
+        concurrency: int,
+        lease_seconds: float = 30,
+        poll_interval_seconds: float = 1.0,
+        max_attempts: int = 3,
+    ):
+        self.job_service = job_service
+        self.job_queue = job_queue
+        self.worker_id = worker_id
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_attempts = max_attempts
+        self._leases: dict[str, JobLease] = {}
+        self._finished: list[JobLease] = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def run(self, grace_seconds: float = 30.0) -> None:
+        self.job_service.scheduler.start()
+        logger.info("worker %s started (concurrency=%d)", self.worker_id, self.concurrency)
+        last_heartbeat = 0.0
+        try:
+            while not self._stopping.is_set():
+                self._complete_finished()
+                reclaimed = self.job_queue.reclaim_expired()
+                if reclaimed:
+                    logger.warning("reclaimed %d expired lease(s)", reclaimed)
+                self._lease_available()
+                now = time.monotonic()
+                if now - last_heartbeat >= self.lease_seconds / 3:
+                    self._heartbeat()
+                    last_heartbeat = now
+                self._stopping.wait(self.poll_interval_seconds)
+            self._drain(grace_seconds)
+        finally:
+            self.job_service.stop()
+            with self._lock:
+                remaining = list(self._leases.values())
+                self._leases.clear()
+            # Hand unfinished jobs back so another worker can pick them up immediately.
+            for lease in remaining:
+                self.job_queue.release(lease)
+            logger.info("worker %s stopped", self.worker_id)
+
+    def _lease_available(self) -> None:
+        while True:
+            with self._lock:
+                if len(self._leases) >= self.concurrency:
+                    return
+            lease = self.job_queue.lease(self.worker_id, self.lease_seconds)
+            if lease is None:
+                return
+            if lease.attempts > self.max_attempts:
+                self._abandon(lease)
+                continue
+            with self._lock:
+                self._leases[lease.job_id] = lease
+            self.job_service.scheduler.submit(
+                lease.job_id, self._runner_for(lease), lane=lease.lane, force=True, client_id=lease.client_id
+            )
+
+    def _runner_for(self, lease: JobLease):
+        async def run(job_id: str) -> None:
+            try:
+                await self.job_service.run_job(job_id)
+            except KeyError:
+                logger.warning("job %s no longer exists, dropping it", job_id)
+            finally:
+                with self._lock:
+                    # A lost lease belongs to another worker now; completing it is not ours to do.
+                    if self._leases.get(lease.job_id) is lease:
+                        self._finished.append(lease)
+
+        return run
+
+    def _complete_finished(self) -> None:
+        with self._lock:
+            finished, self._finished = self._finished, []
+            for lease in finished:
+                if self._leases.get(lease.job_id) is lease:
+                    del self._leases[lease.job_id]
+        for lease in finished:
+            self.job_queue.complete(lease)
+
+    def _heartbeat(self) -> None:
+        with self._lock:
+            leases = list(self._leases.values())
+        held = []
+        for lease in leases:
+            if self.job_queue.heartbeat(lease, self.lease_seconds):
+                held.append(lease)
+                continue
+            logger.warning("lost lease on job %s, stopping the local run", lease.job_id)
+            with self._lock:
+                if self._leases.get(lease.job_id) is lease:
+                    del self._leases[lease.job_id]
+            self.job_service.detach_job(lease.job_id)
+        self.job_service.interrupt_cancelled(lease.job_id for lease in held)
+
+    def _abandon(self, lease: JobLease) -> None:
+        job = self.job_service.get_job(lease.job_id)
+        if job is not None:
+            self.job_service.reject_job(job, f"Job abandoned after {lease.attempts - 1} expired lease(s).")
+        self.job_queue.complete(lease)
+
+    def _drain(self, grace_seconds: float) -> None:
+        deadline = time.monotonic() + grace_seconds
+        while time.monotonic() < deadline:
+            self._complete_finished()
+            with self._lock:
+                if not self._leases:
+                    return
+            self._heartbeat()
+            time.sleep(min(self.poll_interval_seconds, 1.0))
+
+
+def main(argv: list[str] | None = None) -> None:
+    settings = Settings.from_env()
+    parser = argparse.ArgumentParser(description="Drain queued GGen jobs from the shared job queue.")
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.scheduler_llm_concurrency + settings.scheduler_testing_concurrency,
+        help="Maximum jobs leased by this worker at once.",
+    )
+    parser.add_argument("--lease-seconds", type=float, default=settings.worker_lease_seconds)
+    parser.add_argument("--poll-interval", type=float, default=settings.worker_poll_interval_seconds)
+    parser.add_argument("--max-attempts", type=int, default=settings.worker_max_attempts)
+    parser.add_argument("--grace-seconds", type=float, default=30.0)
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=settings.worker_metrics_port,
+        help="Serve Prometheus metrics on this port (0 disables).",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    # Workers always talk to the shared SQLite store, whatever the API process is configured with.
+    settings.job_execution = "external"
+    settings.job_store_backend = "sqlite"
+    artifacts_dir = resolve_artifacts_dir(settings)
+    job_service = build_job_service(settings, artifacts_dir)
+    job_queue = build_job_queue(settings, artifacts_dir)
+    assert job_queue is not None
+    worker = Worker(
+        job_service=job_service,
+        job_queue=job_queue,
+        worker_id=args.worker_id,
+        concurrency=args.concurrency,
+        lease_seconds=args.lease_seconds,
+        poll_interval_seconds=args.poll_interval,
+        max_attempts=args.max_attempts,
+    )
+
+    def _handle_signal(signum: int, _frame: object) -> None:
+        logger.info("received signal %d, draining", signum)
+        worker.stop()
+
+    signal.signal(signal.SIGINT, _handle_signal)
+    signal.signal(signal.SIGTERM, _handle_signal)
+    metrics_server = serve_metrics(args.metrics_port) if args.metrics_port > 0 else None
+    try:
+        worker.run(grace_seconds=args.grace_seconds)
+    finally:
+        if metrics_server is not None:
+            metrics_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_jsanalysis import build_scene_module  # noqa: E402
+
+from app.models import EnemyArchetype, GamePlan, SceneObject  # noqa: E402
+from app.services.artifacts import ArtifactStore  # noqa: E402
+from app.services.builder import (  # noqa: E402
+    _compose_game_js,
+    build_game_artifact,
+    extract_scene_module_from_game_js,
+    validate_generated_js,
+)
+from app.services.jsanalysis import analyze_js  # noqa: E402
+from app.services.llm import DeterministicPlanGenerator, GeminiPlanGenerator  # noqa: E402
+from app.services.nodecheck import NodeSyntaxChecker  # noqa: E402
+
+# The CPU work every job does between provider calls, timed on fixed fixtures. The baseline is
+# a JSON file kept next to the results (not committed: numbers only compare on one machine).
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "results" / "hotpaths-baseline.json"
+MODULE_SIZES = (100, 600, 2000)
+
+
+@dataclass(slots=True)
+class Case:
+    name: str
+    run: Callable[[], object]
+
+
+def small_plan() -> GamePlan:
+    return DeterministicPlanGenerator().generate_plan("Dodge falling meteors in a neon city")
+
+
+def large_plan() -> GamePlan:
+    # Every list at or near its schema limit, with long strings: the worst plan a model can return.
+    plan = small_plan().model_dump(mode="json")
+    movements = ("fall", "zigzag", "chase")
+    plan["enemy_archetypes"] = [
+        EnemyArchetype(
+            id=f"archetype_{index}",
+            movement=movements[index % 3],
+            speed=80 + index * 40,
+            radius=8 + index * 3,
+            color=f"#{index * 30:02x}4d6d",
+            count=5 + index,
+        ).model_dump(mode="json")
+        for index in range(8)
+    ]
+    kinds = ("enemy", "projectile", "pickup", "decoration")
+    plan["scene_graph_objects"] = [{"id": "player", "kind": "player"}] + [
+        SceneObject(id=f"object_{index}", kind=kinds[index % 4]).model_dump(mode="json") for index in range(99)
+    ]
+    plan["controls"] = [f"Control {index}: hold the key to steer and release to drift" for index in range(20)]
+    plan["player_rules"] = [f"Player rule {index}: " + "keep moving to survive the wave " * 4 for index in range(20)]
+    plan["enemy_rules"] = [f"Enemy rule {index}: " + "spawn above the screen and descend " * 4 for index in range(20)]
+    plan["ui_text"] = {f"label_{index}": f"Status line {index} for the heads-up display" for index in range(40)}
+    plan["core_loop"] = ("Dodge, collect and survive escalating waves. " * 11)[:500]
+    return GamePlan.model_validate(plan)
+
+
+def build_cases(scratch: Path, include_node: bool) -> list[Case]:
+    plans = {"small": small_plan(), "large": large_plan()}
+    plan_json = {size: plan.model_dump_json() for size, plan in plans.items()}
+    modules = {lines: build_scene_module(lines) for lines in MODULE_SIZES}
+    game_js = {lines: _compose_game_js(plans["small"], module) for lines, module in modules.items()}
+    cases = []
+    for size, plan in plans.items():
+        validate = lambda raw=plan_json[size]: GamePlan.model_validate_json(raw)  # noqa: E731
+        cases.append(Case(f"model_validate_json[{size} plan]", validate))
+        cases.append(Case(f"model_dump_json[{size} plan]", plan.model_dump_json))
+    for lines, module in modules.items():
+        compose = lambda module=module: _compose_game_js(plans["small"], module)  # noqa: E731
+        cases.append(Case(f"_compose_game_js[{lines} lines]", compose))
+        cases.append(Case(f"validate_generated_js[{lines} lines]", _uncached(validate_generated_js, game_js[lines])))
+        cases.append(
+            Case(
+                f"extract_scene_module_from_game_js[{lines} lines]",
+                lambda source=game_js[lines]: extract_scene_module_from_game_js(source),
+            )
+        )
+    # The module check includes the Node syntax round trip when Node is on PATH.
+    checker = NodeSyntaxChecker()
+    if not include_node:
+        checker.node_bin = None
+    generator = GeminiPlanGenerator(api_key="benchmark", model="benchmark", syntax_checker=checker)
+    for lines, module in modules.items():
+        validate_module = _uncached(generator._validate_scene_module, module)
+        cases.append(Case(f"_validate_scene_module[{lines} lines]", validate_module))
+    store = ArtifactStore(scratch)
+    counter = iter(range(10**9))
+    cases.append(
+        Case(
+            "build_game_artifact[600 lines]",
+            lambda: build_game_artifact(f"bench{next(counter)}", plans["small"], modules[600], scratch, store),
+        )
+    )
+    return cases
+
+
+def _uncached(fn: Callable[[str], object], source: str) -> Callable[[], object]:
+    # analyze_js memoizes by source text; a benchmark that only hits the cache measures nothing.
+    def run() -> object:
+        analyze_js.cache_clear()
+        return fn(source)
+
+    return run
+
+
+def measure(case: Case, min_seconds: float, repeats: int, alloc_samples: int) -> dict[str, float]:
+    case.run()
+    rates = []
+    for _ in range(repeats):
+        iterations = 0
+        started = time.perf_counter()
+        while True:
+            case.run()
+            iterations += 1
+            elapsed = time.perf_counter() - started
+            if elapsed >= min_seconds:
+                break
+        rates.append(iterations / elapsed)
+    # Peak traced memory per call and the number of blocks still held afterwards, the latter
+    # catching per-call caches or leaks.
+    peaks = []
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        for _ in range(alloc_samples):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            case.run()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - baseline)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    best = max(rates)
+    return {
+        "ops_per_second": round(best, 1),
+        "mean_us": round(1e6 / best, 2),
+        "spread": round((max(rates) - min(rates)) / best, 3),
+        "alloc_peak_kib": round(statistics.median(peaks) / 1024, 1),
+        "retained_blocks_per_call": round(retained / alloc_samples, 2),
+    }
+
+
+def find_regressions(
+    results: dict[str, dict[str, float]],
+    baseline: dict[str, dict[str, float]],
+    threshold: float,
+) -> list[str]:
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        slowdown = previous["ops_per_second"] / current["ops_per_second"] - 1
+        if slowdown > threshold:
+            regressions.append(
+                f"{name}: {previous['ops_per_second']:.0f} -> {current['ops_per_second']:.0f} ops/s ({slowdown:+.0%})"
+            )
+        # Small allocations jitter by a few KiB between runs; only flag growth that matters.
+        grown = current["alloc_peak_kib"] - previous["alloc_peak_kib"]
+        if grown > 16 and grown > previous["alloc_peak_kib"] * threshold:
+            regressions.append(
+                f"{name}: peak allocation {previous['alloc_peak_kib']} -> {current['alloc_peak_kib']} KiB"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmark the builder and validation hot paths.")
+    parser.add_argument("--min-seconds", type=float, default=0.3, help="Timing window per repeat.")
+    parser.add_argument("--repeats", type=int, default=3, help="Best of this many windows is reported.")
+    parser.add_argument("--alloc-samples", type=int, default=20)
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text.")
+    parser.add_argument("--no-node", action="store_true", help="Skip the Node syntax check in module validation.")
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline.")
+    parser.add_argument(
+        "--max-regression",
+        type=float,
+        default=0.25,
+        help="Fail when a case is this much slower (0.25 = 25%%) or allocates this much more than the baseline.",
+    )
+    parser.add_argument("--output", type=Path, default=None, help="Also write this run's results here.")
+    args = parser.parse_args(argv)
+
+    # Inside the backend directory, so the build finds vendor/phaser.min.js as it does for artifacts/.
+    with tempfile.TemporaryDirectory(prefix="artifacts-bench-", dir=BACKEND_DIR) as scratch:
+        cases = [case for case in build_cases(Path(scratch), not args.no_node) if args.filter in case.name]
+        results = {}
+        for case in cases:
+            results[case.name] = measure(case, args.min_seconds, args.repeats, args.alloc_samples)
+            stats = results[case.name]
+            print(
+                f"{case.name:<48} {stats['ops_per_second']:>12,.1f} ops/s {stats['mean_us']:>11,.2f} us "
+                f"{stats['alloc_peak_kib']:>9,.1f} KiB peak  ±{stats['spread']:.1%}"
+            )
+
+    report = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        if args.baseline.exists() and args.filter:
+            # A filtered run updates its own cases and keeps the rest of the baseline.
+            stored = json.loads(args.baseline.read_text(encoding="utf-8"))
+            report["results"] = {**stored.get("results", {}), **results}
+        args.baseline.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    if baseline.get("python") != report["python"]:
+        print(f"note: baseline was recorded on Python {baseline.get('python')}")
+    regressions = find_regressions(results, baseline.get("results", {}), args.max_regression)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        return 1
+    print(f"no regressions beyond {args.max_regression:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import argparse
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.jsanalysis import FORBIDDEN_RULES, analyze_js  # noqa: E402
+
+# Shaped like typical model output: pooled sprites, HUD strings, comments and the odd template literal.
+SCENE_HEADER = """function createGeneratedScene(Phaser, PLAN) {
+  const COLORS = { player: PLAN.player.color, enemy: '#ff4d6d', hud: '#d9faff' };
+
+  return class GeneratedScene extends Phaser.Scene {
+    constructor() {
+      super('generated');
+      this.score = 0;
+      this.lives = PLAN.player.health;
+    }
+
+    create() {
+      // Player is a simple circle texture generated in code.
+      const g = this.add.graphics();
+      g.fillStyle(Phaser.Display.Color.HexStringToColor(COLORS.player).color, 1);
+      g.fillCircle(16, 16, PLAN.player.radius);
+      g.generateTexture('player', 32, 32);
+      g.destroy();
+      this.player = this.physics.add.sprite(480, 520, 'player');
+      this.player.setCollideWorldBounds(true);
+      this.enemies = this.physics.add.group({ maxSize: 60 });
+      this.cursors = this.input.keyboard.createCursorKeys();
+      this.hud = this.add.text(16, 16, 'Score: 0', { fontSize: '18px', color: COLORS.hud });
+    }
+
+    update(time, delta) {
+      this.movePlayer(delta);
+      this.updateEnemies0(delta);
+    }
+"""
+
+SCENE_BLOCK = """
+    // Wave {i}: spawn, move and recycle enemies.
+    updateEnemies{i}(delta) {{
+      const speed = PLAN.difficulty.enemy_speed * (1 + {i} * 0.05);
+      this.enemies.children.iterate((enemy) => {{
+        if (!enemy || !enemy.active) return;
+        enemy.y += (speed * delta) / 1000;
+        if (enemy.y > this.scale.height + 20) {{
+          enemy.setActive(false).setVisible(false);
+          this.score += PLAN.difficulty.score_per_enemy;
+          this.hud.setText(`Score: ${{this.score}}`);
+        }}
+      }});
+      if (this.score >= PLAN.difficulty.target_score) {{
+        this.showMessage(PLAN.ui_text.win || "You win!");
+      }}
+    }}
+
+    spawnEnemy{i}() {{
+      const x = Phaser.Math.Between(20, this.scale.width - 20);
+      const enemy = this.enemies.get(x, -20, 'enemy');
+      if (!enemy) return null;
+      enemy.setActive(true).setVisible(true);
+      enemy.setTint(Phaser.Display.Color.HexStringToColor(COLORS.enemy).color);
+      return enemy;
+    }}
+"""
+
+
+def build_scene_module(target_lines: int) -> str:
+    blocks = []
+    index = 0
+    while (SCENE_HEADER + "".join(blocks)).count("\n") < target_lines - 3:
+        blocks.append(SCENE_BLOCK.format(i=index))
+        index += 1
+    return SCENE_HEADER + "".join(blocks) + "  };\n}\n"
+
+
+def legacy_validate(code: str) -> list[str]:
+    # The per-call regex scan the analyzer replaced, kept here as the baseline.
+    errors = [f"forbidden:{pattern}" for pattern in FORBIDDEN_RULES if re.search(pattern, code)]
+    for needle, name in (
+        ("function createGeneratedScene", "createGeneratedScene"),
+        ("extends Phaser.Scene", "extends Phaser.Scene"),
+        ("create(", "create_method"),
+        ("update(", "update_method"),
+    ):
+        if needle not in code:
+            errors.append(f"missing:{name}")
+    return errors
+
+
+def _time_ms(fn, source: str, iterations: int) -> float:
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        fn(source)
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the generated-JS static analyzer.")
+    parser.add_argument("--lines", type=int, default=600)
+    parser.add_argument("--iterations", type=int, default=300)
+    parser.add_argument("--max-ms", type=float, default=1.0, help="Fail if an uncached analysis takes longer.")
+    args = parser.parse_args(argv)
+
+    source = build_scene_module(args.lines)
+    uncached = analyze_js.__wrapped__
+    results = {
+        "legacy regex scan": _time_ms(legacy_validate, source, args.iterations),
+        "analyze_js (uncached)": _time_ms(uncached, source, args.iterations),
+        "analyze_js (cached)": _time_ms(analyze_js, source, args.iterations),
+    }
+    print(f"module: {source.count(chr(10))} lines, {len(source)} bytes")
+    for name, median_ms in results.items():
+        print(f"{name:<24} {median_ms:9.4f} ms (median of {args.iterations})")
+    if results["analyze_js (uncached)"] > args.max_ms:
+        print(f"FAIL: uncached analysis exceeds {args.max_ms} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
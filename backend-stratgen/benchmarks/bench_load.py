@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_llm import FakeLlmServer, add_arguments, config_from_args  # noqa: E402
+
+# Starts the fake provider in this process and the API under uvicorn in a child process pointed at
+# it through LLM_BASE_URL, then keeps `--concurrency` jobs in flight until `--jobs` have finished.
+# With `--endpoints N` there are N fake providers behind LLM_ENDPOINTS, each `--endpoint-skew`
+# times slower than the previous one.
+# Stage timings come from each job's own event log (server clocks); end-to-end latency is measured
+# from the client.
+
+STAGES = ("queued", "designing", "building", "testing")
+RETRY_KINDS = ("http_retry", "plan_repair", "code_repair", "code_patch", "code_candidate")
+_EVENTS_SAMPLE = re.compile(r'^ggen_generator_events_total\{kind="([^"]+)"\} (\S+)$', re.MULTILINE)
+
+
+def percentiles(values: list[float]) -> dict[str, float | int | None]:
+    if not values:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+
+    def pick(fraction: float) -> float:
+        # Nearest rank: p99 of 50 samples is the largest one, never an interpolated value.
+        rank = max(1, -(-len(ordered) * fraction // 1))
+        return round(ordered[int(rank) - 1], 4)
+
+    return {"count": len(ordered), "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99), "max": round(ordered[-1], 4)}
+
+
+class RssSampler:
+    # Resident set size of the API process, read from /proc (Linux only; None elsewhere).
+    def __init__(self, pid: int, interval: float = 0.25):
+        self.pid = pid
+        self.interval = interval
+        self.samples: list[int] = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def start(self) -> RssSampler:
+        self._thread.start()
+        return self
+
+    def stop(self) -> dict[str, float | None]:
+        self._stop.set()
+        self._thread.join(timeout=2)
+        if not self.samples:
+            return {"start_mb": None, "peak_mb": None, "end_mb": None}
+        return {
+            "start_mb": _mb(self.samples[0]),
+            "peak_mb": _mb(max(self.samples)),
+            "end_mb": _mb(self.samples[-1]),
+        }
+
+    def read(self) -> int | None:
+        try:
+            status = Path(f"/proc/{self.pid}/status").read_text()
+        except OSError:
+            return None
+        match = re.search(r"^VmRSS:\s+(\d+) kB", status, re.MULTILINE)
+        return int(match.group(1)) * 1024 if match else None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            value = self.read()
+            if value is not None:
+                self.samples.append(value)
+            self._stop.wait(self.interval)
+
+
+class LoadDriver:
+    def __init__(self, client: httpx.AsyncClient, jobs: int, concurrency: int, poll_wait: float):
+        self.client = client
+        self.jobs = jobs
+        self.concurrency = concurrency
+        self.poll_wait = poll_wait
+        self.results: list[dict[str, object]] = []
+        self.rejections = 0
+        self._issued = 0
+
+    async def run(self) -> None:
+        await asyncio.gather(*(self._worker(index) for index in range(self.concurrency)))
+
+    async def _worker(self, worker_index: int) -> None:
+        while self._issued < self.jobs:
+            self._issued += 1
+            self.results.append(await self._run_job(f"Benchmark game {self._issued} from worker {worker_index}"))
+
+    async def _run_job(self, prompt: str) -> dict[str, object]:
+        submitted = time.time()
+        while True:
+            response = await self.client.post("/jobs", json={"prompt": prompt})
+            if response.status_code not in (429, 503):
+                break
+            # Queue full: honour Retry-After like a real client would.
+            self.rejections += 1
+            await asyncio.sleep(float(response.headers.get("Retry-After", "1")))
+        response.raise_for_status()
+        job_id = response.json()["job_id"]
+        version = -1
+        while True:
+            response = await self.client.get(f"/jobs/{job_id}", params={"wait": self.poll_wait, "since": version})
+            response.raise_for_status()
+            job = response.json()
+            version = job["version"]
+            if job["status"] in ("ready", "failed"):
+                break
+        finished = time.time()
+        events = await self._events(job_id)
+        return {
+            "job_id": job_id,
+            "status": job["status"],
+            "error": job["error"],
+            "latency": finished - submitted,
+            "stages": _stage_durations(events, submitted),
+            "retries": {kind: sum(1 for event in events if event.get("type") == kind) for kind in RETRY_KINDS},
+        }
+
+    async def _events(self, job_id: str) -> list[dict[str, object]]:
+        # The SSE stream replays the whole event log and closes once the job has finished.
+        events = []
+        async with self.client.stream("GET", f"/jobs/{job_id}/events") as response:
+            async for line in response.aiter_lines():
+                if line.startswith("data: "):
+                    events.append(json.loads(line[len("data: ") :]))
+        return events
+
+
+def _stage_durations(events: list[dict[str, object]], submitted: float) -> dict[str, float]:
+    transitions = [
+        (str(event["status"]), datetime.fromisoformat(str(event["at"])).timestamp())
+        for event in events
+        if event.get("type") == "status"
+    ]
+    durations: dict[str, float] = {}
+    if transitions:
+        durations["queued"] = max(0.0, transitions[0][1] - submitted)
+    for (status, started), (_, ended) in zip(transitions, transitions[1:]):
+        durations[status] = durations.get(status, 0.0) + (ended - started)
+    return durations
+
+
+def _generator_events(metrics_text: str) -> dict[str, float]:
+    return {kind: float(value) for kind, value in _EVENTS_SAMPLE.findall(metrics_text)}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _mb(value: int) -> float:
+    return round(value / (1024 * 1024), 1)
+
+
+def start_api(port: int, llm_base_urls: list[str], artifacts_dir: Path, llm_timeout: int) -> subprocess.Popen[bytes]:
+    env = {
+        **os.environ,
+        "LLM_API_KEY": "benchmark",
+        "LLM_BASE_URL": llm_base_urls[0],
+        "LLM_MODEL": os.environ.get("LLM_MODEL", "benchmark-model"),
+        "ARTIFACTS_DIR": str(artifacts_dir),
+        "FEATHERLESS_TIMEOUT_SECONDS": str(llm_timeout),
+        # Every prompt is distinct anyway; the cache would only hide provider latency.
+        "GENERATION_CACHE_ENABLED": os.environ.get("GENERATION_CACHE_ENABLED", "0"),
+        # All benchmark traffic comes from one address; the per-client limit would only measure itself.
+        "CLIENT_RATE_PER_MINUTE": os.environ.get("CLIENT_RATE_PER_MINUTE", "0"),
+    }
+    if len(llm_base_urls) > 1:
+        env["LLM_ENDPOINTS"] = json.dumps([{"base_url": url} for url in llm_base_urls])
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port)]
+        + ["--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+
+
+async def wait_until_up(client: httpx.AsyncClient, process: subprocess.Popen[bytes], timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API process exited with code {process.returncode}")
+        try:
+            if (await client.get("/")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("API did not start in time")
+
+
+async def run_benchmark(args: argparse.Namespace) -> dict[str, object]:
+    config = config_from_args(args)
+    fakes = [
+        FakeLlmServer(replace(config, latency_scale=args.endpoint_skew**index)).start()
+        for index in range(max(1, args.endpoints))
+    ]
+    port = _free_port()
+    # Inside the backend directory, so the build finds vendor/phaser.min.js as it does for artifacts/.
+    with tempfile.TemporaryDirectory(prefix="artifacts-bench-", dir=BACKEND_DIR) as scratch:
+        process = start_api(port, [fake.base_url for fake in fakes], Path(scratch), args.llm_timeout)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency * 2 + 4)
+            async with httpx.AsyncClient(
+                base_url=f"http://127.0.0.1:{port}", timeout=args.poll_wait + 30, limits=limits
+            ) as client:
+                await wait_until_up(client, process)
+                events_before = _generator_events((await client.get("/metrics")).text)
+                sampler = RssSampler(process.pid).start()
+                driver = LoadDriver(client, args.jobs, args.concurrency, args.poll_wait)
+                started = time.perf_counter()
+                await driver.run()
+                elapsed = time.perf_counter() - started
+                rss = sampler.stop()
+                events_after = _generator_events((await client.get("/metrics")).text)
+                routes = (await client.get("/providers")).json()["providers"]
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+            for fake in fakes:
+                fake.stop()
+
+    results = driver.results
+    ready = [result for result in results if result["status"] == "ready"]
+    failures: dict[str, int] = {}
+    for result in results:
+        if result["status"] != "ready":
+            reason = str(result["error"] or "unknown")[:120]
+            failures[reason] = failures.get(reason, 0) + 1
+    return {
+        "started_at": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "config": {
+            key: (str(value) if not isinstance(value, (int, float, str, type(None))) else value)
+            for key, value in vars(args).items()
+            if key not in {"output", "compare"}
+        },
+        "duration_seconds": round(elapsed, 3),
+        "jobs": {
+            "finished": len(results),
+            "ready": len(ready),
+            "failed": len(results) - len(ready),
+            "queue_rejections": driver.rejections,
+            "failure_reasons": failures,
+        },
+        "throughput_jobs_per_second": round(len(ready) / elapsed, 3) if elapsed else None,
+        "latency_seconds": percentiles([float(result["latency"]) for result in ready]),
+        "stage_seconds": {
+            stage: percentiles([result["stages"][stage] for result in results if stage in result["stages"]])
+            for stage in STAGES
+        },
+        "retries": {kind: sum(int(result["retries"][kind]) for result in results) for kind in RETRY_KINDS},
+        "server_events": {
+            kind: round(events_after.get(kind, 0.0) - events_before.get(kind, 0.0))
+            for kind in sorted(set(events_after) | set(events_before))
+        },
+        "provider": fakes[0].snapshot() if len(fakes) == 1 else [fake.snapshot() for fake in fakes],
+        "routes": routes,
+        "rss": rss,
+    }
+
+
+def compare(report: dict[str, object], baseline: dict[str, object]) -> list[str]:
+    rows = [("throughput_jobs_per_second",), ("latency_seconds", "p50"), ("latency_seconds", "p99")]
+    rows += [("stage_seconds", stage, "p95") for stage in STAGES]
+    rows += [("rss", "peak_mb")]
+    lines = []
+    for path in rows:
+        current, previous = report, baseline
+        for key in path:
+            current = current.get(key) if isinstance(current, dict) else None
+            previous = previous.get(key) if isinstance(previous, dict) else None
+        if isinstance(current, (int, float)) and isinstance(previous, (int, float)) and previous:
+            change = (current - previous) / previous * 100
+            lines.append(f"{'.'.join(path):<32} {previous:>10} -> {current:>10} ({change:+.1f}%)")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load-test the job pipeline against a fake LLM provider.")
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--poll-wait", type=float, default=20.0, help="Long-poll wait per status request.")
+    parser.add_argument("--llm-timeout", type=int, default=10, help="FEATHERLESS_TIMEOUT_SECONDS for the API.")
+    parser.add_argument("--output", type=Path, default=None, help="Report path (default: benchmarks/results/).")
+    parser.add_argument("--compare", type=Path, default=None, help="A previous report to diff against.")
+    parser.add_argument("--endpoints", type=int, default=1, help="Fake providers to route across.")
+    parser.add_argument("--endpoint-skew", type=float, default=1.0, help="Latency factor between endpoints.")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run_benchmark(args))
+    output = args.output or Path(__file__).resolve().parent / "results" / f"load-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    jobs = report["jobs"]
+    latency = report["latency_seconds"]
+    print(
+        f"{jobs['ready']}/{jobs['finished']} ready in {report['duration_seconds']}s: "
+        f"{report['throughput_jobs_per_second']} jobs/s, {jobs['queue_rejections']} queue rejection(s)"
+    )
+    print(f"latency p50 {latency['p50']}s  p95 {latency['p95']}s  p99 {latency['p99']}s")
+    for stage, summary in report["stage_seconds"].items():
+        print(f"  {stage:<10} p50 {summary['p50']}s  p95 {summary['p95']}s  p99 {summary['p99']}s")
+    print(f"retries {report['retries']}  rss {report['rss']}")
+    if len(report["routes"]) > 1:
+        for route in report["routes"]:
+            print(
+                f"  {route['name']:<32} {route['successes']:>5} ok {route['failures']:>4} failed  "
+                f"ewma {route['latency_ewma_seconds']}s  limit {route['limit']}"
+            )
+    if args.compare is not None:
+        for line in compare(report, json.loads(args.compare.read_text(encoding="utf-8"))):
+            print(line)
+    print(f"report written to {output}")
+    return 0 if jobs["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
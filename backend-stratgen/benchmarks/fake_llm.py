@@ -0,0 +1,272 @@
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.llm import DeterministicPlanGenerator  # noqa: E402
+
+# A local stand-in for an OpenAI-compatible /v1/chat/completions endpoint. Replies are canned
+# plans and scene modules from the deterministic generator, so the pipeline validates, builds and
+# tests them like real output. Latency and failures are drawn per request.
+
+
+@dataclass(slots=True)
+class Latency:
+    kind: str
+    params: tuple[float, ...]
+
+    @classmethod
+    def parse(cls, spec: str) -> Latency:
+        # "fixed:200", "uniform:100:400", "normal:300:50", "lognormal:800:0.5" (median ms, sigma).
+        kind, *values = spec.split(":")
+        arity = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2}
+        if kind not in arity or len(values) != arity[kind]:
+            raise ValueError(f"Invalid latency spec '{spec}'")
+        return cls(kind, tuple(float(value) for value in values))
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            millis = self.params[0]
+        elif self.kind == "uniform":
+            millis = rng.uniform(*self.params)
+        elif self.kind == "normal":
+            millis = rng.gauss(*self.params)
+        else:
+            median, sigma = self.params
+            millis = median * rng.lognormvariate(0.0, sigma)
+        return max(0.0, millis) / 1000
+
+
+@dataclass(slots=True)
+class FakeLlmConfig:
+    plan_latency: Latency = field(default_factory=lambda: Latency("lognormal", (400.0, 0.4)))
+    code_latency: Latency = field(default_factory=lambda: Latency("lognormal", (1500.0, 0.5)))
+    repair_latency: Latency = field(default_factory=lambda: Latency("lognormal", (300.0, 0.4)))
+    rate_429: float = 0.0
+    rate_5xx: float = 0.0
+    rate_timeout: float = 0.0
+    hang_seconds: float = 120.0
+    invalid_plan_rate: float = 0.0
+    invalid_code_rate: float = 0.0
+    latency_scale: float = 1.0
+    seed: int | None = None
+
+
+class FakeLlmServer:
+    def __init__(self, config: FakeLlmConfig, host: str = "127.0.0.1", port: int = 0):
+        self.config = config
+        self._rng = random.Random(config.seed)
+        self._rng_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats: dict[str, int] = {}
+        generator = DeterministicPlanGenerator()
+        plan = generator.generate_plan("benchmark game")
+        self.valid_plan = plan.model_dump_json()
+        # Extra key under an extra="forbid" model: fails validation and gets repaired.
+        invalid = plan.model_dump(mode="json")
+        invalid["player"]["jump_height"] = 3
+        self.invalid_plan = json.dumps(invalid)
+        self.valid_code = generator.generate_game_code("benchmark game", plan)
+        # A renamed factory fails the marker check; the patch reply renames it back.
+        header = next(line for line in self.valid_code.splitlines() if "function createGeneratedScene" in line)
+        broken_header = header.replace("createGeneratedScene", "createScene")
+        self.invalid_code = self.valid_code.replace(header, broken_header, 1)
+        self.patch_reply = f"<<<<<<< SEARCH\n{broken_header}\n=======\n{header}\n>>>>>>> REPLACE\n"
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> FakeLlmServer:
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def snapshot(self) -> dict[str, int]:
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] = self.stats.get(key, 0) + 1
+
+    def _draw(self) -> float:
+        with self._rng_lock:
+            return self._rng.random()
+
+    def _respond(self, prompt_text: str) -> tuple[int, str, float]:
+        # (HTTP status, content, delay before answering)
+        kind = _classify(prompt_text)
+        self._count(f"requests.{kind}")
+        config = self.config
+        roll = self._draw()
+        if roll < config.rate_timeout:
+            self._count("injected.timeout")
+            return 200, "", config.hang_seconds
+        roll -= config.rate_timeout
+        if roll < config.rate_429:
+            self._count("injected.429")
+            return 429, "rate limited", 0.0
+        roll -= config.rate_429
+        if roll < config.rate_5xx:
+            self._count("injected.5xx")
+            return 503, "upstream unavailable", 0.0
+        with self._rng_lock:
+            if kind == "plan":
+                delay = config.plan_latency.sample(self._rng)
+            elif kind == "code":
+                delay = config.code_latency.sample(self._rng)
+            else:
+                delay = config.repair_latency.sample(self._rng)
+        delay *= config.latency_scale
+        if kind == "plan":
+            if self._draw() < config.invalid_plan_rate:
+                self._count("injected.invalid_plan")
+                return 200, self.invalid_plan, delay
+            return 200, self.valid_plan, delay
+        if kind == "code":
+            if self._draw() < config.invalid_code_rate:
+                self._count("injected.invalid_code")
+                return 200, self.invalid_code, delay
+            return 200, self.valid_code, delay
+        if kind == "code_patch":
+            return 200, self.patch_reply, delay
+        if kind == "code_repair":
+            return 200, self.valid_code, delay
+        return 200, self.valid_plan, delay
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:  # noqa: N802
+                length = int(self.headers.get("Content-Length", 0))
+                try:
+                    body = json.loads(self.rfile.read(length))
+                    prompt_text = "\n".join(str(message.get("content", "")) for message in body["messages"])
+                except (ValueError, KeyError, TypeError):
+                    self._send(400, {"error": {"message": "invalid request"}})
+                    return
+                status, content, delay = server._respond(prompt_text)
+                if delay:
+                    time.sleep(delay)
+                if status != 200:
+                    self._send(status, {"error": {"message": content}}, {"Retry-After": "1"})
+                    return
+                self._send(
+                    200,
+                    {
+                        "id": "chatcmpl-fake",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body.get("model", "fake"),
+                        "choices": [
+                            {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+                        ],
+                        "usage": {"prompt_tokens": len(prompt_text) // 4, "completion_tokens": len(content) // 4},
+                    },
+                )
+
+            def do_GET(self) -> None:  # noqa: N802
+                if self.path.rstrip("/") == "/stats":
+                    self._send(200, server.snapshot())
+                else:
+                    self._send(404, {"error": {"message": "not found"}})
+
+            def _send(self, status: int, payload: dict[str, object], headers: dict[str, str] | None = None) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(data)))
+                    for name, value in (headers or {}).items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up on a hung request.
+                    pass
+
+            def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+                pass
+
+        return Handler
+
+
+def _classify(prompt_text: str) -> str:
+    if "<<<<<<< SEARCH" in prompt_text:
+        return "code_patch"
+    if "REPAIR INVALID CODE" in prompt_text:
+        return "code_repair"
+    if "scene modules" in prompt_text:
+        return "code"
+    if "repair invalid JSON" in prompt_text:
+        return "plan_repair"
+    return "plan"
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--plan-latency", type=Latency.parse, default=Latency("lognormal", (400.0, 0.4)))
+    parser.add_argument("--code-latency", type=Latency.parse, default=Latency("lognormal", (1500.0, 0.5)))
+    parser.add_argument("--repair-latency", type=Latency.parse, default=Latency("lognormal", (300.0, 0.4)))
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Share of requests answered with 429.")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Share of requests answered with 503.")
+    parser.add_argument("--rate-timeout", type=float, default=0.0, help="Share of requests that hang.")
+    parser.add_argument("--hang-seconds", type=float, default=120.0)
+    parser.add_argument("--invalid-plan-rate", type=float, default=0.0)
+    parser.add_argument("--invalid-code-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> FakeLlmConfig:
+    return FakeLlmConfig(
+        plan_latency=args.plan_latency,
+        code_latency=args.code_latency,
+        repair_latency=args.repair_latency,
+        rate_429=args.rate_429,
+        rate_5xx=args.rate_5xx,
+        rate_timeout=args.rate_timeout,
+        hang_seconds=args.hang_seconds,
+        invalid_plan_rate=args.invalid_plan_rate,
+        invalid_code_rate=args.invalid_code_rate,
+        seed=args.seed,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve a fake OpenAI-compatible chat completions endpoint.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    server = FakeLlmServer(config_from_args(args), host=args.host, port=args.port).start()
+    print(f"fake LLM listening on {server.base_url} (GET /stats for counters)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,22 +1,59 @@
 from __future__ import annotations
 
-from pathlib import Path
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 
-from fastapi import BackgroundTasks, FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
-from app.models import CreateJobRequest, CreateJobResponse, JobResponse
+from app.bootstrap import (
+    build_client_resolver,
+    build_job_queue,
+    build_job_service,
+    build_plan_generator,
+    build_syntax_checker,
+    resolve_artifacts_dir,
+)
+from app.models import (
+    BatchResponse,
+    CreateBatchRequest,
+    CreateBatchResponse,
+    CreateJobRequest,
+    CreateJobResponse,
+    JobListResponse,
+    JobResponse,
+    JobStatus,
+    JobSummary,
+)
 from app.settings import Settings
-from app.services.jobs import JobService
-from app.services.llm import DeterministicPlanGenerator, FeatherlessPlanGenerator
+from app.services.clients import RateLimitedError
+from app.static import ArtifactStaticFiles, PrecompressedStaticFiles
+from app.services.llm import DeterministicPlanGenerator
+from app.services.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, REGISTRY
+from app.services.scheduler import QueueFullError
+from app.services.store import FINISHED_STATUSES
+from app.services.types import JobRecord
+
+MAX_LONG_POLL_SECONDS = 60
+MAX_BULK_JOB_IDS = 200
+SSE_KEEPALIVE_SECONDS = 15
+
+settings = Settings.from_env()
+ARTIFACTS_DIR = resolve_artifacts_dir(settings)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    job_service.start()
+    try:
+        yield
+    finally:
+        job_service.stop()
 
-BASE_DIR = Path(__file__).resolve().parent
-ARTIFACTS_DIR = BASE_DIR / "artifacts"
-ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
-(ARTIFACTS_DIR / "games").mkdir(parents=True, exist_ok=True)
 
-app = FastAPI(title="GGen Backend", version="0.1.0")
+app = FastAPI(title="GGen Backend", version="0.1.0", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -29,49 +66,214 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.mount("/games", StaticFiles(directory=ARTIFACTS_DIR / "games", html=True), name="games")
-
-settings = Settings.from_env()
-if settings.featherless_api_key:
-    plan_generator = FeatherlessPlanGenerator(
-        api_key=settings.featherless_api_key,
-        model=settings.featherless_model,
-        base_url=settings.featherless_base_url,
-        max_tokens=settings.featherless_max_tokens,
-        context_window=settings.featherless_context_window,
-        context_chars=settings.featherless_context_chars,
-        max_retries=settings.featherless_max_retries,
-        timeout_seconds=settings.featherless_timeout_seconds,
-        http_retries=settings.featherless_http_retries,
-    )
-else:
-    plan_generator = DeterministicPlanGenerator()
+client_resolver = build_client_resolver(settings)
+syntax_checker = build_syntax_checker(settings)
+plan_generator = build_plan_generator(settings, syntax_checker)
+job_service = build_job_service(
+    settings,
+    ARTIFACTS_DIR,
+    job_queue=build_job_queue(settings, ARTIFACTS_DIR),
+    plan_generator=plan_generator,
+    syntax_checker=syntax_checker,
+)
 
-job_service = JobService(artifacts_root=ARTIFACTS_DIR, plan_generator=plan_generator)
+app.mount("/games", ArtifactStaticFiles(job_service.artifact_store), name="games")
+app.mount("/runtime", PrecompressedStaticFiles(directory=ARTIFACTS_DIR / "runtime"), name="runtime")
 
 
 @app.get("/")
 def read_root() -> dict[str, str]:
-    mode = "featherless" if settings.featherless_api_key else "deterministic"
+    mode = "deterministic" if isinstance(plan_generator, DeterministicPlanGenerator) else "featherless"
     return {"message": "GGen backend is running.", "plan_generator": mode}
 
 
 @app.post("/jobs", response_model=CreateJobResponse)
-def create_job(payload: CreateJobRequest, background_tasks: BackgroundTasks) -> CreateJobResponse:
+def create_job(payload: CreateJobRequest, request: Request) -> CreateJobResponse:
+    client_id = client_resolver.resolve(request.headers, request.client.host if request.client else None)
     try:
-        job = job_service.create_job(payload.prompt, mode=payload.mode, base_game_id=payload.base_game_id)
+        job = job_service.create_job(
+            payload.prompt,
+            mode=payload.mode,
+            base_game_id=payload.base_game_id,
+            deadline_seconds=payload.deadline_seconds,
+            client_id=client_id,
+        )
+    except RateLimitedError as exc:
+        raise HTTPException(
+            status_code=429,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
     except ValueError as exc:
         raise HTTPException(status_code=422, detail=str(exc)) from exc
-    background_tasks.add_task(job_service.process_job, job.job_id)
+    try:
+        job_service.submit_job(job.job_id)
+    except QueueFullError as exc:
+        job_service.reject_job(job, str(exc))
+        raise HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
     return CreateJobResponse(job_id=job.job_id, status=job.status, mode=job.mode)
 
 
+@app.post("/jobs/batch", response_model=CreateBatchResponse)
+def create_batch(payload: CreateBatchRequest, request: Request) -> CreateBatchResponse:
+    client_id = client_resolver.resolve(request.headers, request.client.host if request.client else None)
+    try:
+        batch_id, jobs = job_service.create_batch(
+            payload.prompts,
+            mode=payload.mode,
+            base_game_id=payload.base_game_id,
+            deadline_seconds=payload.deadline_seconds,
+            client_id=client_id,
+        )
+    except RateLimitedError as exc:
+        raise HTTPException(
+            status_code=429,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    try:
+        job_service.submit_batch(jobs)
+    except QueueFullError as exc:
+        for job in jobs:
+            job_service.reject_job(job, str(exc))
+        raise HTTPException(
+            status_code=503,
+            detail=str(exc),
+            headers={"Retry-After": str(exc.retry_after)},
+        ) from exc
+    return CreateBatchResponse(
+        batch_id=batch_id,
+        jobs=[CreateJobResponse(job_id=job.job_id, status=job.status, mode=job.mode) for job in jobs],
+    )
+
+
+@app.get("/jobs", response_model=JobListResponse)
+def list_jobs(ids: str = Query(min_length=1, description="Comma-separated job ids")) -> JobListResponse:
+    job_ids = list(dict.fromkeys(job_id.strip() for job_id in ids.split(",") if job_id.strip()))
+    if len(job_ids) > MAX_BULK_JOB_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BULK_JOB_IDS} job ids per request")
+    jobs = job_service.get_jobs(job_ids)
+    found = {job.job_id for job in jobs}
+    return JobListResponse(
+        jobs=[_job_summary(job) for job in jobs],
+        missing=[job_id for job_id in job_ids if job_id not in found],
+    )
+
+
+@app.get("/batches/{batch_id}", response_model=BatchResponse)
+def get_batch(batch_id: str) -> BatchResponse:
+    jobs = job_service.get_batch(batch_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    counts: dict[JobStatus, int] = {}
+    for job in jobs:
+        counts[job.status] = counts.get(job.status, 0) + 1
+    return BatchResponse(
+        batch_id=batch_id,
+        total=len(jobs),
+        counts=counts,
+        finished=all(job.status in FINISHED_STATUSES for job in jobs),
+        jobs=[_job_summary(job) for job in jobs],
+    )
+
+
+@app.get("/cache")
+def get_cache_stats() -> dict[str, object]:
+    return job_service.cache_stats()
+
+
+@app.get("/artifacts")
+def get_artifact_stats() -> dict[str, object]:
+    return job_service.artifact_stats()
+
+
+@app.get("/scheduler")
+def get_scheduler_stats() -> dict[str, object]:
+    return job_service.scheduler_stats()
+
+
+@app.get("/providers")
+def get_provider_stats() -> dict[str, object]:
+    return job_service.provider_stats()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(REGISTRY.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/jobs/{job_id}", response_model=JobResponse)
-def get_job(job_id: str) -> JobResponse:
-    job = job_service.get_job(job_id)
+async def get_job(
+    job_id: str,
+    wait: float = Query(default=0, ge=0, le=MAX_LONG_POLL_SECONDS),
+    since: int = Query(default=-1, ge=-1),
+) -> JobResponse:
+    if wait > 0:
+        job = await job_service.wait_for_update(job_id, since=since, timeout=wait)
+    else:
+        job = job_service.get_job(job_id)
     if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+
+@app.delete("/jobs/{job_id}", response_model=JobResponse)
+def cancel_job(job_id: str) -> JobResponse:
+    job = job_service.cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return _job_response(job)
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str, request: Request) -> StreamingResponse:
+    if job_service.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    last_event_id = request.headers.get("last-event-id", "0")
+    since = int(last_event_id) if last_event_id.isdigit() else 0
+    return StreamingResponse(
+        _job_event_stream(job_id, since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _job_event_stream(job_id: str, since: int) -> AsyncIterator[str]:
+    while True:
+        job = await job_service.wait_for_update(job_id, since=since, timeout=SSE_KEEPALIVE_SECONDS)
+        if job is None:
+            yield _sse_message("error", {"message": "Job not found"})
+            return
+        new_events = [event for event in job.events if int(event["version"]) > since]
+        for event in new_events:
+            yield _sse_message(str(event["type"]), event, event_id=int(event["version"]))
+        if not new_events:
+            yield ": keep-alive\n\n"
+        since = job.version
+        if job.status in FINISHED_STATUSES:
+            yield _sse_message(
+                "done",
+                {"status": job.status.value, "game_url": job.game_url, "error": job.error, "version": job.version},
+                event_id=job.version,
+            )
+            return
+
+
+def _sse_message(event: str, data: dict[str, object], event_id: int | None = None) -> str:
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data, separators=(',', ':'))}")
+    return "\n".join(lines) + "\n\n"
+
 
+def _job_response(job: JobRecord) -> JobResponse:
     return JobResponse(
         job_id=job.job_id,
         status=job.status,
@@ -81,4 +283,18 @@ def get_job(job_id: str) -> JobResponse:
         error=job.error,
         game_url=job.game_url,
         plan=job.plan,
+        version=job.version,
+        simulation=job.simulation,
+        deadline_at=job.deadline_at,
+        batch_id=job.batch_id,
+    )
+
+
+def _job_summary(job: JobRecord) -> JobSummary:
+    return JobSummary(
+        job_id=job.job_id,
+        status=job.status,
+        game_url=job.game_url,
+        error=job.error,
+        version=job.version,
     )
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import time
+
+from app.services.deadlines import Deadline, job_deadline
+from app.services.llm import _guard_outcome
+from app.services.resilience import OUTCOME_CANCELLED, OUTCOME_OK, OUTCOME_TIMEOUT
+
+
+def _expired() -> Deadline:
+    return Deadline(time.monotonic() - 1)
+
+
+def test_deadline_timeout_first_then_provider_timeout() -> None:
+    with job_deadline(_expired()):
+        assert _guard_outcome(OUTCOME_TIMEOUT) == OUTCOME_CANCELLED
+    assert _guard_outcome(OUTCOME_TIMEOUT) == OUTCOME_TIMEOUT
+
+
+def test_provider_timeout_first_then_deadline_timeout() -> None:
+    assert _guard_outcome(OUTCOME_TIMEOUT) == OUTCOME_TIMEOUT
+    with job_deadline(_expired()):
+        assert _guard_outcome(OUTCOME_TIMEOUT) == OUTCOME_CANCELLED
+    with job_deadline(Deadline(time.monotonic() + 60)):
+        assert _guard_outcome(OUTCOME_TIMEOUT) == OUTCOME_TIMEOUT
+
+
+def test_other_outcomes_pass_through() -> None:
+    with job_deadline(_expired()):
+        assert _guard_outcome(OUTCOME_OK) == OUTCOME_OK
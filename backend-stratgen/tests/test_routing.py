@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from app.services.resilience import OUTCOME_OK, OUTCOME_REJECTED, OUTCOME_UNAVAILABLE, ProviderGuard
+from app.services.routing import Endpoint, Route
+
+
+def _route() -> Route:
+    return Route(Endpoint(name="a", base_url="http://a", api_key="k", model="m"), ProviderGuard("a"), alpha=1.0)
+
+
+def test_rejected_request_records_latency_without_failure() -> None:
+    route = _route()
+    route.observe(1.0, OUTCOME_OK)
+    route.observe(0.5, OUTCOME_REJECTED, "400 prompt too long")
+    assert route.latency == 0.5
+    assert route.failures == 0
+    assert route.consecutive_failures == 0
+    assert route.last_error is None
+
+
+def test_unavailable_counts_as_failure() -> None:
+    route = _route()
+    route.observe(1.0, OUTCOME_OK)
+    route.observe(0.1, OUTCOME_UNAVAILABLE, "503")
+    assert route.latency == 2.0
+    assert route.failures == 1
+    assert route.consecutive_failures == 1
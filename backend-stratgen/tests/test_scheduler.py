@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import pytest
+
+from app.services.scheduler import JobScheduler, QueueFullError
+
+
+def test_parked_jobs_hold_queue_places() -> None:
+    scheduler = JobScheduler(max_queue_size=2)
+    scheduler.park()
+    scheduler.park()
+    with pytest.raises(QueueFullError):
+        scheduler.park()
+    with pytest.raises(QueueFullError):
+        scheduler.reserve(1)
+    scheduler.park(force=True)
+    assert scheduler.stats()["parked"] == 3
+    scheduler.unpark(2)
+    scheduler.reserve(1)
+
+
+def test_reserved_place_becomes_parked() -> None:
+    scheduler = JobScheduler(max_queue_size=2)
+    scheduler.reserve(2)
+    scheduler.park(reserved=True)
+    with pytest.raises(QueueFullError):
+        scheduler.park()
+    scheduler.unreserve()
+    scheduler.park()
+    assert scheduler.stats()["parked"] == 2
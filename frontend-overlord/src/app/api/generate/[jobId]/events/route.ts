@@ -0,0 +1,41 @@
+import { NextResponse } from "next/server";
+
+const BACKEND_BASE_URL = process.env.BACKEND_BASE_URL?.replace(/\/$/, "") ?? "http://127.0.0.1:8000";
+
+export const dynamic = "force-dynamic";
+
+export async function GET(
+  request: Request,
+  context: { params: Promise<{ jobId: string }> },
+) {
+  try {
+    const params = await context.params;
+    const lastEventId = request.headers.get("Last-Event-ID");
+    const response = await fetch(`${BACKEND_BASE_URL}/jobs/${params.jobId}/events`, {
+      method: "GET",
+      cache: "no-store",
+      headers: lastEventId ? { "Last-Event-ID": lastEventId } : undefined,
+      signal: request.signal,
+    });
+
+    if (!response.ok || !response.body) {
+      const bodyText = await response.text();
+      return new NextResponse(bodyText, {
+        status: response.status,
+        headers: { "Content-Type": response.headers.get("Content-Type") ?? "application/json" },
+      });
+    }
+
+    return new Response(response.body, {
+      status: 200,
+      headers: {
+        "Content-Type": "text/event-stream",
+        "Cache-Control": "no-cache, no-transform",
+        Connection: "keep-alive",
+      },
+    });
+  } catch (error) {
+    const message = error instanceof Error ? error.message : "Unable to stream generation job events.";
+    return NextResponse.json({ error: message }, { status: 500 });
+  }
+}
@@ -3,14 +3,17 @@ import { NextResponse } from "next/server";
 const BACKEND_BASE_URL = process.env.BACKEND_BASE_URL?.replace(/\/$/, "") ?? "http://127.0.0.1:8000";
 
 export async function GET(
-  _request: Request,
+  request: Request,
   context: { params: Promise<{ jobId: string }> },
 ) {
   try {
     const params = await context.params;
-    const response = await fetch(`${BACKEND_BASE_URL}/jobs/${params.jobId}`, {
+    // Forward long-poll parameters (`wait`, `since`) untouched.
+    const { search } = new URL(request.url);
+    const response = await fetch(`${BACKEND_BASE_URL}/jobs/${params.jobId}${search}`, {
       method: "GET",
       cache: "no-store",
+      signal: request.signal,
     });
 
     const bodyText = await response.text();
@@ -23,3 +26,25 @@ export async function GET(
     return NextResponse.json({ error: message }, { status: 500 });
   }
 }
+
+export async function DELETE(
+  _request: Request,
+  context: { params: Promise<{ jobId: string }> },
+) {
+  try {
+    const params = await context.params;
+    const response = await fetch(`${BACKEND_BASE_URL}/jobs/${params.jobId}`, {
+      method: "DELETE",
+      cache: "no-store",
+    });
+
+    const bodyText = await response.text();
+    return new NextResponse(bodyText, {
+      status: response.status,
+      headers: { "Content-Type": response.headers.get("Content-Type") ?? "application/json" },
+    });
+  } catch (error) {
+    const message = error instanceof Error ? error.message : "Unable to cancel generation job.";
+    return NextResponse.json({ error: message }, { status: 500 });
+  }
+}
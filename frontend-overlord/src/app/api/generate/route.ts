@@ -2,13 +2,25 @@ import { NextResponse } from "next/server";
 
 const BACKEND_BASE_URL = process.env.BACKEND_BASE_URL?.replace(/\/$/, "") ?? "http://127.0.0.1:8000";
 
+// The backend rate-limits and schedules per client; pass on who the client is, not this proxy.
+function clientHeaders(request: Request): Record<string, string> {
+  const headers: Record<string, string> = {};
+  for (const name of ["x-forwarded-for", "x-api-key"]) {
+    const value = request.headers.get(name);
+    if (value) {
+      headers[name] = value;
+    }
+  }
+  return headers;
+}
+
 export async function POST(request: Request) {
   try {
     const payload = await request.json();
 
     const response = await fetch(`${BACKEND_BASE_URL}/jobs`, {
       method: "POST",
-      headers: { "Content-Type": "application/json" },
+      headers: { "Content-Type": "application/json", ...clientHeaders(request) },
       body: JSON.stringify(payload),
       cache: "no-store",
     });
@@ -6,7 +6,7 @@ import LeftSidebar from "@/components/LeftSidebar";
 import CentralPreview from "@/components/CentralPreview";
 import RightSettings from "@/components/RightSettings";
 
-type JobStatus = "designing" | "building" | "testing" | "ready" | "failed";
+type JobStatus = "designing" | "building" | "testing" | "ready" | "failed" | "cancelled" | "timed_out";
 
 interface CreateJobResponse {
   job_id: string;
@@ -17,13 +17,92 @@ interface JobResponse {
   status: JobStatus;
   error: string | null;
   game_url: string | null;
+  version: number;
 }
 
+interface JobEvent {
+  type: string;
+  status: JobStatus;
+  message?: string | null;
+}
+
+const JOB_TIMEOUT_MS = 180_000;
+const LONG_POLL_SECONDS = 25;
+
 const BACKEND_ORIGIN =
   process.env.NEXT_PUBLIC_BACKEND_ORIGIN?.replace(/\/$/, "") ?? "http://127.0.0.1:8000";
 
-function wait(ms: number): Promise<void> {
-  return new Promise((resolve) => setTimeout(resolve, ms));
+const FINISHED_STATUSES: JobStatus[] = ["ready", "failed", "cancelled", "timed_out"];
+
+function isFinished(status: JobStatus): boolean {
+  return FINISHED_STATUSES.includes(status);
+}
+
+function cancelJob(jobId: string): void {
+  // Best effort; `keepalive` lets the request outlive a page that is being closed.
+  void fetch(`/api/generate/${jobId}`, { method: "DELETE", keepalive: true }).catch(() => undefined);
+}
+
+function describeEvent(event: JobEvent): string {
+  if (event.type === "status" || !event.message) {
+    return `Generating game: ${event.status}`;
+  }
+  return `Generating game: ${event.status} (${event.message})`;
+}
+
+class EventStreamUnavailableError extends Error {}
+
+function streamJob(jobId: string, onUpdate: (text: string) => void): Promise<JobResponse> {
+  return new Promise((resolve, reject) => {
+    const source = new EventSource(`/api/generate/${jobId}/events`);
+    const timer = setTimeout(() => {
+      source.close();
+      reject(new Error("Timed out while waiting for the game to be ready."));
+    }, JOB_TIMEOUT_MS);
+    const finish = (callback: () => void) => {
+      clearTimeout(timer);
+      source.close();
+      callback();
+    };
+
+    const onJobEvent = (message: MessageEvent<string>) => {
+      onUpdate(describeEvent(JSON.parse(message.data) as JobEvent));
+    };
+    for (const type of ["status", "plan_repair", "code_repair", "http_retry"]) {
+      source.addEventListener(type, onJobEvent as EventListener);
+    }
+    source.addEventListener("done", ((message: MessageEvent<string>) => {
+      finish(() => resolve(JSON.parse(message.data) as JobResponse));
+    }) as EventListener);
+    // EventSource reconnects on its own; fall back to long-polling instead of looping on errors.
+    source.onerror = () => finish(() => reject(new EventStreamUnavailableError("Job event stream unavailable.")));
+  });
+}
+
+async function longPollJob(jobId: string, onUpdate: (text: string) => void): Promise<JobResponse> {
+  const deadline = Date.now() + JOB_TIMEOUT_MS;
+  let version = -1;
+
+  while (Date.now() < deadline) {
+    const jobResponse = await fetch(`/api/generate/${jobId}?wait=${LONG_POLL_SECONDS}&since=${version}`, {
+      method: "GET",
+      cache: "no-store",
+    });
+
+    if (!jobResponse.ok) {
+      const bodyText = await jobResponse.text();
+      throw new Error(bodyText || "Failed to fetch job status.");
+    }
+
+    const job = (await jobResponse.json()) as JobResponse;
+    version = job.version;
+    onUpdate(`Generating game: ${job.status}`);
+    if (isFinished(job.status)) {
+      return job;
+    }
+  }
+
+  throw new Error("Timed out while waiting for the game to be ready.");
 }
 
 function toAbsoluteGameUrl(gameUrl: string): string {
@@ -45,11 +124,21 @@ export default function Home() {
     setGameUrl(null);
     setStatusText("Creating generation job...");
 
+    let jobId: string | null = null;
+    let jobDone = false;
+    // Closing the tab abandons the job; stop the backend from spending LLM calls on it.
+    const onPageHide = () => {
+      if (jobId && !jobDone) {
+        cancelJob(jobId);
+      }
+    };
+    window.addEventListener("pagehide", onPageHide);
+
     try {
       const createResponse = await fetch("/api/generate", {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ prompt, mode: "new" }),
+        body: JSON.stringify({ prompt, mode: "new", deadline_seconds: JOB_TIMEOUT_MS / 1000 }),
       });
 
       if (!createResponse.ok) {
@@ -58,46 +147,37 @@ export default function Home() {
       }
 
       const created = (await createResponse.json()) as CreateJobResponse;
-      let status = created.status;
-      setStatusText(`Job ${created.job_id.slice(0, 8)} started (${status}).`);
-
-      for (let attempt = 0; attempt < 120; attempt += 1) {
-        await wait(1500);
-
-        const jobResponse = await fetch(`/api/generate/${created.job_id}`, {
-          method: "GET",
-          cache: "no-store",
-        });
-
-        if (!jobResponse.ok) {
-          const bodyText = await jobResponse.text();
-          throw new Error(bodyText || "Failed to fetch job status.");
-        }
-
-        const job = (await jobResponse.json()) as JobResponse;
-        status = job.status;
-        setStatusText(`Generating game: ${status}`);
-
-        if (status === "ready") {
-          if (!job.game_url) {
-            throw new Error("Game finished but no game URL was returned.");
-          }
-          setGameUrl(toAbsoluteGameUrl(job.game_url));
-          setStatusText("Game ready.");
-          return;
-        }
-
-        if (status === "failed") {
-          throw new Error(job.error || "Game generation failed.");
+      jobId = created.job_id;
+      setStatusText(`Job ${created.job_id.slice(0, 8)} started (${created.status}).`);
+
+      let job: JobResponse;
+      try {
+        job = await streamJob(created.job_id, setStatusText);
+      } catch (streamError) {
+        if (!(streamError instanceof EventStreamUnavailableError)) {
+          throw streamError;
         }
+        job = await longPollJob(created.job_id, setStatusText);
       }
+      jobDone = true;
 
-      throw new Error("Timed out while waiting for the game to be ready.");
+      if (job.status !== "ready") {
+        throw new Error(job.error || `Game generation ${job.status.replace("_", " ")}.`);
+      }
+      if (!job.game_url) {
+        throw new Error("Game finished but no game URL was returned.");
+      }
+      setGameUrl(toAbsoluteGameUrl(job.game_url));
+      setStatusText("Game ready.");
     } catch (err) {
+      if (jobId && !jobDone) {
+        cancelJob(jobId);
+      }
       const message = err instanceof Error ? err.message : "Unexpected generation error.";
       setError(message);
       setStatusText("Generation failed.");
     } finally {
+      window.removeEventListener("pagehide", onPageHide);
       setIsGenerating(false);
     }
   };